@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark the readers in scania_component_x_summary.py.
+
+Times each engine over train_operational_readouts.csv, serially and over
+a process pool of --workers, and checks that they agree with the serial
+DictReader path exactly. Without --src a synthetic dataset shaped like
+Component X (same file names and columns, numeric readout columns filled
+with noise) is written to a temporary directory first.
+
+Usage:
+  python scripts/bench_scania_summary.py --src /path/to/data
+  python scripts/bench_scania_summary.py --vehicles 5000 --readouts 200
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import scania_component_x_summary as summary
+
+READOUT_COLUMNS = 105  # numeric counters/histogram bins after vehicle_id,time_step
+
+
+def write_synthetic(dest: Path, vehicles: int, readouts: int, seed: int = 7) -> int:
+    """Write train_tte/specifications/operational_readouts CSVs; returns readout rows."""
+    rng = random.Random(seed)
+    rows = 0
+    features = [f"{100 + i}_{i % 10}" for i in range(READOUT_COLUMNS)]
+    with (dest / "train_tte.csv").open("w", newline="") as tte, \
+            (dest / "train_specifications.csv").open("w", newline="") as specs, \
+            (dest / "train_operational_readouts.csv").open("w", newline="") as ops:
+        tte_w, spec_w, ops_w = csv.writer(tte), csv.writer(specs), csv.writer(ops)
+        tte_w.writerow(["vehicle_id", "length_of_study_time_step", "in_study_repair"])
+        spec_w.writerow(["vehicle_id"] + [f"Spec_{i}" for i in range(8)])
+        ops_w.writerow(["vehicle_id", "time_step"] + features)
+        for vid in range(vehicles):
+            count = rng.randint(max(1, readouts // 2), readouts * 3 // 2)
+            steps = sorted(round(rng.uniform(0, 500), 1) for _ in range(count))
+            tte_w.writerow([vid, round(steps[-1] + rng.uniform(0, 20), 1), int(rng.random() < 0.1)])
+            spec_w.writerow([vid] + [f"Cat{rng.randint(0, 3 + i)}" for i in range(8)])
+            for step in steps:
+                ops_w.writerow([vid, step] + [rng.randint(0, 99999) for _ in features])
+            rows += count
+    return rows
+
+
+def bench(engines: Dict[str, Callable[[Path], Dict[str, float]]], path: Path,
+          repeat: int) -> List[Tuple[str, float, Dict[str, float]]]:
+    results = []
+    for name, reader in engines.items():
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            maxima = reader(path)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        results.append((name, best, maxima))
+    return results
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--src", help="Dataset directory (default: generate a synthetic one)")
+    parser.add_argument("--vehicles", type=int, default=2000, help="Synthetic vehicles (default: 2000)")
+    parser.add_argument("--readouts", type=int, default=100,
+                        help="Average synthetic readouts per vehicle (default: 100)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Processes for the parallel runs (default: one per CPU)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per engine, best is reported")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    engines: Dict[str, Callable[[Path], Dict[str, float]]] = {"csv": summary.read_max_time_steps}
+    if summary.pa is not None:
+        engines["arrow"] = summary.read_max_time_steps_arrow
+    else:
+        print("pyarrow not installed: benchmarking the csv engine only")
+    for name in list(engines):
+        engines[f"{name} x{args.workers}"] = partial(
+            summary.read_max_time_steps_parallel, engine=name, workers=args.workers)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.src:
+            src = Path(args.src).expanduser().resolve()
+        else:
+            src = Path(tmp)
+            print(f"Generating {args.vehicles} vehicles x ~{args.readouts} readouts ...")
+            write_synthetic(src, args.vehicles, args.readouts)
+        path = src / "train_operational_readouts.csv"
+        size_mb = path.stat().st_size / 1e6
+
+        results = bench(engines, path, args.repeat)
+        baseline_time, baseline = results[0][1], results[0][2]
+        print(f"{path.name}: {size_mb:.0f} MB, {len(baseline)} vehicles\n")
+        print(f"{'engine':<12} {'seconds':>9} {'MB/s':>8} {'speedup':>8}  matches csv")
+        for name, elapsed, maxima in results:
+            print(f"{name:<12} {elapsed:>9.3f} {size_mb / elapsed:>8.1f} "
+                  f"{baseline_time / elapsed:>7.1f}x  {'yes' if maxima == baseline else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
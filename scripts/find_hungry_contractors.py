@@ -4,17 +4,30 @@ Find Hungry Contractors - Page 2-3 of Google
 The ones who NEED leads because they're not ranking well.
 
 Usage:
-    python3 find_hungry_contractors.py
+    SERPAPI_KEY=... python3 find_hungry_contractors.py
 
 Edit the LOCATIONS and SEARCH_TERM variables below.
+
+SERPs are fetched by a small worker pool and every response is kept in
+SERP_CACHE_FILE, so a page is paid for once: rerunning (or extending) a
+sweep only fetches pages that were never fetched before. A cached page adds
+nothing to the rank history; to get a fresh observation each week, set
+RANK_REFRESH_DAYS (or CACHE_MAX_DAYS) and pay for the refetch.
 """
 
 import requests
 import time
 import json
 import csv
+import os
+import random
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
+from rank_history import RankHistory
+
 # ============================================================
 # CONFIGURE THESE
 # ============================================================
@@ -59,6 +72,7 @@ SEARCH_TERMS = [
 ]
 
 # >>> PICK WHICH ONES TO SEARCH <<<
+# (ACTIVE_SEARCHES = SEARCH_TERMS sweeps every trade)
 ACTIVE_SEARCHES = [
     "landscaper",
     "lawn care",
@@ -85,53 +99,172 @@ END_PAGE = 3    # End at page 3
 
 OUTPUT_FILE = "hungry_contractors.csv"
 
+# SerpAPI (recommended - $50/mo for 5000 searches): https://serpapi.com
+SERPAPI_KEY = os.environ.get("SERPAPI_KEY", "")  # Or add your key here
+
+MAX_WORKERS = 4           # SERPs fetched at once
+MAX_SEARCHES = 500        # Paid searches per run at most (also capped by what's left on the plan)
+SERP_CACHE_FILE = "serp_cache.sqlite"
+CACHE_MAX_DAYS = None     # Refetch cached SERPs older than this; None = never pay twice
+TRACK_RANKS = True        # Append every fetched page to the rank history (rank_history.py)
+RANK_REFRESH_DAYS = None  # With TRACK_RANKS, refetch (and pay for) SERPs older than this,
+                          # e.g. 6 so a weekly run adds a new observation for every page
+
 # ============================================================
 # SCRIPT - Don't edit below unless you know what you're doing
 # ============================================================
 
+SERPAPI_URL = "https://serpapi.com/search"
+SERPAPI_ACCOUNT_URL = "https://serpapi.com/account"
+# SerpAPI reports an empty SERP as an error; that answer is still worth caching,
+# other errors (bad key, out of searches) are not
+NO_RESULTS_ERROR = "hasn't returned any results"
+
+session = requests.Session()
+session.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=MAX_WORKERS))
+
+
+class SerpCache:
+    """Raw SerpAPI responses in SQLite, keyed by (query, start)"""
+
+    def __init__(self, path=SERP_CACHE_FILE, max_days=CACHE_MAX_DAYS):
+        self.max_age = max_days * 86400 if max_days is not None else None
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS serps (
+                query TEXT NOT NULL,
+                start INTEGER NOT NULL,
+                response TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (query, start)
+            )
+        """)
+        self.db.commit()
+
+    def get(self, query, start):
+        """(data, fetched_at), or None if never fetched or too old"""
+        with self.lock:
+            row = self.db.execute("SELECT response, fetched_at FROM serps WHERE query = ? AND start = ?",
+                                  (query, start)).fetchone()
+        if row is None or (self.max_age is not None and time.time() - row[1] > self.max_age):
+            return None
+        return json.loads(row[0]), row[1]
+
+    def put(self, query, start, data, fetched_at):
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO serps VALUES (?, ?, ?, ?)",
+                            (query, start, json.dumps(data), fetched_at))
+            self.db.commit()
+
+
+_cache = None
+
+
+def cache_max_days():
+    """Age in days after which a cached SERP is refetched (None: never)"""
+    if not TRACK_RANKS or RANK_REFRESH_DAYS is None:
+        return CACHE_MAX_DAYS
+    # A page served from the cache keeps its old fetched_at, which the rank history
+    # has already recorded
+    if CACHE_MAX_DAYS is None:
+        return RANK_REFRESH_DAYS
+    return min(CACHE_MAX_DAYS, RANK_REFRESH_DAYS)
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = SerpCache(max_days=cache_max_days())
+    return _cache
+
+
+def searches_left():
+    """
+    (searches left on the SerpAPI plan, hourly rate limit), either None if
+    the account API can't say. The account lookup itself is free.
+    """
+    try:
+        account = session.get(SERPAPI_ACCOUNT_URL, params={"api_key": SERPAPI_KEY},
+                              timeout=15).json()
+    except (requests.RequestException, ValueError):
+        return None, None
+    return account.get("total_searches_left"), account.get("account_rate_limit_per_hour")
+
+
+def fetch_serp(query, start, retries=3):
+    """
+    Raw SerpAPI response for (query, start): from the cache if it was ever
+    fetched, otherwise from SerpAPI. Returns (data, fetched_at).
+    """
+    cached = get_cache().get(query, start)
+    if cached is not None:
+        return cached
+
+    params = {
+        "q": query,
+        "start": start,
+        "num": 10,
+        "api_key": SERPAPI_KEY,
+    }
+    for attempt in range(retries + 1):
+        try:
+            resp = session.get(SERPAPI_URL, params=params, timeout=30)
+            if resp.status_code == 429 or resp.status_code >= 500:
+                raise requests.HTTPError(f"HTTP {resp.status_code}", response=resp)
+            data = resp.json()
+            fetched_at = time.time()
+            break
+        except (requests.RequestException, ValueError):
+            if attempt == retries:
+                raise
+            # Jittered backoff so the workers don't retry in lockstep
+            time.sleep(random.uniform(0, 2 ** (attempt + 1)))
+
+    if "error" not in data or NO_RESULTS_ERROR in data["error"]:
+        get_cache().put(query, start, data, fetched_at)
+    return data, fetched_at
+
+
+def parse_serp(data):
+    """Organic and local pack results from a SerpAPI response, with their position on the page"""
+    results = []
+    for position, r in enumerate(data.get("organic_results", []), 1):
+        results.append({
+            "title": r.get("title", ""),
+            "link": r.get("link", ""),
+            "snippet": r.get("snippet", ""),
+            "position": position,
+        })
+
+    # Also get local pack results (Google Maps listings)
+    for position, r in enumerate(data.get("local_results", {}).get("places", []), 1):
+        results.append({
+            "title": r.get("title", ""),
+            "link": r.get("website", ""),
+            "phone": r.get("phone", ""),
+            "address": r.get("address", ""),
+            "rating": r.get("rating", ""),
+            "reviews": r.get("reviews", ""),
+            "type": "local_pack",
+            "position": position,
+        })
+
+    return results
+
+
 def search_google(query, start=0):
     """
     Search Google and return results.
-    Uses SerpAPI or falls back to a simple scrape.
+    Uses SerpAPI (cached) or falls back to a manual search URL.
 
     For production, get a SerpAPI key: https://serpapi.com
     """
 
-    # Option 1: Use SerpAPI (recommended - $50/mo for 5000 searches)
-    SERPAPI_KEY = ""  # Add your key here
-
+    # Option 1: Use SerpAPI
     if SERPAPI_KEY:
-        url = "https://serpapi.com/search"
-        params = {
-            "q": query,
-            "start": start,
-            "num": 10,
-            "api_key": SERPAPI_KEY,
-        }
-        resp = requests.get(url, params=params)
-        data = resp.json()
-
-        results = []
-        for r in data.get("organic_results", []):
-            results.append({
-                "title": r.get("title", ""),
-                "link": r.get("link", ""),
-                "snippet": r.get("snippet", ""),
-            })
-
-        # Also get local pack results (Google Maps listings)
-        for r in data.get("local_results", {}).get("places", []):
-            results.append({
-                "title": r.get("title", ""),
-                "link": r.get("website", ""),
-                "phone": r.get("phone", ""),
-                "address": r.get("address", ""),
-                "rating": r.get("rating", ""),
-                "reviews": r.get("reviews", ""),
-                "type": "local_pack",
-            })
-
-        return results
+        data, fetched_at = fetch_serp(query, start)
+        return parse_serp(data)
 
     # Option 2: Manual approach - just generate the search URLs
     # (Google blocks automated scraping, so we generate URLs for manual checking)
@@ -140,31 +273,106 @@ def search_google(query, start=0):
         return [{"manual_url": search_url, "start": start}]
 
 
+def fetch_all(pages, max_searches=MAX_SEARCHES):
+    """
+    Fetch many (query, start) pages concurrently. Cached pages are free;
+    at most `max_searches` uncached ones are paid for (fewer if the plan
+    has less left), the rest are reported as skipped for the next run.
+
+    Returns {(query, start): (data, fetched_at)}.
+    """
+
+    pages = list(dict.fromkeys(pages))  # Same page listed twice is fetched once
+    cache = get_cache()
+    responses = {}
+    to_fetch = []
+    for query, start in pages:
+        cached = cache.get(query, start)
+        if cached is not None:
+            responses[(query, start)] = cached
+        else:
+            to_fetch.append((query, start))
+
+    left, per_hour = searches_left()
+    allowed = max_searches if left is None else min(max_searches, left)
+    skipped = to_fetch[allowed:]
+    to_fetch = to_fetch[:allowed]
+    print(f"📄 {len(pages)} pages: {len(responses)} cached, {len(to_fetch)} to fetch"
+          + (f" ({left} searches left on the plan)" if left is not None else ""))
+    if skipped:
+        print(f"⚠️  Skipping {len(skipped)} pages over the search budget - rerun to fetch them")
+
+    # Spread requests out to stay under the plan's hourly rate limit
+    interval = 3600 / per_hour if per_hour else 0
+    next_slot = [time.monotonic()]
+    slot_lock = threading.Lock()
+
+    def fetch(page):
+        with slot_lock:
+            wait = next_slot[0] - time.monotonic()
+            next_slot[0] = max(next_slot[0], time.monotonic()) + interval
+        if wait > 0:
+            time.sleep(wait)
+        return fetch_serp(*page)
+
+    errors = 0
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        futures = {pool.submit(fetch, page): page for page in to_fetch}
+        for done, future in enumerate(as_completed(futures), 1):
+            query, start = futures[future]
+            try:
+                data, fetched_at = future.result()
+            except (requests.RequestException, ValueError) as e:
+                errors += 1
+                print(f"   ❌ {query} (start={start}): {e}")
+                continue
+            if "error" in data and NO_RESULTS_ERROR not in data["error"]:
+                errors += 1
+                print(f"   ❌ {query} (start={start}): {data['error']}")
+                continue
+            responses[(query, start)] = (data, fetched_at)
+            if done % 10 == 0 or done == len(futures):
+                print(f"   ✓ {done}/{len(futures)} fetched")
+
+    if errors:
+        print(f"⚠️  {errors} pages failed and weren't cached - rerun to retry them")
+    return responses
+
+
 def find_contractors():
     """Main function to find contractors in all locations."""
 
-    all_results = []
-
+    # Every (query, page) in the sweep, in the order results are reported
+    jobs = []
     for search_term in ACTIVE_SEARCHES:
         for location in LOCATIONS:
             query = f"{search_term} {location}"
-            print(f"\n🔍 Searching: {query}")
-
             for page in range(START_PAGE, END_PAGE + 1):
                 start = (page - 1) * 10  # Google uses 0-indexed start
-                print(f"   Page {page} (start={start})...")
+                jobs.append((search_term, location, query, page, start))
 
-                results = search_google(query, start)
+    print(f"\n🔍 Searching {len(ACTIVE_SEARCHES)} trades x {len(LOCATIONS)} locations, "
+          f"pages {START_PAGE}-{END_PAGE}")
+    responses = fetch_all([(query, start) for _, _, query, _, start in jobs])
 
-                for r in results:
-                    r["search_query"] = query
-                    r["search_term"] = search_term
-                    r["location"] = location
-                    r["page"] = page
-                    all_results.append(r)
-
-                # Be nice to Google
-                time.sleep(2)
+    all_results = []
+    pages = []
+    for search_term, location, query, page, start in jobs:
+        if (query, start) not in responses:
+            continue
+        data, fetched_at = responses[(query, start)]
+        results = parse_serp(data)
+        pages.append((search_term, location, page, fetched_at, results))
+        for r in results:
+            r["search_query"] = query
+            r["search_term"] = search_term
+            r["location"] = location
+            r["page"] = page
+            all_results.append(r)
+
+    if TRACK_RANKS:
+        added = RankHistory().record(pages)
+        print(f"📈 {added} new rank observations saved (python3 rank_history.py stuck)")
 
     return all_results
 
@@ -340,9 +548,7 @@ if __name__ == "__main__":
     print("🎣 HUNGRY CONTRACTOR FINDER")
     print("   Finding page 2-3 contractors who NEED leads\n")
 
-    # Check if SerpAPI key is set
-    SERPAPI_KEY = ""  # Set above
-
+    # Check if SerpAPI key is set (see SERPAPI_KEY above)
     if not SERPAPI_KEY:
         print("⚠️  No SerpAPI key - generating manual search URLs instead")
         print("   (Get a key at serpapi.com for automated scraping)\n")
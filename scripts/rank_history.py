@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Rank history for find_hungry_contractors.py
+
+Every SERP page a sweep fetches is appended as rows of
+(business, query, page, position, fetched_at) to a small SQLite file.
+Businesses and queries are stored once and referenced by integer id, so
+an observation is a handful of integers. Rows are only ever inserted, in
+one transaction per sweep, and a page already ingested (same query,
+start and fetch time - e.g. served from the SERP cache) is skipped.
+
+Queries run off the history instead of re-scraping. Only the pages a sweep
+fetches are seen: find_hungry_contractors.py starts at START_PAGE = 2, so
+page 1 is out of scope unless START_PAGE is set to 1.
+
+Usage:
+    python3 rank_history.py stuck --weeks 4            # below page 1 every week for 4 weeks
+    python3 rank_history.py stuck --weeks 6 --term "tree service"
+    python3 rank_history.py dropped                    # worse page (or gone) this week than last
+    python3 rank_history.py history example-landscaping.com
+    python3 rank_history.py stats
+"""
+
+import argparse
+import re
+import sqlite3
+import time
+from urllib.parse import urlsplit
+
+RANK_DB_FILE = "rank_history.sqlite"
+WEEK = 7 * 86400
+
+# Results on these sites are listings, not the business's own site: key them by URL path too
+DIRECTORY_DOMAINS = {
+    "yelp.com", "angi.com", "angieslist.com", "homeadvisor.com", "thumbtack.com", "facebook.com",
+    "bbb.org", "yellowpages.com", "nextdoor.com", "houzz.com", "porch.com", "mapquest.com",
+    "instagram.com", "google.com",
+}
+
+
+def business_key(result):
+    """Stable identity for a SERP result: its site, else its phone, else its name"""
+    link = result.get("link") or ""
+    if link:
+        parts = urlsplit(link if "//" in link else f"http://{link}")
+        domain = (parts.hostname or "").lower()
+        domain = domain[4:] if domain.startswith("www.") else domain
+        if domain:
+            if domain in DIRECTORY_DOMAINS:
+                return f"{domain}{parts.path.rstrip('/').lower()}"
+            return domain
+    phone = re.sub(r"\D", "", result.get("phone") or "")
+    if phone:
+        return f"tel:{phone[-10:]}"
+    return "name:" + " ".join((result.get("title") or "").lower().split())
+
+
+class RankHistory:
+    def __init__(self, path=RANK_DB_FILE):
+        self.db = sqlite3.connect(path)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS businesses (
+                id INTEGER PRIMARY KEY,
+                key TEXT NOT NULL UNIQUE,
+                title TEXT,
+                link TEXT,
+                phone TEXT
+            );
+            CREATE TABLE IF NOT EXISTS queries (
+                id INTEGER PRIMARY KEY,
+                search_term TEXT NOT NULL,
+                location TEXT NOT NULL,
+                UNIQUE (search_term, location)
+            );
+            -- One row per ingested SERP page; makes re-ingesting a cached page a no-op
+            CREATE TABLE IF NOT EXISTS pages (
+                query_id INTEGER NOT NULL,
+                page INTEGER NOT NULL,
+                fetched_at INTEGER NOT NULL,
+                PRIMARY KEY (query_id, page, fetched_at)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS observations (
+                fetched_at INTEGER NOT NULL,
+                business_id INTEGER NOT NULL,
+                query_id INTEGER NOT NULL,
+                page INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                local_pack INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_observations_time
+                ON observations (fetched_at, business_id, query_id, page);
+            CREATE INDEX IF NOT EXISTS idx_observations_business
+                ON observations (business_id, fetched_at);
+        """)
+        self.business_ids = {}
+        self.query_ids = {}
+
+    def _business_id(self, result):
+        key = business_key(result)
+        if key not in self.business_ids:
+            self.db.execute("INSERT OR IGNORE INTO businesses (key, title, link, phone) VALUES (?, ?, ?, ?)",
+                            (key, result.get("title", ""), result.get("link", ""), result.get("phone", "")))
+            self.business_ids[key] = self.db.execute("SELECT id FROM businesses WHERE key = ?",
+                                                     (key,)).fetchone()[0]
+        return self.business_ids[key]
+
+    def _query_id(self, search_term, location):
+        if (search_term, location) not in self.query_ids:
+            self.db.execute("INSERT OR IGNORE INTO queries (search_term, location) VALUES (?, ?)",
+                            (search_term, location))
+            self.query_ids[(search_term, location)] = self.db.execute(
+                "SELECT id FROM queries WHERE search_term = ? AND location = ?",
+                (search_term, location)).fetchone()[0]
+        return self.query_ids[(search_term, location)]
+
+    def record(self, pages):
+        """
+        Append a sweep in one transaction. `pages` is an iterable of
+        (search_term, location, page, fetched_at, results), where each
+        result has a "position" and optionally "type": "local_pack".
+        Returns the number of observations added.
+        """
+        added = 0
+        with self.db:
+            for search_term, location, page, fetched_at, results in pages:
+                query_id = self._query_id(search_term, location)
+                fetched_at = int(fetched_at)
+                inserted = self.db.execute("INSERT OR IGNORE INTO pages VALUES (?, ?, ?)",
+                                           (query_id, page, fetched_at)).rowcount
+                if not inserted:
+                    continue  # Already ingested (the page came from the SERP cache)
+                rows = [(fetched_at, self._business_id(r), query_id, page, r.get("position", 0),
+                         int(r.get("type") == "local_pack"))
+                        for r in results if r.get("title") or r.get("link")]
+                self.db.executemany("INSERT INTO observations VALUES (?, ?, ?, ?, ?, ?)", rows)
+                added += len(rows)
+        return added
+
+    def _filters(self, search_term=None, location=None):
+        sql, params = "", []
+        if search_term:
+            sql += " AND q.search_term = ?"
+            params.append(search_term)
+        if location:
+            sql += " AND q.location = ?"
+            params.append(location)
+        return sql, params
+
+    def stuck(self, weeks=4, search_term=None, location=None, now=None):
+        """
+        Businesses seen in each of the last `weeks` weeks and never on page 1
+        in that time, most weeks first. The page 1 test only applies when
+        page 1 is fetched; otherwise every business seen is below it.
+        Returns dicts with key, title, link, phone, weeks, best_page, queries.
+        """
+        now = now or time.time()
+        since = int(now - weeks * WEEK)
+        filters, params = self._filters(search_term, location)
+        rows = self.db.execute(f"""
+            SELECT b.key, b.title, b.link, b.phone,
+                   COUNT(DISTINCT (o.fetched_at - ?) / {WEEK}) AS weeks,
+                   MIN(o.page) AS best_page,
+                   GROUP_CONCAT(DISTINCT q.search_term || ' ' || q.location) AS queries
+            FROM observations o
+            JOIN businesses b ON b.id = o.business_id
+            JOIN queries q ON q.id = o.query_id
+            WHERE o.fetched_at >= ? {filters}
+            GROUP BY o.business_id
+            HAVING weeks >= ? AND best_page > 1
+            ORDER BY weeks DESC, best_page DESC, b.key
+        """, [since, since, *params, weeks]).fetchall()
+        return [dict(zip(("key", "title", "link", "phone", "weeks", "best_page", "queries"), row))
+                for row in rows]
+
+    def dropped(self, search_term=None, location=None, now=None):
+        """
+        Businesses whose best page in the last week is worse than in the week
+        before, for the same query, or that are missing from this week's
+        fetch of the page they were on (current_page None: gone from the
+        fetched pages). A move onto or off page 1 is only seen when page 1
+        is fetched. Returns dicts with key, title, query, previous_page,
+        current_page.
+        """
+        now = now or time.time()
+        this_week, last_week = int(now - WEEK), int(now - 2 * WEEK)
+        filters, params = self._filters(search_term, location)
+        rows = self.db.execute(f"""
+            SELECT b.key, b.title, q.search_term || ' ' || q.location,
+                   MIN(CASE WHEN o.fetched_at < ? THEN o.page END) AS previous_page,
+                   MIN(CASE WHEN o.fetched_at >= ? THEN o.page END) AS current_page
+            FROM observations o
+            JOIN businesses b ON b.id = o.business_id
+            JOIN queries q ON q.id = o.query_id
+            WHERE o.fetched_at >= ? {filters}
+            GROUP BY o.business_id, o.query_id
+            HAVING current_page > previous_page
+                OR (current_page IS NULL AND EXISTS (
+                    SELECT 1 FROM pages p
+                    WHERE p.query_id = o.query_id AND p.page = previous_page AND p.fetched_at >= ?))
+            ORDER BY current_page IS NOT NULL, current_page - previous_page DESC, b.key
+        """, [this_week, this_week, last_week, *params, this_week]).fetchall()
+        return [dict(zip(("key", "title", "query", "previous_page", "current_page"), row)) for row in rows]
+
+    def history(self, key):
+        """(fetched_at, search_term, location, page, position) for one business, oldest first"""
+        return self.db.execute("""
+            SELECT o.fetched_at, q.search_term, q.location, o.page, o.position
+            FROM observations o
+            JOIN businesses b ON b.id = o.business_id
+            JOIN queries q ON q.id = o.query_id
+            WHERE b.key = ?
+            ORDER BY o.fetched_at, q.search_term, q.location
+        """, (key,)).fetchall()
+
+    def stats(self):
+        counts = {}
+        for table in ("businesses", "queries", "pages", "observations"):
+            counts[table] = self.db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        first, last = self.db.execute("SELECT MIN(fetched_at), MAX(fetched_at) FROM observations").fetchone()
+        counts["first"], counts["last"] = first, last
+        return counts
+
+
+def _date(ts):
+    return time.strftime("%Y-%m-%d", time.localtime(ts)) if ts else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the hungry-contractor rank history")
+    parser.add_argument("--db", default=RANK_DB_FILE, help=f"History file (default: {RANK_DB_FILE})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    stuck = sub.add_parser("stuck", help="Seen below page 1 every week, never on page 1")
+    stuck.add_argument("--weeks", type=int, default=4)
+    dropped = sub.add_parser("dropped", help="Best page got worse, or the listing is gone, this week")
+    for p in (stuck, dropped):
+        p.add_argument("--term", help="Only this search term")
+        p.add_argument("--location", help="Only this location")
+    history = sub.add_parser("history", help="Every observation of one business")
+    history.add_argument("key", help="Business site (example.com), tel:<10 digits> or name:<title>")
+    sub.add_parser("stats", help="Row counts and time range")
+
+    args = parser.parse_args()
+    ranks = RankHistory(args.db)
+
+    if args.command == "stuck":
+        rows = ranks.stuck(args.weeks, args.term, args.location)
+        print(f"🎣 {len(rows)} businesses below page 1 for {args.weeks}+ weeks\n")
+        for r in rows:
+            print(f"  {r['title'][:40]:<40} {r['phone'] or '':<15} best page {r['best_page']} "
+                  f"| {r['key']}")
+    elif args.command == "dropped":
+        rows = ranks.dropped(args.term, args.location)
+        print(f"📉 {len(rows)} businesses dropped this week\n")
+        for r in rows:
+            current = r['current_page'] or "gone"
+            print(f"  {r['title'][:40]:<40} page {r['previous_page']} -> {current} | {r['query']}")
+    elif args.command == "history":
+        for fetched_at, term, location, page, position in ranks.history(args.key):
+            print(f"  {_date(fetched_at)}  {term} {location:<20} page {page} #{position}")
+    else:
+        s = ranks.stats()
+        print(f"{s['observations']} observations of {s['businesses']} businesses over "
+              f"{s['queries']} queries ({s['pages']} pages), {_date(s['first'])} to {_date(s['last'])}")
+
+
+if __name__ == "__main__":
+    main()
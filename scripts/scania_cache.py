@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped columnar cache of the SCANIA Component X training CSVs.
+
+The first load converts train_tte.csv, train_specifications.csv and
+train_operational_readouts.csv into one .npy file per column under
+<src>/.columnar_cache (or --cache-dir). Later loads memory-map those files,
+so opening the dataset costs milliseconds and a column is only paged in
+when it is used.
+
+vehicle_id is stored as int32 codes into a shared vocabulary (vehicles.npy,
+in train_tte.csv order), and each Spec_* column as int16 codes into its
+categories (kept in manifest.json). The manifest also records the size and
+mtime of every source file; if any of them changes, the next load rebuilds
+the cache.
+
+Building needs numpy and pyarrow.
+
+Usage:
+  python scripts/scania_cache.py --src /path/to/data            # build if stale, print shape
+  python scripts/scania_cache.py --src /path/to/data --rebuild
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+except ImportError:  # optional: only the cached paths need them
+    np = None
+
+CACHE_VERSION = 1
+CACHE_DIRNAME = ".columnar_cache"
+SOURCES = {
+    "tte": "train_tte.csv",
+    "specs": "train_specifications.csv",
+    "readouts": "train_operational_readouts.csv",
+}
+
+
+def source_stamps(src: Path) -> Dict[str, Dict[str, int]]:
+    """Size and mtime of each source CSV, as recorded in the manifest."""
+    stamps = {}
+    for name in SOURCES.values():
+        stat = (src / name).stat()
+        stamps[name] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    return stamps
+
+
+def _header(path: Path) -> List[str]:
+    with path.open(newline="") as f:
+        return next(csv.reader(f))
+
+
+def _count_lines(path: Path) -> int:
+    """Upper bound on data rows: newlines after the header, plus an unterminated last line."""
+    lines, last = 0, b"\n"
+    with path.open("rb") as f:
+        while True:
+            block = f.read(1 << 24)
+            if not block:
+                break
+            lines += block.count(b"\n")
+            last = block[-1:]
+    return max(lines - 1 + (last != b"\n"), 0)
+
+
+class VehicleVocabulary:
+    """vehicle_id -> int32 code, growing as unseen ids turn up."""
+
+    def __init__(self, ids: List[str]):
+        self.ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.extend(ids)
+        self._values = None
+
+    def extend(self, ids) -> None:
+        for vid in ids:
+            if vid not in self.index:
+                self.index[vid] = len(self.ids)
+                self.ids.append(vid)
+                self._values = None
+
+    def encode(self, column) -> "np.ndarray":
+        """Codes for a pyarrow string column, adding any new ids first."""
+        if self._values is None:
+            self._values = pa.array(self.ids, pa.string())
+        codes = pc.index_in(column, value_set=self._values)
+        if codes.null_count:
+            self.extend(pc.unique(pc.filter(column, pc.is_null(codes))).to_pylist())
+            return self.encode(column)
+        return codes.to_numpy().astype(np.int32)
+
+
+def _save(directory: Path, name: str, values) -> None:
+    np.save(directory / f"{name}.npy", np.ascontiguousarray(values))
+
+
+def build_cache(src: Path, cache_dir: Path, block_size: int = 1 << 24) -> None:
+    """Convert the three CSVs under `src` into a fresh cache at `cache_dir`."""
+    stamps = source_stamps(src)
+    tmp = cache_dir.with_name(cache_dir.name + ".tmp")
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    for table in SOURCES:
+        (tmp / table).mkdir(parents=True)
+
+    as_text = lambda names: {name: pa.string() for name in names}  # noqa: E731
+
+    tte = pacsv.read_csv(
+        src / SOURCES["tte"],
+        convert_options=pacsv.ConvertOptions(
+            column_types={
+                "vehicle_id": pa.string(),
+                "length_of_study_time_step": pa.float64(),
+                "in_study_repair": pa.float64(),
+            }
+        ),
+    )
+    vocabulary = VehicleVocabulary(tte["vehicle_id"].to_pylist())
+    _save(tmp / "tte", "vehicle", vocabulary.encode(tte["vehicle_id"]))
+    _save(tmp / "tte", "length_of_study", tte["length_of_study_time_step"].to_numpy())
+    # int(float(...)) as in read_train_tte
+    _save(tmp / "tte", "repaired", tte["in_study_repair"].to_numpy().astype(np.int8))
+
+    spec_names = [c for c in _header(src / SOURCES["specs"]) if c != "vehicle_id"]
+    specs = pacsv.read_csv(
+        src / SOURCES["specs"],
+        convert_options=pacsv.ConvertOptions(
+            column_types=as_text(["vehicle_id"] + spec_names), strings_can_be_null=False
+        ),
+    )
+    _save(tmp / "specs", "vehicle", vocabulary.encode(specs["vehicle_id"]))
+    categories: Dict[str, List[str]] = {}
+    for name in spec_names:
+        encoded = pc.dictionary_encode(specs[name]).combine_chunks()
+        categories[name] = encoded.dictionary.to_pylist()
+        _save(tmp / "specs", name, encoded.indices.to_numpy().astype(np.int16))
+
+    readouts_path = src / SOURCES["readouts"]
+    readout_names = [c for c in _header(readouts_path) if c != "vehicle_id"]
+    capacity = _count_lines(readouts_path)
+    vehicle = np.lib.format.open_memmap(tmp / "readouts" / "vehicle.npy", "w+", np.int32, (capacity,))
+    columns = {
+        name: np.lib.format.open_memmap(tmp / "readouts" / f"{name}.npy", "w+", np.float64, (capacity,))
+        for name in readout_names
+    }
+    reader = pacsv.open_csv(
+        readouts_path,
+        read_options=pacsv.ReadOptions(block_size=block_size),
+        convert_options=pacsv.ConvertOptions(
+            column_types={"vehicle_id": pa.string(), **{n: pa.float64() for n in readout_names}}
+        ),
+    )
+    rows = 0
+    for batch in reader:
+        end = rows + batch.num_rows
+        vehicle[rows:end] = vocabulary.encode(batch.column("vehicle_id"))
+        for name, column in columns.items():
+            # Missing readings become NaN
+            column[rows:end] = batch.column(name).to_numpy(zero_copy_only=False)
+        rows = end
+    for array in [vehicle, *columns.values()]:
+        array.flush()
+    del vehicle, columns
+
+    _save(tmp, "vehicles", np.array(vocabulary.ids, dtype=str))
+    manifest = {
+        "version": CACHE_VERSION,
+        "sources": stamps,
+        "rows": {"tte": tte.num_rows, "specs": specs.num_rows, "readouts": rows},
+        "spec_columns": spec_names,
+        "spec_categories": categories,
+        "readout_columns": readout_names,
+        "built_at": int(time.time()),
+    }
+    (tmp / "manifest.json").write_text(json.dumps(manifest, indent=2))
+
+    if cache_dir.exists():
+        shutil.rmtree(cache_dir)
+    os.replace(tmp, cache_dir)
+
+
+class ColumnarCache:
+    """
+    Read side of the cache. Columns are memory-mapped numpy arrays:
+
+      cache.vehicles                 vehicle_id for each code
+      cache.tte[...]                 vehicle, length_of_study, repaired
+      cache.specs[...]               vehicle, Spec_0 ... (codes into spec_categories)
+      cache.readouts(column)         vehicle, time_step, any readout column
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.path = cache_dir
+        self.manifest = json.loads((cache_dir / "manifest.json").read_text())
+        self.vehicles = self._load("vehicles", None)
+        self.tte = {
+            name: self._load(f"tte/{name}", "tte") for name in ("vehicle", "length_of_study", "repaired")
+        }
+        self.spec_columns: List[str] = self.manifest["spec_columns"]
+        self.spec_categories: Dict[str, List[str]] = self.manifest["spec_categories"]
+        self.specs = {name: self._load(f"specs/{name}", "specs") for name in ["vehicle"] + self.spec_columns}
+        self.readout_columns: List[str] = self.manifest["readout_columns"]
+        self._readouts: Dict[str, "np.ndarray"] = {}
+
+    def _load(self, name: str, table: Optional[str]) -> "np.ndarray":
+        array = np.load(self.path / f"{name}.npy", mmap_mode="r")
+        # Readout files are allocated from a line count; rows holds the real length
+        return array[: self.manifest["rows"][table]] if table else array
+
+    def readouts(self, column: str) -> "np.ndarray":
+        if column not in self._readouts:
+            if column != "vehicle" and column not in self.readout_columns:
+                raise KeyError(f"No readout column {column!r}")
+            self._readouts[column] = self._load(f"readouts/{column}", "readouts")
+        return self._readouts[column]
+
+    def spec_rows(self) -> "np.ndarray":
+        """Row in self.specs for each vehicle code, -1 where a vehicle has no specification."""
+        rows = np.full(len(self.vehicles), -1, dtype=np.int64)
+        rows[self.specs["vehicle"]] = np.arange(len(self.specs["vehicle"]))
+        return rows
+
+    def max_time_steps(self) -> "np.ndarray":
+        """Maximum time_step per vehicle code, NaN where a vehicle has no readouts."""
+        maxima = np.full(len(self.vehicles), np.nan)
+        np.fmax.at(maxima, self.readouts("vehicle"), self.readouts("time_step"))
+        return maxima
+
+
+def is_fresh(src: Path, cache_dir: Path) -> bool:
+    try:
+        manifest = json.loads((cache_dir / "manifest.json").read_text())
+    except (OSError, ValueError):
+        return False
+    return manifest.get("version") == CACHE_VERSION and manifest.get("sources") == source_stamps(src)
+
+
+def load_cache(src: Path, cache_dir: Optional[Path] = None, rebuild: bool = False) -> ColumnarCache:
+    """Open the cache for `src`, (re)building it first if missing, stale or `rebuild`."""
+    if np is None:
+        raise SystemExit("The columnar cache needs numpy and pyarrow (pip install numpy pyarrow)")
+    cache_dir = cache_dir or src / CACHE_DIRNAME
+    if rebuild or not is_fresh(src, cache_dir):
+        print(f"Building columnar cache in {cache_dir} ...")
+        started = time.perf_counter()
+        build_cache(src, cache_dir)
+        print(f"  built in {time.perf_counter() - started:.1f}s")
+    return ColumnarCache(cache_dir)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--src", required=True, help="Dataset directory (contains train_*.csv files).")
+    parser.add_argument("--cache-dir", help=f"Cache location (default: <src>/{CACHE_DIRNAME}).")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild even if the cache is fresh.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    src = Path(args.src).expanduser().resolve()
+    if not src.exists():
+        raise SystemExit(f"Dataset directory not found: {src}")
+    cache_dir = Path(args.cache_dir).expanduser().resolve() if args.cache_dir else None
+
+    load_cache(src, cache_dir, args.rebuild)
+    started = time.perf_counter()
+    cache = load_cache(src, cache_dir)
+    elapsed = time.perf_counter() - started
+    rows = cache.manifest["rows"]
+    print(f"{cache.path}: {len(cache.vehicles)} vehicles, {rows['tte']} tte rows, "
+          f"{rows['specs']} specification rows, {rows['readouts']} readouts x "
+          f"{len(cache.readout_columns)} columns (opened in {elapsed * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,16 +8,79 @@ generates a compact JSON summary that we can bundle with the project.
 Usage:
   python scripts/scania_component_x_summary.py --src /path/to/data \
         --out data/scania_component_x_summary.json
+
+The operational readouts file has millions of rows; with pyarrow installed
+it is read in blocks with only vehicle_id/time_step converted, and reduced
+per block with a grouped max (--engine arrow, the default when available).
+--engine csv keeps the original DictReader path.
+
+--workers N splits the readouts file into line-aligned byte ranges that a
+process pool reduces in parallel (either engine); the per-shard maxima are
+merged in file order, so the result is identical to a serial run.
+
+--cache reads all three files from a memory-mapped columnar cache
+(scania_cache.py) instead, converting the CSVs on first use and again
+whenever one of them changes.
+
+Statistics are gathered in one streaming pass over the vehicles
+(scania_stats.py). --quantiles exact (default) keeps each group's values
+for exact medians and p90/p99; --quantiles sketch uses a fixed-size KLL
+sketch per group instead, so --spec-columns can add groupings without
+memory growing with the fleet.
+
+Reading from the cache also adds, computed with numpy over its columns:
+  repair_survival  fleet-wide Kaplan-Meier repair-free survival, at-risk
+                   counts and interval hazard at fixed time-step horizons
+  risk_lookup      the same per group, for every --group-by combination of
+                   spec columns, keyed for direct indexing, e.g. in PHP:
+                   $summary['risk_lookup']['groups']['Spec_0+Spec_1']['Cat0+Cat3']['survival']
+                   Groups with fewer than --min-vehicles vehicles are left
+                   out; callers fall back to a coarser grouping.
 """
 from __future__ import annotations
 
 import argparse
 import csv
+import io
 import json
-from collections import defaultdict
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from statistics import mean, median
-from typing import Dict, Iterable, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import scania_cache
+from scania_stats import (
+    DEFAULT_QUANTILES,
+    QUANTILE_MODES,
+    StreamingStats,
+    interval_hazard,
+    kaplan_meier,
+    quantile_name,
+)
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:  # optional: falls back to the csv module
+    pa = None
+
+try:
+    import numpy as np
+except ImportError:  # optional: only the cached path needs it
+    np = None
+
+ENGINES = ("csv", "arrow")
+# Upper bound on the bytes one worker task reads into memory
+SHARD_BYTES = 64 << 20
+
+# (vehicle_id, specification, tte, max time_step) per training vehicle
+Record = Tuple[str, Dict[str, str], Dict[str, float], float]
+
+# Time steps at which survival and hazard are reported (length_of_study runs to ~510)
+DEFAULT_HORIZONS = tuple(range(50, 501, 50))
+# Spec_0 (archetype) alone and with each other spec column
+DEFAULT_GROUPINGS = ("Spec_0",) + tuple(f"Spec_0+Spec_{i}" for i in range(1, 8))
+MIN_GROUP_VEHICLES = 30
 
 
 def read_train_tte(path: Path) -> Dict[str, Dict[str, float]]:
@@ -61,78 +124,346 @@ def read_max_time_steps(path: Path) -> Dict[str, float]:
     return maxima
 
 
+def read_max_time_steps_arrow(
+    path, block_size: int = 1 << 24, column_names: Optional[List[str]] = None
+) -> Dict[str, float]:
+    """
+    Vectorized read_max_time_steps: pyarrow parses the file in blocks,
+    converting only vehicle_id and time_step, and each block is reduced to
+    one max per vehicle before the partial results are merged.
+
+    `path` may also be a file-like object; pass `column_names` when it
+    has no header row (a shard from the middle of the file).
+    """
+    reader = pacsv.open_csv(
+        path,
+        read_options=pacsv.ReadOptions(
+            block_size=block_size,
+            column_names=column_names,
+            use_threads=column_names is None,
+        ),
+        convert_options=pacsv.ConvertOptions(
+            include_columns=["vehicle_id", "time_step"],
+            # Keep ids as text so they match the keys read from the other files
+            column_types={"vehicle_id": pa.string(), "time_step": pa.float64()},
+        ),
+    )
+    partials = []
+    for batch in reader:
+        table = pa.Table.from_batches([batch])
+        partials.append(
+            table.group_by("vehicle_id", use_threads=False).aggregate([("time_step", "max")])
+        )
+    if not partials:
+        return {}
+    merged = (
+        pa.concat_tables(partials)
+        .group_by("vehicle_id", use_threads=False)
+        .aggregate([("time_step_max", "max")])
+    )
+    return dict(
+        zip(merged["vehicle_id"].to_pylist(), merged["time_step_max_max"].to_pylist())
+    )
+
+
+def shard_ranges(path: Path, shard_bytes: int = SHARD_BYTES) -> Tuple[str, List[Tuple[int, int]]]:
+    """
+    Split the file after its header into (start, end) byte ranges of about
+    `shard_bytes`, each starting at a line start. Returns (header, ranges).
+
+    Readout rows are plain numbers, so a newline always ends a row (no
+    quoted fields spanning lines).
+    """
+    size = path.stat().st_size
+    with path.open("rb") as f:
+        header = f.readline()
+        start = f.tell()
+        ranges = []
+        while start < size:
+            f.seek(min(start + shard_bytes, size))
+            f.readline()  # run on to the end of the line we landed in
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return header.decode(), ranges
+
+
+def _max_time_steps_shard(path: Path, start: int, end: int, header: str, engine: str) -> Dict[str, float]:
+    """Worker: per-vehicle maxima for the rows in bytes [start, end)."""
+    with path.open("rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    columns = next(csv.reader([header]))
+    if engine == "arrow":
+        return read_max_time_steps_arrow(pa.BufferReader(data), column_names=columns)
+
+    vid_index, step_index = columns.index("vehicle_id"), columns.index("time_step")
+    maxima: Dict[str, float] = {}
+    for row in csv.reader(io.StringIO(data.decode(), newline="")):
+        if not row:
+            continue
+        vid = row[vid_index]
+        time_step = float(row[step_index])
+        current = maxima.get(vid)
+        if current is None or time_step > current:
+            maxima[vid] = time_step
+    return maxima
+
+
+def read_max_time_steps_parallel(
+    path: Path, engine: str = "csv", workers: Optional[int] = None, shard_bytes: int = SHARD_BYTES
+) -> Dict[str, float]:
+    """
+    read_max_time_steps over a process pool: each worker reduces one byte
+    range, and the partial maxima are merged in file order. Shards are at
+    most `shard_bytes`, and small enough that every worker gets one.
+    """
+    workers = workers or os.cpu_count() or 1
+    shard_bytes = min(shard_bytes, path.stat().st_size // workers + 1)
+    header, ranges = shard_ranges(path, shard_bytes)
+    maxima: Dict[str, float] = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        partials = pool.map(
+            _max_time_steps_shard,
+            *zip(*[(path, start, end, header, engine) for start, end in ranges]),
+        )
+        for partial in partials:
+            for vid, time_step in partial.items():
+                current = maxima.get(vid)
+                if current is None or time_step > current:
+                    maxima[vid] = time_step
+    return maxima
+
+
+def default_engine() -> str:
+    return "arrow" if pa is not None else "csv"
+
+
+def max_time_steps(path: Path, engine: str = "auto", workers: int = 1) -> Dict[str, float]:
+    """
+    Per-vehicle maximum time_step using the chosen engine, over `workers`
+    processes (0 for one per CPU).
+    """
+    if engine == "auto":
+        engine = default_engine()
+    if engine == "arrow" and pa is None:
+        raise SystemExit("--engine arrow needs pyarrow (pip install pyarrow)")
+    if workers != 1:
+        return read_max_time_steps_parallel(path, engine, workers or None)
+    if engine == "arrow":
+        return read_max_time_steps_arrow(path)
+    return read_max_time_steps(path)
+
+
+class GroupStats:
+    """Running repair count and length/max-time statistics for a group of vehicles."""
+
+    def __init__(self, quantiles: str = "exact"):
+        self.repairs = 0
+        self.length_of_study = StreamingStats(quantiles)
+        self.max_time_step = StreamingStats(quantiles)
+
+    def add(self, tte: Dict[str, float], max_time: float) -> None:
+        self.repairs += tte["repaired"]
+        self.length_of_study.add(tte["length_of_study"])
+        self.max_time_step.add(max_time)
+
+    @property
+    def vehicles(self) -> int:
+        return self.length_of_study.count
+
+    def summary(self, quantiles: Sequence[float] = DEFAULT_QUANTILES) -> Dict[str, float]:
+        result = {
+            "vehicles": self.vehicles,
+            "repairs": int(self.repairs),
+            "repair_rate": self.repairs / self.vehicles,
+        }
+        for name in ("length_of_study", "max_time_step"):
+            stats = getattr(self, name)
+            result[f"median_{name}"] = stats.quantile(0.5)
+            result[f"mean_{name}"] = stats.mean
+        for name in ("length_of_study", "max_time_step"):
+            for q in quantiles:
+                result[f"{quantile_name(q)}_{name}"] = getattr(self, name).quantile(q)
+        return result
+
+
+def spec_key(column: str) -> str:
+    """Summary key for a spec column grouping: Spec_0 -> by_spec_0."""
+    return f"by_{column.lower()}"
+
+
 def aggregate_by_spec(
-    records: Iterable[Tuple[str, Dict[str, str], Dict[str, float], float]]
+    records: Iterable[Record], column: str = "Spec_0", quantiles: str = "exact"
 ) -> Dict[str, Dict[str, float]]:
     """
-    Aggregate statistics per Spec_0 category (vehicle archetype).
+    Aggregate statistics per category of a spec column (Spec_0: vehicle
+    archetype), in one pass.
 
     Returns mapping spec_value -> summary stats.
     """
-    by_spec: Dict[str, Dict[str, list]] = defaultdict(lambda: defaultdict(list))
-
+    groups: Dict[str, GroupStats] = {}
     for vid, spec, tte, max_time in records:
-        spec_value = spec.get("Spec_0", "unknown")
-        bucket = by_spec[spec_value]
-        bucket["length_of_study"].append(tte["length_of_study"])
-        bucket["repaired"].append(tte["repaired"])
-        bucket["max_time_step"].append(max_time)
-
-    summary: Dict[str, Dict[str, float]] = {}
-    for spec_value, values in by_spec.items():
-        repaired_flags = values["repaired"]
-        lengths = values["length_of_study"]
-        max_times = values["max_time_step"]
-        if not lengths:
-            continue
-        summary[spec_value] = {
-            "vehicles": len(lengths),
-            "repairs": int(sum(repaired_flags)),
-            "repair_rate": sum(repaired_flags) / len(repaired_flags),
-            "median_length_of_study": median(lengths),
-            "mean_length_of_study": mean(lengths),
-            "median_max_time_step": median(max_times),
-            "mean_max_time_step": mean(max_times),
-        }
-    return summary
+        spec_value = spec.get(column, "unknown")
+        if spec_value not in groups:
+            groups[spec_value] = GroupStats(quantiles)
+        groups[spec_value].add(tte, max_time)
+    return {spec_value: group.summary() for spec_value, group in groups.items()}
 
 
-def build_summary(src: Path) -> Dict[str, object]:
-    """Produce final summary from dataset directory."""
+def read_records(src: Path, engine: str = "auto", workers: int = 1) -> Iterator[Record]:
+    """Records for every training vehicle, from the CSVs."""
     train_tte = read_train_tte(src / "train_tte.csv")
     specs = read_specifications(src / "train_specifications.csv")
-    max_time = read_max_time_steps(src / "train_operational_readouts.csv")
+    max_time = max_time_steps(src / "train_operational_readouts.csv", engine, workers)
 
-    records = []
     for vid, tte in train_tte.items():
         spec = specs.get(vid, {})
         max_ts = max_time.get(vid, 0.0)
-        records.append((vid, spec, tte, max_ts))
+        yield vid, spec, tte, max_ts
+
+
+def records_from_cache(cache: "scania_cache.ColumnarCache") -> Iterator[Record]:
+    """read_records over the columnar cache: same records, no CSV parsing."""
+    vehicles = cache.vehicles.tolist()
+    maxima = cache.max_time_steps().tolist()
+    spec_rows = cache.spec_rows().tolist()
+    spec_columns = [
+        (name, cache.spec_categories[name], cache.specs[name].tolist()) for name in cache.spec_columns
+    ]
+
+    for code, length, repaired in zip(
+        cache.tte["vehicle"].tolist(), cache.tte["length_of_study"].tolist(), cache.tte["repaired"].tolist()
+    ):
+        row = spec_rows[code]
+        spec = {name: values[codes[row]] for name, values, codes in spec_columns} if row >= 0 else {}
+        max_ts = maxima[code]
+        tte = {"length_of_study": length, "repaired": repaired}
+        yield vehicles[code], spec, tte, 0.0 if max_ts != max_ts else max_ts  # NaN: no readouts
+
+
+def _rounded(values) -> List[float]:
+    return [round(float(v), 6) for v in values]
+
+
+def repair_survival(
+    cache: "scania_cache.ColumnarCache", horizons: Sequence[float] = DEFAULT_HORIZONS
+) -> Dict[str, List[float]]:
+    """Fleet-wide Kaplan-Meier repair-free survival from length_of_study and in_study_repair."""
+    times = cache.tte["length_of_study"]
+    survival, at_risk = kaplan_meier(
+        np.zeros(len(times), dtype=np.int64), times, cache.tte["repaired"] > 0, horizons, 1
+    )
+    return {
+        "horizons": list(horizons),
+        "at_risk": at_risk[0].tolist(),
+        "survival": _rounded(survival[0]),
+        "hazard": _rounded(interval_hazard(survival)[0]),
+    }
+
+
+def risk_lookup(
+    cache: "scania_cache.ColumnarCache",
+    groupings: Sequence[str] = DEFAULT_GROUPINGS,
+    horizons: Sequence[float] = DEFAULT_HORIZONS,
+    min_vehicles: int = MIN_GROUP_VEHICLES,
+) -> Dict[str, object]:
+    """
+    Vehicles, repairs, repair rate and Kaplan-Meier survival/hazard per
+    category combination, for each grouping ("Spec_0+Spec_3": group by
+    both columns). Returns {"horizons", "min_vehicles", "groups":
+    {grouping: {"Cat0+Cat2": stats}}}; vehicles without a specification
+    fall in category "unknown".
+    """
+    spec_rows = cache.spec_rows()[cache.tte["vehicle"]]
+    times = cache.tte["length_of_study"]
+    repaired = np.asarray(cache.tte["repaired"], dtype=np.int64)
+    events = repaired > 0
+
+    def codes(column: str) -> "np.ndarray":
+        # Per tte row; one past the last category means "unknown"
+        unknown = len(cache.spec_categories[column])
+        return np.where(spec_rows >= 0, cache.specs[column][spec_rows], unknown)
+
+    groups: Dict[str, Dict[str, object]] = {}
+    for grouping in groupings:
+        columns = grouping.split("+")
+        missing = [c for c in columns if c not in cache.spec_categories]
+        if missing:
+            raise SystemExit(f"Unknown spec column(s) in --group-by {grouping}: {', '.join(missing)}")
+        labels = [cache.spec_categories[c] + ["unknown"] for c in columns]
+        keys, inverse = np.unique(
+            np.stack([codes(c) for c in columns], axis=1), axis=0, return_inverse=True
+        )
+        inverse = inverse.reshape(-1)
+        vehicles = np.bincount(inverse, minlength=len(keys))
+        repairs = np.bincount(inverse, weights=repaired, minlength=len(keys))
+        survival, _ = kaplan_meier(inverse, times, events, horizons, len(keys))
+        hazard = interval_hazard(survival)
+
+        cells = {}
+        for i, key in enumerate(keys.tolist()):
+            if vehicles[i] < min_vehicles:
+                continue
+            label = "+".join(names[code] for names, code in zip(labels, key))
+            cells[label] = {
+                "vehicles": int(vehicles[i]),
+                "repairs": int(repairs[i]),
+                "repair_rate": int(repairs[i]) / int(vehicles[i]),
+                "survival": _rounded(survival[i]),
+                "hazard": _rounded(hazard[i]),
+            }
+        groups[grouping] = cells
+    return {"horizons": list(horizons), "min_vehicles": min_vehicles, "groups": groups}
 
-    overall_lengths = [r[2]["length_of_study"] for r in records]
-    overall_repairs = [r[2]["repaired"] for r in records]
-    overall_max_times = [r[3] for r in records]
+
+def build_summary(
+    src: Path,
+    engine: str = "auto",
+    workers: int = 1,
+    cache_dir: Optional[Path] = None,
+    use_cache: bool = False,
+    quantiles: str = "exact",
+    spec_columns: Sequence[str] = ("Spec_0",),
+    groupings: Sequence[str] = DEFAULT_GROUPINGS,
+    horizons: Sequence[float] = DEFAULT_HORIZONS,
+    min_vehicles: int = MIN_GROUP_VEHICLES,
+) -> Dict[str, object]:
+    """
+    Produce final summary from dataset directory, in one pass over the
+    vehicles; with the cache, also the survival curves and risk lookup.
+    """
+    cache = None
+    if use_cache:
+        cache = scania_cache.load_cache(src, cache_dir)
+        records = records_from_cache(cache)
+    else:
+        records = read_records(src, engine, workers)
+
+    overall = GroupStats(quantiles)
+    groups: Dict[str, Dict[str, GroupStats]] = {column: {} for column in spec_columns}
+    for vid, spec, tte, max_time in records:
+        overall.add(tte, max_time)
+        for column, by_value in groups.items():
+            spec_value = spec.get(column, "unknown")
+            if spec_value not in by_value:
+                by_value[spec_value] = GroupStats(quantiles)
+            by_value[spec_value].add(tte, max_time)
 
     summary = {
         "dataset": "SCANIA Component X",
         "source": "https://doi.org/10.5878/jvb5-d390",
-        "training_rows": len(overall_lengths),
-        "training_repairs": int(sum(overall_repairs)),
-        "training_repair_rate": sum(overall_repairs) / len(overall_repairs),
-        "length_of_study": {
-            "median": median(overall_lengths),
-            "mean": mean(overall_lengths),
-            "min": min(overall_lengths),
-            "max": max(overall_lengths),
-        },
-        "max_time_step": {
-            "median": median(overall_max_times),
-            "mean": mean(overall_max_times),
-            "min": min(overall_max_times),
-            "max": max(overall_max_times),
-        },
-        "by_spec_0": aggregate_by_spec(records),
+        "training_rows": overall.vehicles,
+        "training_repairs": int(overall.repairs),
+        "training_repair_rate": overall.repairs / overall.vehicles,
+        "length_of_study": overall.length_of_study.summary(),
+        "max_time_step": overall.max_time_step.summary(),
     }
+    for column, by_value in groups.items():
+        summary[spec_key(column)] = {value: group.summary() for value, group in by_value.items()}
+    if cache is not None:
+        summary["repair_survival"] = repair_survival(cache, horizons)
+        summary["risk_lookup"] = risk_lookup(cache, groupings, horizons, min_vehicles)
     return summary
 
 
@@ -148,6 +479,62 @@ def parse_args() -> argparse.Namespace:
         required=True,
         help="Output JSON path (will be overwritten).",
     )
+    parser.add_argument(
+        "--engine",
+        choices=("auto",) + ENGINES,
+        default="auto",
+        help="Readouts reader: arrow (vectorized, needs pyarrow) or csv "
+        "(DictReader). Default: arrow when pyarrow is installed.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes reading the readouts file in byte-range shards "
+        "(0 = one per CPU, default: 1, serial).",
+    )
+    parser.add_argument(
+        "--quantiles",
+        choices=sorted(QUANTILE_MODES),
+        default="exact",
+        help="exact: keep every value per group; sketch: fixed-size KLL sketch per group "
+        "(approximate median/p90/p99). Means, minima and maxima are exact either way.",
+    )
+    parser.add_argument(
+        "--spec-columns",
+        default="Spec_0",
+        help="Comma-separated spec columns to group by, each written as by_spec_N "
+        "(default: Spec_0).",
+    )
+    parser.add_argument(
+        "--group-by",
+        default=",".join(DEFAULT_GROUPINGS),
+        help="With the cache: comma-separated spec column combinations for risk_lookup, "
+        "columns joined with + (default: Spec_0 and Spec_0+Spec_1 ... Spec_0+Spec_7).",
+    )
+    parser.add_argument(
+        "--horizons",
+        default=",".join(str(h) for h in DEFAULT_HORIZONS),
+        help="With the cache: comma-separated time steps for survival/hazard "
+        "(default: 50,100,...,500).",
+    )
+    parser.add_argument(
+        "--min-vehicles",
+        type=int,
+        default=MIN_GROUP_VEHICLES,
+        help=f"With the cache: leave risk_lookup groups smaller than this out "
+        f"(default: {MIN_GROUP_VEHICLES}).",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Read from the memory-mapped columnar cache, building it if missing or stale "
+        "(needs numpy and pyarrow).",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help=f"Columnar cache location (implies --cache; default: <src>/{scania_cache.CACHE_DIRNAME}).",
+    )
     return parser.parse_args()
 
 
@@ -159,7 +546,22 @@ def main() -> None:
     if not src.exists():
         raise SystemExit(f"Dataset directory not found: {src}")
 
-    summary = build_summary(src)
+    cache_dir = Path(args.cache_dir).expanduser().resolve() if args.cache_dir else None
+    spec_columns = [c.strip() for c in args.spec_columns.split(",") if c.strip()]
+    if "Spec_0" not in spec_columns:
+        spec_columns.insert(0, "Spec_0")  # by_spec_0 is read by the quote intake handler
+    summary = build_summary(
+        src,
+        args.engine,
+        args.workers,
+        cache_dir,
+        args.cache or cache_dir is not None,
+        args.quantiles,
+        spec_columns,
+        [g.strip() for g in args.group_by.split(",") if g.strip()],
+        sorted(float(h) if "." in h else int(h) for h in args.horizons.split(",") if h.strip()),
+        args.min_vehicles,
+    )
     out.parent.mkdir(parents=True, exist_ok=True)
     out.write_text(json.dumps(summary, indent=2))
     print(f"Wrote summary to {out}")
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Streaming statistics for the SCANIA Component X summary.
+
+StreamingStats takes values one at a time and keeps a running count, mean,
+min and max, handing each value on to a pluggable quantile estimator:
+
+  exact   keeps every value; quantiles are interpolated like numpy's default
+          ("linear") method, and the median equals statistics.median
+  sketch  KLL sketch (Karnin, Lang & Liberty 2016); memory stays around 3k
+          values (about 600 at the default k=200) however many are added,
+          with a rank error well under 1%
+
+The mean is kept as an exact fraction, so it equals statistics.mean in
+either mode. Estimators of the same kind can be merged, which lets
+partial aggregates from separate passes or shards be combined.
+
+kaplan_meier() estimates repair-free survival curves for many groups at
+once from numpy arrays (needs numpy).
+"""
+from __future__ import annotations
+
+import math
+import random
+from fractions import Fraction
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional: only kaplan_meier needs it
+    np = None
+
+# Reported next to the median by StreamingStats.summary
+DEFAULT_QUANTILES = (0.9, 0.99)
+
+
+class ExactQuantiles:
+    """Every value, sorted on demand."""
+
+    def __init__(self):
+        self.values: List[float] = []
+        self._sorted = True
+
+    def add(self, value: float) -> None:
+        if self.values and value < self.values[-1]:
+            self._sorted = False
+        self.values.append(value)
+
+    def merge(self, other: "ExactQuantiles") -> None:
+        for value in other.values:
+            self.add(value)
+
+    def quantile(self, q: float) -> float:
+        if not self._sorted:
+            self.values.sort()
+            self._sorted = True
+        values = self.values
+        position = (len(values) - 1) * q
+        low = math.floor(position)
+        high = min(low + 1, len(values) - 1)
+        fraction = position - low
+        if fraction == 0.5:
+            # Same arithmetic as statistics.median for an even count
+            return (values[low] + values[high]) / 2
+        return values[low] + (values[high] - values[low]) * fraction
+
+
+class KLLSketch:
+    """
+    Mergeable quantile sketch. Level h holds items of weight 2**h; a level
+    that outgrows its capacity is sorted and every other item (from a
+    random offset) promoted to the level above.
+    """
+
+    def __init__(self, k: int = 200, seed: Optional[int] = 0):
+        self.k = k
+        self.levels: List[List[float]] = [[]]
+        self.size = 0
+        self.max_size = self._capacity(0)
+        # Seeded so a summary rebuilt from the same data comes out the same
+        self._rng = random.Random(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return int(math.ceil(self.k * (2 / 3) ** depth)) + 1
+
+    def add(self, value: float) -> None:
+        self.levels[0].append(value)
+        self.size += 1
+        if self.size >= self.max_size:
+            self._compress()
+
+    def merge(self, other: "KLLSketch") -> None:
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.size = sum(len(items) for items in self.levels)
+        self._compress()
+
+    def _compress(self) -> None:
+        while self.size >= self.max_size:
+            for level, items in enumerate(self.levels):
+                if len(items) >= self._capacity(level):
+                    if level + 1 == len(self.levels):
+                        self.levels.append([])
+                    items.sort()
+                    # An odd item out stays behind so weights add up exactly
+                    keep = [items.pop()] if len(items) % 2 else []
+                    self.levels[level + 1].extend(items[self._rng.random() < 0.5 :: 2])
+                    self.levels[level] = keep
+                    break
+            self.size = sum(len(items) for items in self.levels)
+            self.max_size = sum(self._capacity(level) for level in range(len(self.levels)))
+
+    def quantile(self, q: float) -> float:
+        weighted: List[Tuple[float, int]] = sorted(
+            (value, 1 << level) for level, items in enumerate(self.levels) for value in items
+        )
+        target = q * sum(weight for _, weight in weighted)
+        seen = 0
+        for value, weight in weighted:
+            seen += weight
+            if seen >= target:
+                return value
+        return weighted[-1][0]
+
+
+QUANTILE_MODES = {"exact": ExactQuantiles, "sketch": KLLSketch}
+
+
+class StreamingStats:
+    """Running count, mean, min, max and quantiles of a stream of values."""
+
+    def __init__(self, quantiles: str = "exact"):
+        self.count = 0
+        self.total = Fraction(0)
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.estimator = QUANTILE_MODES[quantiles]()
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += Fraction(value)
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        self.estimator.add(value)
+
+    def extend(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "StreamingStats") -> None:
+        if not other.count:
+            return
+        self.count += other.count
+        self.total += other.total
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self.estimator.merge(other.estimator)
+
+    @property
+    def mean(self) -> float:
+        return float(self.total / self.count)
+
+    def quantile(self, q: float) -> float:
+        return self.estimator.quantile(q)
+
+    def summary(self, quantiles: Sequence[float] = DEFAULT_QUANTILES) -> Dict[str, float]:
+        """{"median", "mean", "min", "max", "p90", "p99"}, one pNN per `quantiles`."""
+        result = {"median": self.quantile(0.5), "mean": self.mean, "min": self.min, "max": self.max}
+        for q in quantiles:
+            result[quantile_name(q)] = self.quantile(q)
+        return result
+
+
+def quantile_name(q: float) -> str:
+    """0.9 -> "p90", 0.999 -> "p99.9"."""
+    return f"p{round(q * 100, 3):g}"
+
+
+def kaplan_meier(groups, times, events, horizons, n_groups: int):
+    """
+    Kaplan-Meier survival S(t) at each of `horizons`, for every group at once.
+
+    `groups` holds each subject's group index (0 .. n_groups-1), `times` its
+    time in study and `events` 1 where the event (a repair) ended it, 0
+    where it was censored. Returns (survival, at_risk): float and int
+    arrays of shape (n_groups, len(horizons)), at_risk counting subjects
+    still in study at each horizon.
+    """
+    groups = np.asarray(groups, dtype=np.int64)
+    times = np.asarray(times, dtype=np.float64)
+    horizons = np.asarray(horizons, dtype=np.float64)
+    order = np.lexsort((times, groups))
+    g, t, e = groups[order], times[order], np.asarray(events, dtype=np.float64)[order]
+
+    # One row per distinct (group, time): events there and subjects at risk
+    starts = np.flatnonzero(np.r_[True, (g[1:] != g[:-1]) | (t[1:] != t[:-1])])
+    pair_g, pair_t = g[starts], t[starts]
+    deaths = np.add.reduceat(e, starts) if len(starts) else np.zeros(0)
+    group_rows = np.searchsorted(g, np.arange(n_groups + 1))
+    at_risk = group_rows[pair_g + 1] - starts
+    factor = 1.0 - deaths / at_risk
+
+    # Running product within each group, as a cumulative sum of logs
+    # restarted at each group's first pair; a factor of 0 zeroes the rest
+    # of its group.
+    group_pairs = np.searchsorted(pair_g, np.arange(n_groups + 1))
+    zero = factor == 0
+    with np.errstate(divide="ignore"):
+        logs = np.cumsum(np.where(zero, 0.0, np.log(factor)))
+    zeros = np.cumsum(zero)
+    first = group_pairs[pair_g]
+    survival_at_pair = np.exp(logs - np.r_[0.0, logs][first])
+    survival_at_pair[zeros - np.r_[0, zeros][first] > 0] = 0.0
+
+    survival = np.ones((n_groups, len(horizons)))
+    remaining = np.zeros((n_groups, len(horizons)), dtype=np.int64)
+    sizes = np.diff(group_rows)
+    for column, horizon in enumerate(horizons):
+        # Last pair at or before the horizon, per group
+        seen = np.bincount(pair_g[pair_t <= horizon], minlength=n_groups)
+        has = seen > 0
+        survival[has, column] = survival_at_pair[group_pairs[:-1][has] + seen[has] - 1]
+        remaining[:, column] = sizes - np.bincount(g[t < horizon], minlength=n_groups)
+    return survival, remaining
+
+
+def interval_hazard(survival):
+    """
+    Share of those repair-free at the previous horizon (or the start) that
+    were repaired by this one: 1 - S(t_i) / S(t_i-1), 0 once S reaches 0.
+    """
+    previous = np.concatenate([np.ones((survival.shape[0], 1)), survival[:, :-1]], axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(previous > 0, 1.0 - survival / previous, 0.0)
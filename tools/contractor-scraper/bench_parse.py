@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Parse-time benchmark for the free scraper's HTML backends.
+
+Runs every saved listing page through each available backend and reports
+milliseconds per page and records extracted, so backends can be compared
+for speed and checked for agreement.
+
+Usage:
+    python scraper_free.py --file cities.txt --save-html fixtures/
+    python bench_parse.py fixtures/
+    python bench_parse.py fixtures/ --repeat 20 --backend lxml --backend selectolax
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from extract import BACKENDS, PARSERS, parse_html
+
+# Fixture file names start with the host they were fetched from
+HOST_SOURCES = {
+    'yelp.com': 'yelp',
+    'yellowpages.com': 'yellowpages',
+    'bbb.org': 'bbb',
+}
+
+
+def source_for(path: Path):
+    for host, source in HOST_SOURCES.items():
+        if host in path.name:
+            return source
+    return None
+
+
+def available_backends() -> list:
+    backends = []
+    for backend in BACKENDS:
+        try:
+            parse_html('<p></p>', backend)
+            backends.append(backend)
+        except RuntimeError:
+            pass
+    return backends
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark HTML parsing backends')
+    parser.add_argument('fixtures', help='Directory of pages saved with --save-html')
+    parser.add_argument('--repeat', '-n', type=int, default=5,
+                        help='Parses per page per backend (default: 5)')
+    parser.add_argument('--backend', '-b', action='append', choices=BACKENDS,
+                        help='Backend to include (repeatable, default: all installed)')
+
+    args = parser.parse_args()
+
+    pages = []
+    for path in sorted(Path(args.fixtures).glob('*.html')):
+        source = source_for(path)
+        if source:
+            pages.append((source, path.read_text(encoding='utf-8')))
+
+    if not pages:
+        print(f"No fixtures found in {args.fixtures}")
+        sys.exit(1)
+
+    backends = args.backend or available_backends()
+    print(f"Pages: {len(pages)}  Repeats: {args.repeat}  Backends: {', '.join(backends)}\n")
+    print(f"{'source':<12} {'backend':<12} {'ms/page':>9} {'records':>8}")
+    print("-" * 44)
+
+    for source in sorted({s for s, _ in pages}):
+        htmls = [html for s, html in pages if s == source]
+        for backend in backends:
+            records = 0
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                records = 0
+                for html in htmls:
+                    records += len(PARSERS[source](html, '', backend)[1])
+            elapsed = time.perf_counter() - start
+            ms = elapsed * 1000 / (args.repeat * len(htmls))
+            print(f"{source:<12} {backend:<12} {ms:>9.2f} {records:>8}")
+
+
+if __name__ == '__main__':
+    main()
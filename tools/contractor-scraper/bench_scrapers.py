@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Offline throughput benchmark for both scrapers.
+
+Serves a recorded archive (see replay.py) from a local replay server in a
+separate process and runs the scraper that recorded it against it, once per
+worker setting. Reports records/sec, CPU milliseconds per page and peak
+Python memory, so sequential and concurrent modes can be compared without
+touching Yelp, BBB or Google.
+
+The fixed politeness pauses are skipped unless --keep-delays is given; they
+would otherwise dominate every number.
+
+Usage:
+    python scraper_free.py --file cities.txt --record fixtures/free.jsonl.gz
+    python bench_scrapers.py fixtures/free.jsonl.gz
+    python bench_scrapers.py fixtures/google.jsonl.gz --workers 1 --workers 8 --latency 0.15 --error-rate 0.02
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import socket
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import scraper as google_scraper
+import scraper_free
+from places_planner import SearchPlanner
+from replay import load_archive, route_to_replay
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@contextlib.contextmanager
+def replay_server(archive: str, latency: float, jitter: float, error_rate: float):
+    """Run `replay.py serve` in its own process so its CPU isn't counted against the scraper"""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, str(Path(__file__).parent / 'replay.py'), 'serve', archive, '--port', str(port),
+         '--latency', str(latency), '--jitter', str(jitter), '--error-rate', str(error_rate)],
+        stdout=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline or process.poll() is not None:
+                    raise RuntimeError("Replay server did not start")
+                time.sleep(0.1)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def run_free(server_url: str, meta: dict, workers: int, keep_delays: bool) -> tuple:
+    scraper = scraper_free.FreeContractorScraper(workers=workers,
+                                                 host_rate=1 / 3 if keep_delays else 1000)
+    route_to_replay(scraper.session, server_url, pool_maxsize=max(workers, 10))
+    records = 0
+    for city, source, results in scraper.iter_cities(meta['query'], meta['cities']):
+        records += len(results)
+    return records, scraper.client
+
+
+def run_google(server_url: str, meta: dict, workers: int, keep_delays: bool) -> tuple:
+    scraper = google_scraper.ContractorScraper('replay', workers=workers, email_workers=workers)
+    scraper.emails.cache = None  # Every run should crawl, not read the last run's answers
+    route_to_replay(scraper.session, server_url, pool_maxsize=max(workers * 2, 10))
+    scraper.max_pages = meta.get('max_pages', 3)
+    radius = meta.get('radius', 25)
+    records = 0
+    # Replay the recorded run's plan, so skipped cities aren't requested
+    planner = SearchPlanner(scraper.geocode, radius, meta.get('overlap'), scraper.max_pages)
+    for city in meta['cities']:
+        entry = planner.decide(city)
+        if not entry['search']:
+            continue
+        for page, contractors, next_page_token in scraper.iter_pages(meta['query'], city, radius,
+                                                                     coords=entry['coords']):
+            records += len(contractors)
+        planner.searched(entry, scraper.returned)
+    return records, scraper.client
+
+
+RUNNERS = {'scraper_free': run_free, 'scraper': run_google}
+
+
+def measure(runner, server_url: str, meta: dict, workers: int, keep_delays: bool, trace_memory: bool):
+    gc.collect()
+    if trace_memory:
+        tracemalloc.start()
+    wall, cpu = time.perf_counter(), time.process_time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        records, client = runner(server_url, meta, workers, keep_delays)
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    peak = 0
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    pages = sum(m['requests'] for m in client.metrics().values())
+    return {'workers': workers, 'records': records, 'pages': pages, 'seconds': wall,
+            'cpu_seconds': cpu, 'peak_bytes': peak}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark a scraper offline against a recorded archive')
+    parser.add_argument('archive', help='Archive recorded with --record')
+    parser.add_argument('--workers', '-w', type=int, action='append',
+                        help='Worker setting to run (repeatable, default: 1 and 8)')
+    parser.add_argument('--repeat', '-n', type=int, default=3,
+                        help='Timed runs per setting; the fastest is reported (default: 3)')
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='Seconds the replay server adds per response (default: 0.05)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Extra random latency per response')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Fraction of responses replaced by a 503 (default: 0)')
+    parser.add_argument('--keep-delays', action='store_true',
+                        help='Keep the politeness pauses and per-host rate limits')
+    parser.add_argument('--json', metavar='PATH', help='Also write the results as JSON')
+
+    args = parser.parse_args()
+
+    meta, entries = load_archive(args.archive)
+    runner = RUNNERS.get(meta.get('scraper'))
+    if runner is None:
+        print(f"Archive {args.archive} wasn't recorded by scraper.py or scraper_free.py")
+        sys.exit(1)
+
+    if not args.keep_delays:
+        scraper_free.SOURCE_DELAY = scraper_free.CITY_DELAY = 0
+        google_scraper.PAGE_TOKEN_DELAY = 0
+
+    print(f"Archive: {args.archive} ({meta['scraper']}, {len(meta['cities'])} cities, "
+          f"{len(entries)} responses)")
+    print(f"Latency: {args.latency * 1000:.0f} ms (+{args.jitter * 1000:.0f} jitter), "
+          f"errors: {args.error_rate:.0%}, repeats: {args.repeat}\n")
+    print(f"{'workers':>7} {'records':>8} {'pages':>6} {'seconds':>8} {'rec/sec':>8} "
+          f"{'CPU ms/page':>11} {'peak MB':>8}")
+    print("-" * 62)
+
+    results = []
+    with replay_server(args.archive, args.latency, args.jitter, args.error_rate) as server_url:
+        for workers in args.workers or [1, 8]:
+            runs = [measure(runner, server_url, meta, workers, args.keep_delays, False)
+                    for _ in range(args.repeat)]
+            best = min(runs, key=lambda r: r['seconds'])
+            # tracemalloc slows everything down, so memory gets its own run
+            best['peak_bytes'] = measure(runner, server_url, meta, workers, args.keep_delays,
+                                         True)['peak_bytes']
+            results.append(best)
+
+            rate = best['records'] / best['seconds'] if best['seconds'] else 0.0
+            cpu_ms = best['cpu_seconds'] * 1000 / best['pages'] if best['pages'] else 0.0
+            print(f"{workers:>7} {best['records']:>8} {best['pages']:>6} {best['seconds']:>8.2f} "
+                  f"{rate:>8.1f} {cpu_ms:>11.2f} {best['peak_bytes'] / 1e6:>8.1f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'archive': args.archive, 'scraper': meta['scraper'], 'latency': args.latency,
+                       'error_rate': args.error_rate, 'results': results}, f, indent=2)
+        print(f"\nSaved results to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
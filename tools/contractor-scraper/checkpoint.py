@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Checkpoint journal for resumable multi-city sweeps.
+
+An append-only JSONL file: a header line describing the run (query and
+output file name), then one line per committed unit of work - a (city,
+source, page) whose records have already been written to the output. Each
+line is fsync'd, so after a crash `--resume` picks up right after the last
+committed unit and keeps appending to the same output files.
+"""
+
+import json
+import os
+from pathlib import Path
+
+
+class CheckpointMismatch(Exception):
+    pass
+
+
+class Checkpoint:
+    def __init__(self, path: Path, query: str, output: str, resume: bool = False):
+        self.path = Path(path)
+        self.units = {}
+        self.resumed = False
+        self.output = output
+
+        if resume and self.path.exists():
+            self._load(query)
+        elif resume:
+            print(f"No checkpoint at {self.path}, starting a fresh run")
+
+        if not self.resumed:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'type': 'run', 'query': query, 'output': output}) + '\n')
+
+        self.file = open(self.path, 'a', encoding='utf-8')
+
+    def _load(self, query: str) -> None:
+        committed = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # Torn write from the crash; everything before it is committed
+                if not line.endswith(b'\n'):
+                    break
+                committed += len(line)
+                if entry.get('type') == 'run':
+                    if entry['query'] != query:
+                        raise CheckpointMismatch(
+                            f"Checkpoint {self.path} is for query {entry['query']!r}, not {query!r}")
+                    self.output = entry['output']
+                else:
+                    self.units[(entry['city'], entry['source'])] = entry
+
+        # Drop the torn tail so new entries start on a clean line
+        os.truncate(self.path, committed)
+        self.resumed = True
+
+    def progress(self, city: str, source: str):
+        """Last committed entry for (city, source): page, next_page_token, final. None if not started."""
+        return self.units.get((city, source))
+
+    def is_done(self, city: str, source: str) -> bool:
+        entry = self.progress(city, source)
+        return bool(entry and entry['final'])
+
+    def commit(self, city: str, source: str, page: int = 1, records: int = 0,
+               next_page_token: str = None, final: bool = True) -> None:
+        """Record a unit whose records are already in the output"""
+        entry = {
+            'city': city,
+            'source': source,
+            'page': page,
+            'records': records,
+            'next_page_token': next_page_token,
+            'final': final,
+        }
+        self.units[(city, source)] = entry
+        self.file.write(json.dumps(entry) + '\n')
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self, completed: bool = False) -> None:
+        """Close the journal; a completed sweep has nothing left to resume, so it is removed"""
+        self.file.close()
+        if completed:
+            self.path.unlink()
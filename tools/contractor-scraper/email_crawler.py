@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Contact-email crawler for contractor websites.
+
+For each website the homepage is fetched first; if it shows no email, the
+likely contact/about pages (links found on the homepage, then common paths)
+are fetched concurrently, up to a per-domain page budget. Bodies are
+streamed and cut off at a byte cap, so a huge page or a file download costs
+at most that much. Emails are found by compiled patterns that also undo the
+usual obfuscation: mailto: links, "name [at] domain [dot] com" and
+Cloudflare's data-cfemail encoding. The answer, including "no email", is
+cached per domain, or per page for profiles on shared hosts (Facebook,
+Yelp, Linktree ...), where the domain says nothing about the business.
+
+Usage:
+    python email_crawler.py                       # fill emails for stored contractors with a website
+    python email_crawler.py https://example-sod.com https://other.com
+"""
+
+import argparse
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import unquote, urljoin, urlsplit
+
+import requests
+
+from resilient_http import ResilientClient
+from store import DEFAULT_STORE_PATH, ContractorStore
+
+DEFAULT_CACHE_PATH = Path(__file__).parent / 'cache' / 'emails.sqlite'
+
+# Local parts are anchored and length-bounded so long runs of word characters
+# (minified JS, base64 images) can't make matching quadratic
+EMAIL_RE = re.compile(r'(?<![a-zA-Z0-9._%+-])[a-zA-Z0-9._%+-]{1,64}@[a-zA-Z0-9.-]{1,253}\.[a-zA-Z]{2,24}')
+MAILTO_RE = re.compile(r'mailto:([^"\'?#\s<>]{1,254})', re.IGNORECASE)
+OBFUSCATED_RE = re.compile(
+    r'(?<![a-zA-Z0-9._%+-])([a-zA-Z0-9._%+-]{1,64})\s*[\[\(\{<]\s*at\s*[\]\)\}>]\s*'
+    r'([a-zA-Z0-9-]{1,63}(?:\s*[\[\(\{<]\s*dot\s*[\]\)\}>]\s*[a-zA-Z0-9-]{1,63})+)', re.IGNORECASE)
+DOT_RE = re.compile(r'\s*[\[\(\{<]\s*dot\s*[\]\)\}>]\s*', re.IGNORECASE)
+CFEMAIL_RE = re.compile(r'data-cfemail="([0-9a-fA-F]+)"|/cdn-cgi/l/email-protection#([0-9a-fA-F]+)')
+LINK_RE = re.compile(r'<a\s[^>]*href=["\']([^"\'#]+)["\'][^>]*>(.{0,300}?)</a>', re.IGNORECASE | re.DOTALL)
+CONTACT_RE = re.compile(r'contact|about|get-in-touch|reach-us|quote', re.IGNORECASE)
+
+# Filter out common non-business emails
+IGNORED_DOMAINS = ('example.com', 'email.com', 'domain.com', 'yoursite.com', 'sentry.io',
+                   'wixpress.com', 'sentry-next.wixpress.com', 'godaddy.com')
+# Retina image names (logo@2x.png) look like emails
+IGNORED_SUFFIXES = ('.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp')
+
+# Tried when the homepage links to no contact page
+FALLBACK_PATHS = ['/contact', '/contact-us', '/about']
+
+# Hosts where a contractor's "website" is one profile among many
+SHARED_HOSTS = ('facebook.com', 'fb.com', 'instagram.com', 'yelp.com', 'linktr.ee', 'google.com',
+                'business.site', 'nextdoor.com', 'angi.com', 'homeadvisor.com', 'thumbtack.com',
+                'bbb.org', 'yellowpages.com', 'houzz.com', 'twitter.com', 'x.com', 'linkedin.com')
+
+
+def decode_cfemail(hex_string: str) -> str:
+    """Cloudflare email protection: first byte is the XOR key for the rest"""
+    try:
+        data = bytes.fromhex(hex_string)
+    except ValueError:
+        return ''
+    if not data:
+        return ''
+    return ''.join(chr(b ^ data[0]) for b in data[1:])
+
+
+def site_domain(url: str) -> str:
+    host = (urlsplit(url if '//' in url else f'http://{url}').hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+def cache_key(url: str) -> str:
+    """The site's domain, or host + path for a profile on a shared host"""
+    domain = site_domain(url)
+    if any(domain == host or domain.endswith('.' + host) for host in SHARED_HOSTS):
+        path = urlsplit(url if '//' in url else f'http://{url}').path.rstrip('/').lower()
+        return f"{domain}{path}"
+    return domain
+
+
+def extract_emails(html: str, domain: str = '') -> list:
+    """All plausible emails on a page, best first: the site's own domain, then mailto links"""
+    found = []
+    for match in MAILTO_RE.finditer(html):
+        found.append(unquote(match.group(1)))
+    for match in CFEMAIL_RE.finditer(html):
+        found.append(decode_cfemail(match.group(1) or match.group(2)))
+    for match in OBFUSCATED_RE.finditer(html):
+        found.append(f"{match.group(1)}@{DOT_RE.sub('.', match.group(2))}")
+    found.extend(EMAIL_RE.findall(html))
+
+    emails = []
+    for email in found:
+        email = email.strip().strip('.').lower()
+        if not EMAIL_RE.fullmatch(email) or email in emails:
+            continue
+        if email.endswith(IGNORED_SUFFIXES) or any(x in email for x in IGNORED_DOMAINS):
+            continue
+        emails.append(email)
+
+    # Stable sort: own-domain addresses first, otherwise keep page order
+    return sorted(emails, key=lambda e: not (domain and e.endswith('@' + domain)))
+
+
+def contact_links(html: str, base_url: str) -> list:
+    """Same-site links that look like contact/about pages, in page order"""
+    domain = site_domain(base_url)
+    links = []
+    for href, text in LINK_RE.findall(html):
+        if not (CONTACT_RE.search(href) or CONTACT_RE.search(text)):
+            continue
+        url = urljoin(base_url, href.strip())
+        if url.startswith('http') and site_domain(url) == domain and url not in links:
+            links.append(url)
+    return links
+
+
+class EmailCache:
+    """Per-site results in SQLite (keyed by cache_key); an empty email means the site was crawled and had none"""
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH, ttl: float = 30 * 24 * 3600):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS emails (
+                domain TEXT PRIMARY KEY,
+                email TEXT NOT NULL,
+                pages INTEGER NOT NULL,
+                checked_at REAL NOT NULL
+            )
+        ''')
+        self.db.commit()
+
+    def get(self, domain: str):
+        """Cached email ('' if none was found) or None if unknown/expired"""
+        with self.lock:
+            row = self.db.execute('SELECT email, checked_at FROM emails WHERE domain = ?',
+                                  (domain,)).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return row[0]
+
+    def put(self, domain: str, email: str, pages: int) -> None:
+        with self.lock:
+            self.db.execute('INSERT OR REPLACE INTO emails VALUES (?, ?, ?, ?)',
+                            (domain, email, pages, time.time()))
+            self.db.commit()
+
+
+class EmailCrawler:
+    def __init__(self, client: ResilientClient, cache: EmailCache = None, workers: int = 8,
+                 pages_per_domain: int = 4, max_bytes: int = 512 * 1024, timeout: float = 5):
+        self.client = client
+        self.cache = cache
+        self.workers = workers
+        self.pages_per_domain = pages_per_domain
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.page_pool = ThreadPoolExecutor(max_workers=workers)
+        self.stats = {'sites': 0, 'cached': 0, 'pages': 0, 'bytes': 0, 'found': 0}
+        self.lock = threading.Lock()
+
+    def _count(self, stat: str, amount: int = 1) -> None:
+        with self.lock:
+            self.stats[stat] += amount
+
+    def fetch_page(self, url: str) -> str:
+        """Stream a page up to max_bytes; '' for errors and non-HTML responses"""
+        try:
+            response = self.client.get(url, timeout=self.timeout, retries=0, label='website',
+                                       stream=True, headers={'User-Agent': 'Mozilla/5.0'})
+        except requests.RequestException:
+            return ''
+
+        body = b''
+        try:
+            content_type = response.headers.get('Content-Type', 'text/html')
+            if response.status_code == 200 and ('html' in content_type or 'text' in content_type):
+                for chunk in response.iter_content(16384):
+                    body += chunk
+                    if len(body) >= self.max_bytes:
+                        break
+        except requests.RequestException:
+            pass
+        finally:
+            response.close()
+
+        self._count('pages')
+        self._count('bytes', len(body))
+        return body[:self.max_bytes].decode(response.encoding or 'utf-8', errors='replace')
+
+    def find(self, website: str) -> str:
+        """Best contact email for a website, or ''"""
+        if not website:
+            return ''
+        domain = site_domain(website)
+        key = cache_key(website)
+        if self.cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self._count('cached')
+                return cached
+
+        self._count('sites')
+        homepage = website if '//' in website else f'http://{website}'
+        html = self.fetch_page(homepage)
+        emails = extract_emails(html, domain)
+        pages = 1
+
+        if not emails and html:
+            candidates = contact_links(html, homepage)
+            candidates += [urljoin(homepage, p) for p in FALLBACK_PATHS
+                           if urljoin(homepage, p) not in candidates]
+            candidates = candidates[:self.pages_per_domain - 1]
+            pages += len(candidates)
+            # Contact pages are independent of each other, so fetch them side by side
+            for page_html in self.page_pool.map(self.fetch_page, candidates):
+                emails = extract_emails(page_html, domain)
+                if emails:
+                    break
+
+        email = emails[0] if emails else ''
+        if email:
+            self._count('found')
+        if self.cache and html:
+            # Unreachable sites aren't cached; they may be back next run
+            self.cache.put(key, email, pages)
+        return email
+
+    def find_many(self, websites: list) -> dict:
+        """website -> email for a batch, crawled concurrently"""
+        unique = list(dict.fromkeys(w for w in websites if w))
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return dict(zip(unique, pool.map(self.find, unique)))
+
+    def summary(self) -> str:
+        s = self.stats
+        return (f"Emails: {s['found']} found on {s['sites']} sites crawled ({s['cached']} cached), "
+                f"{s['pages']} pages, {s['bytes'] / 1024:.0f} KB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Find contact emails on contractor websites')
+    parser.add_argument('websites', nargs='*',
+                        help='Websites to crawl (default: stored contractors missing an email)')
+    parser.add_argument('--store', default=str(DEFAULT_STORE_PATH), help='SQLite contractor store')
+    parser.add_argument('--workers', '-w', type=int, default=8,
+                        help='Sites crawled at once (default: 8)')
+    parser.add_argument('--pages', type=int, default=4,
+                        help='Max pages fetched per domain (default: 4)')
+    parser.add_argument('--max-kb', type=int, default=512,
+                        help='Bytes read per page, in KB (default: 512)')
+
+    args = parser.parse_args()
+
+    session = requests.Session()
+    session.mount('https://', requests.adapters.HTTPAdapter(pool_maxsize=args.workers * 2))
+    session.mount('http://', requests.adapters.HTTPAdapter(pool_maxsize=args.workers * 2))
+    crawler = EmailCrawler(ResilientClient(session), EmailCache(), workers=args.workers,
+                           pages_per_domain=args.pages, max_bytes=args.max_kb * 1024)
+
+    if args.websites:
+        for website, email in crawler.find_many(args.websites).items():
+            print(f"  {website:<40} {email or '-'}")
+    else:
+        store = ContractorStore(args.store)
+        records = [r for r in store.iter_records() if r['website'] and not r['email']]
+        print(f"Crawling {len(records)} contractor websites")
+        emails = crawler.find_many([r['website'] for r in records])
+        updated = [dict(r, email=emails[r['website']]) for r in records if emails.get(r['website'])]
+        store.upsert_many(updated)
+        print(f"Updated {len(updated)} contractors")
+
+    print(crawler.summary())
+
+
+if __name__ == '__main__':
+    main()
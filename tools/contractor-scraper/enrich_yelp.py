@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Yelp detail-page enrichment.
+
+Yelp search results carry no phone, address or website - those are only on
+each business page. This fills them in for Yelp records already in the
+contractor store: detail pages are fetched concurrently (Yelp's per-host
+rate limit still applies, and pages go through the response cache).
+Records that already have a phone and address are skipped, and so is every
+record tried in the last --retry-after days (whether its page had the
+fields, lacked them or failed), so each run only works through what is left.
+
+Usage:
+    python scraper_free.py --file cities.txt      # fills the store
+    python enrich_yelp.py                         # enrich every incomplete Yelp record
+    python enrich_yelp.py --limit 100 --workers 4
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from extract import BACKENDS, DEFAULT_BACKEND, parse_yelp_detail
+from http_cache import ResponseCache
+from scraper_free import FreeContractorScraper
+from store import DEFAULT_STORE_PATH, ContractorStore, record_key
+from throttle import HostLimiter
+
+ENRICHED_FIELDS = ('phone', 'phone_clean', 'address', 'website')
+
+# Stage name for ContractorStore.mark_attempted
+STAGE = 'enrich_yelp'
+
+
+def needs_enrichment(record: dict) -> bool:
+    return bool(record['yelp_url']) and not (record['phone_clean'] and record['address'])
+
+
+def enrich(scraper: FreeContractorScraper, record: dict):
+    """Fetch one record's detail page. Returns (record with blanks filled in, fields filled)."""
+    response = scraper.fetch(record['yelp_url'])
+    if response.status_code != 200:
+        raise RuntimeError(f"status {response.status_code}")
+
+    details = parse_yelp_detail(response.text, scraper.parser)
+    enriched = dict(record)
+    filled = []
+    for field in ENRICHED_FIELDS:
+        if details[field] and not enriched[field]:
+            enriched[field] = details[field]
+            filled.append(field)
+    return enriched, filled
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fill in phone/address/website for stored Yelp leads')
+    parser.add_argument('--store', default=str(DEFAULT_STORE_PATH), help='SQLite contractor store')
+    parser.add_argument('--workers', '-w', type=int, default=4,
+                        help='Concurrent detail-page fetches (default: 4)')
+    parser.add_argument('--host-rate', type=float, default=1.0,
+                        help='Max requests per second to yelp.com (default: 1)')
+    parser.add_argument('--host-concurrency', type=int, default=2,
+                        help='Max requests in flight to yelp.com at once (default: 2)')
+    parser.add_argument('--limit', type=int, default=0,
+                        help='Enrich at most this many records (default: all)')
+    parser.add_argument('--parser', choices=BACKENDS, default=DEFAULT_BACKEND,
+                        help=f'HTML parsing backend (default: {DEFAULT_BACKEND})')
+    parser.add_argument('--cache-ttl', type=float, default=24 * 7,
+                        help='Hours before a cached detail page is revalidated (default: 168)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always download pages, bypassing the response cache')
+    parser.add_argument('--retry-after', type=float, default=30,
+                        help='Days before a record already tried is tried again (default: 30)')
+
+    args = parser.parse_args()
+
+    store = ContractorStore(args.store)
+
+    def pending():
+        tried = store.attempted(STAGE, args.retry_after * 86400)
+        return [r for r in store.iter_records(source='yelp')
+                if needs_enrichment(r) and record_key(r) not in tried]
+
+    backlog = pending()
+    if args.limit:
+        backlog = backlog[:args.limit]
+    if not backlog:
+        print("No Yelp records need enrichment")
+        return
+
+    cache = None if args.no_cache else ResponseCache(ttl=args.cache_ttl * 3600)
+    limiter = HostLimiter(rate=args.host_rate, concurrency=args.host_concurrency)
+    scraper = FreeContractorScraper(workers=args.workers, cache=cache, parser=args.parser,
+                                    limiter=limiter)
+
+    print(f"Enriching {len(backlog)} Yelp records with {args.workers} workers")
+    print("-" * 50)
+
+    totals = {'enriched': 0, 'fields': 0, 'with_phone': 0, 'failed': 0}
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(enrich, scraper, record): record for record in backlog}
+        for future in as_completed(futures):
+            record = futures[future]
+            try:
+                enriched, filled = future.result()
+            except Exception as e:
+                totals['failed'] += 1
+                store.mark_attempted(record, STAGE, 'failed')
+                print(f"  {record['name']}: {e}")
+                continue
+
+            # Store writes stay on this thread; the store serializes them anyway
+            if filled:
+                store.upsert_many([enriched])
+                totals['enriched'] += 1
+                totals['fields'] += len(filled)
+            store.mark_attempted(record, STAGE, 'filled' if filled else 'empty')
+            if enriched['phone_clean']:
+                totals['with_phone'] += 1
+
+    elapsed = time.monotonic() - started
+    print("\n" + "=" * 50)
+    print(f"Records fetched: {len(backlog)} in {elapsed:.1f}s")
+    print(f"Enriched: {totals['enriched']} ({totals['fields']} fields filled)")
+    print(f"With phone: {totals['with_phone']}")
+    print(f"Failed: {totals['failed']}")
+    print(f"Politeness wait: {scraper.limiter.total_wait():.1f}s")
+    print(f"Remaining backlog: {len(pending())}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Export the contractor store as a partitioned columnar dataset.
+
+Rows are written as Parquet (or Arrow IPC) files under
+`<out>/source=<source>/scrape_date=<YYYY-MM-DD>/`, with typed columns
+(rating as float, reviews as int, timestamps) and city/search_city
+dictionary-encoded. Readers such as pyarrow.dataset, DuckDB, Polars or
+Spark can then prune by source and date from the directory names alone.
+
+The store keeps only the latest version of each contractor, so exports
+are incremental: each run starts the day after the newest scrape date
+already exported, and a partition, once written, is never replaced. A
+contractor rescraped today then appears in both the old partition (as
+it was) and today's (as it is now), which is the history the store
+itself doesn't keep. Rows scraped on a date that was already exported
+(a second scrape the same day) are left out until --full, which rebuilds
+the dataset from the store alone.
+
+Usage:
+    python export_dataset.py                          # incremental, Parquet
+    python export_dataset.py --format arrow --out output/dataset_arrow
+    python export_dataset.py --full
+    python export_dataset.py --summary --source yelp --since 2025-01-01
+"""
+
+import argparse
+import shutil
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from output_writer import OUTPUT_DIR
+from store import DEFAULT_STORE_PATH, ContractorStore
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = None
+
+DEFAULT_DATASET_DIR = OUTPUT_DIR / 'dataset'
+PARTITION_COLUMNS = ['source', 'scrape_date']
+
+if pa is not None:
+    # Low-cardinality text repeated on every row
+    CATEGORY = pa.dictionary(pa.int32(), pa.string())
+    CATEGORY_COLUMNS = ['city', 'search_city']
+    SCHEMA = pa.schema([
+        ('record_key', pa.string()),
+        ('name', pa.string()),
+        ('phone', pa.string()),
+        ('phone_clean', pa.string()),
+        ('email', pa.string()),
+        ('city', CATEGORY),
+        ('address', pa.string()),
+        ('rating', pa.float64()),
+        ('reviews', pa.int64()),
+        ('website', pa.string()),
+        ('yelp_url', pa.string()),
+        ('place_id', pa.string()),
+        ('types', pa.string()),
+        ('search_city', CATEGORY),
+        ('scraped_at', pa.timestamp('s')),
+        ('first_seen', pa.timestamp('s')),
+        ('last_seen', pa.timestamp('s')),
+        ('source', pa.string()),
+        ('scrape_date', pa.string()),
+    ])
+    PARTITIONING = ds.partitioning(pa.schema([(c, pa.string()) for c in PARTITION_COLUMNS]),
+                                   flavor='hive')
+    FORMATS = {'parquet': ('parquet', 'parquet'), 'arrow': ('ipc', 'arrow')}
+
+
+def _number(value, cast):
+    try:
+        return cast(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _scraped_at(row: dict):
+    try:
+        return datetime.fromisoformat(row['scraped_at']).replace(microsecond=0, tzinfo=None)
+    except (TypeError, ValueError):
+        # Records without a timestamp date from when the store last saw them
+        return datetime.fromtimestamp(int(row['last_seen']))
+
+
+def to_batch(rows: list, dictionaries: dict, since: str = None, existing: set = frozenset()):
+    """
+    Store rows as a RecordBatch in SCHEMA, dropping rows scraped before
+    `since` or belonging to an `existing` (source, scrape_date) partition.
+    Category columns are encoded against `dictionaries`
+    ({column: pa.array of values}), the same for every batch, since Arrow
+    IPC files can't change a dictionary between batches.
+    """
+    columns = {field.name: [] for field in SCHEMA}
+    for row in rows:
+        scraped_at = _scraped_at(row)
+        scrape_date = scraped_at.date().isoformat()
+        if since and scrape_date < since:
+            continue
+        if (row['source'] or 'google', scrape_date) in existing:
+            continue
+        for name in ('record_key', 'name', 'phone', 'phone_clean', 'email', 'address',
+                     'website', 'yelp_url', 'place_id', 'types'):
+            columns[name].append(row[name] or None)
+        columns['rating'].append(_number(row['rating'], float))
+        columns['reviews'].append(_number(row['reviews'], int))
+        columns['scraped_at'].append(scraped_at)
+        columns['first_seen'].append(datetime.fromtimestamp(int(row['first_seen'])))
+        columns['last_seen'].append(datetime.fromtimestamp(int(row['last_seen'])))
+        columns['source'].append(row['source'] or 'google')
+        columns['scrape_date'].append(scrape_date)
+        for name in CATEGORY_COLUMNS:
+            columns[name].append(row[name] or None)
+
+    for name in CATEGORY_COLUMNS:
+        index = {value: i for i, value in enumerate(dictionaries[name].to_pylist())}
+        columns[name] = pa.DictionaryArray.from_arrays(
+            pa.array([index.get(v) for v in columns[name]], pa.int32()), dictionaries[name])
+    return pa.RecordBatch.from_pydict(columns, schema=SCHEMA)
+
+
+def existing_partitions(path: Path) -> set:
+    """(source, scrape_date) of every partition already written"""
+    return {(p.parent.name.split('=', 1)[1], p.name.split('=', 1)[1])
+            for p in Path(path).glob('source=*/scrape_date=*')}
+
+
+def exported_dates(path: Path) -> list:
+    """Scrape dates that already have a partition, oldest first"""
+    return sorted({scrape_date for source, scrape_date in existing_partitions(path)})
+
+
+def export(store: ContractorStore, path: Path, fmt: str = 'parquet', since: str = None,
+           batch_size: int = 5000) -> dict:
+    """
+    Write rows scraped on or after `since` (YYYY-MM-DD, None for all) to
+    partitions that don't exist yet; existing ones are never touched.
+    Returns rows written per partition.
+    """
+    # last_seen is never earlier than scraped_at, so it can pre-filter in SQL
+    since_ts = datetime.fromisoformat(since).timestamp() if since else None
+    counts = {}
+    existing = existing_partitions(path)
+    dictionaries = {name: pa.array(store.distinct(name), pa.string()) for name in CATEGORY_COLUMNS}
+
+    def batches():
+        for rows in store.iter_batches(batch_size, since=since_ts):
+            batch = to_batch(rows, dictionaries, since, existing)
+            for source, scrape_date in zip(batch.column('source').to_pylist(),
+                                           batch.column('scrape_date').to_pylist()):
+                counts[(source, scrape_date)] = counts.get((source, scrape_date), 0) + 1
+            yield batch
+
+    file_format, extension = FORMATS[fmt]
+    ds.write_dataset(batches(), str(path), schema=SCHEMA, format=file_format,
+                     partitioning=PARTITIONING, basename_template=f"part-{{i}}.{extension}",
+                     existing_data_behavior='overwrite_or_ignore', max_partitions=100000)
+    return counts
+
+
+def open_dataset(path: Path, fmt: str = 'parquet'):
+    """The exported dataset, with source and scrape_date read back as dictionary columns"""
+    return ds.dataset(str(path), format=FORMATS[fmt][0],
+                      partitioning=ds.partitioning(flavor='hive', dictionaries='infer'))
+
+
+def summarize(path: Path, fmt: str = 'parquet', source: str = None, since: str = None) -> list:
+    """(source, scrape_date, rows, cities) per partition, reading only the partitions that match"""
+    dataset = open_dataset(path, fmt)
+    condition = None
+    if source:
+        condition = ds.field('source') == source
+    if since:
+        after = ds.field('scrape_date') >= since
+        condition = after if condition is None else condition & after
+    table = dataset.to_table(columns=['source', 'scrape_date', 'city'], filter=condition)
+    table = table.cast(pa.schema([('source', pa.string()), ('scrape_date', pa.string()),
+                                  ('city', pa.string())]))
+    grouped = table.group_by(['source', 'scrape_date']).aggregate(
+        [([], 'count_all'), ('city', 'count_distinct')])
+    return sorted(zip(grouped['source'].to_pylist(), grouped['scrape_date'].to_pylist(),
+                      grouped['count_all'].to_pylist(), grouped['city_count_distinct'].to_pylist()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the contractor store as a partitioned dataset')
+    parser.add_argument('--store', default=str(DEFAULT_STORE_PATH), help='SQLite contractor store')
+    parser.add_argument('--out', default=str(DEFAULT_DATASET_DIR),
+                        help='Dataset directory (default: output/dataset)')
+    parser.add_argument('--format', choices=['parquet', 'arrow'], default='parquet',
+                        help='File format: Parquet or Arrow IPC (default: parquet)')
+    parser.add_argument('--since', metavar='YYYY-MM-DD',
+                        help='Export rows scraped on or after this date, skipping partitions '
+                             'already written (default: the day after the newest date exported)')
+    parser.add_argument('--full', action='store_true',
+                        help='Delete the dataset and export the whole store')
+    parser.add_argument('--summary', action='store_true',
+                        help="Don't export; print rows per partition (filter with --source/--since)")
+    parser.add_argument('--source', help='With --summary: only this source')
+
+    args = parser.parse_args()
+
+    if pa is None:
+        print("Dataset export needs pyarrow: pip install pyarrow")
+        sys.exit(1)
+    if args.since:
+        try:
+            date.fromisoformat(args.since)
+        except ValueError:
+            parser.error(f'--since {args.since!r} is not YYYY-MM-DD')
+
+    out = Path(args.out)
+    if args.summary:
+        if not out.exists():
+            print(f"No dataset at {out}")
+            sys.exit(1)
+        print(f"{'source':<14} {'scrape_date':<12} {'rows':>8} {'cities':>7}")
+        for source, scrape_date, rows, cities in summarize(out, args.format, args.source, args.since):
+            print(f"{source:<14} {scrape_date:<12} {rows:>8} {cities:>7}")
+        return
+
+    since = args.since
+    if args.full:
+        if out.exists():
+            shutil.rmtree(out)
+        since = None
+    elif since is None:
+        dates = exported_dates(out)
+        since = (date.fromisoformat(dates[-1]) + timedelta(days=1)).isoformat() if dates else None
+
+    store = ContractorStore(args.store)
+    print(f"Exporting {store.count()} stored contractors to {out} ({args.format}"
+          f"{', scraped since ' + since if since else ''})")
+    counts = export(store, out, args.format, since)
+    for (source, scrape_date), rows in sorted(counts.items()):
+        print(f"  source={source}/scrape_date={scrape_date}: {rows} rows")
+    print(f"Wrote {sum(counts.values())} rows in {len(counts)} partitions")
+
+
+if __name__ == '__main__':
+    main()
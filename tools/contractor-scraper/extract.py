@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Listing-page extraction for the free contractor scraper.
+
+Each source has an extraction spec: CSS selectors and regexes compiled once
+at import time instead of on every card. Pages can be parsed with any of
+three backends behind the same small node interface:
+
+    html.parser  BeautifulSoup's pure-Python parser (always available)
+    lxml         BeautifulSoup on lxml (the default when lxml is installed)
+    selectolax   Lexbor via selectolax, fastest, needs `pip install selectolax`
+"""
+
+import json
+import re
+from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
+
+import soupsieve
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401
+    HAVE_LXML = True
+except ImportError:
+    HAVE_LXML = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+BACKENDS = ['html.parser', 'lxml', 'selectolax']
+DEFAULT_BACKEND = 'lxml' if HAVE_LXML else 'html.parser'
+
+PHONE_DIGITS_RE = re.compile(r'[^\d]')
+
+
+class Selector:
+    """A CSS selector compiled once and usable on every backend"""
+
+    def __init__(self, css: str):
+        self.css = css
+        self.compiled = soupsieve.compile(css)
+
+
+class SoupNode:
+    __slots__ = ('el',)
+
+    def __init__(self, el):
+        self.el = el
+
+    def select(self, selector: Selector) -> list:
+        return [SoupNode(e) for e in selector.compiled.select(self.el)]
+
+    def select_one(self, selector: Selector):
+        el = selector.compiled.select_one(self.el)
+        return SoupNode(el) if el is not None else None
+
+    def text(self) -> str:
+        return self.el.get_text(strip=True)
+
+    def attr(self, name: str, default: str = '') -> str:
+        value = self.el.get(name, default)
+        return ' '.join(value) if isinstance(value, list) else value
+
+
+class LexborNode:
+    """selectolax node; like BeautifulSoup, select() only matches descendants"""
+    __slots__ = ('el',)
+
+    def __init__(self, el):
+        self.el = el
+
+    def select(self, selector: Selector) -> list:
+        return [LexborNode(e) for e in self.el.css(selector.css) if e.mem_id != self.el.mem_id]
+
+    def select_one(self, selector: Selector):
+        for el in self.el.css(selector.css):
+            if el.mem_id != self.el.mem_id:
+                return LexborNode(el)
+        return None
+
+    def text(self) -> str:
+        return self.el.text(strip=True)
+
+    def attr(self, name: str, default: str = '') -> str:
+        value = self.el.attributes.get(name)
+        return value if value is not None else default
+
+
+def parse_html(html: str, backend: str = DEFAULT_BACKEND):
+    """Parse a page and return its root node"""
+    if backend == 'selectolax':
+        if LexborHTMLParser is None:
+            raise RuntimeError("selectolax backend needs: pip install selectolax")
+        return LexborNode(LexborHTMLParser(html).root)
+    if backend == 'lxml' and not HAVE_LXML:
+        raise RuntimeError("lxml backend needs: pip install lxml")
+    return SoupNode(BeautifulSoup(html, backend))
+
+
+# ----------------------------------------------------------------------------
+# Yelp
+# ----------------------------------------------------------------------------
+
+YELP_CARDS = Selector('[data-testid="serp-ia-card"]')
+YELP_CARDS_FALLBACK = Selector('.container__09f24__mpR8_ a[href*="/biz/"]')
+YELP_NAME = Selector('a[href*="/biz/"]')
+YELP_RATING = Selector('[aria-label*="star rating"]')
+YELP_SPAN = Selector('span')
+YELP_RATING_RE = re.compile(r'([\d.]+)\s*star')
+YELP_REVIEWS_RE = re.compile(r'(\d+)')
+YELP_LIMIT = 20
+
+
+def parse_yelp(html: str, location: str, backend: str = DEFAULT_BACKEND, limit: int = YELP_LIMIT):
+    """Return (cards found, records) for a Yelp search page"""
+    root = parse_html(html, backend)
+
+    businesses = root.select(YELP_CARDS)
+    if not businesses:
+        businesses = root.select(YELP_CARDS_FALLBACK)
+
+    results = []
+    for biz in businesses[:limit]:
+        try:
+            name_elem = biz.select_one(YELP_NAME)
+            if not name_elem:
+                continue
+
+            name = name_elem.text()
+            link = name_elem.attr('href')
+            if '/biz/' not in link:
+                continue
+
+            rating = 0
+            rating_elem = biz.select_one(YELP_RATING)
+            if rating_elem:
+                match = YELP_RATING_RE.search(rating_elem.attr('aria-label'))
+                if match:
+                    rating = float(match.group(1))
+
+            # First span mentioning "reviews" (replaces the slow :-soup-contains)
+            reviews = 0
+            for span in biz.select(YELP_SPAN):
+                text = span.text()
+                if 'reviews' in text:
+                    match = YELP_REVIEWS_RE.search(text)
+                    if match:
+                        reviews = int(match.group(1))
+                    break
+
+            results.append({
+                'name': name,
+                'phone': '',  # Need to visit detail page
+                'phone_clean': '',
+                'address': '',
+                'city': location,
+                'rating': rating,
+                'reviews': reviews,
+                'website': '',
+                'email': '',
+                'source': 'yelp',
+                'yelp_url': f"https://www.yelp.com{link}" if link.startswith('/') else link,
+                'scraped_at': datetime.now().isoformat()
+            })
+        except Exception:
+            continue
+
+    return len(businesses), results
+
+
+YELP_JSON_LD = Selector('script[type="application/ld+json"]')
+YELP_BIZ_REDIR = Selector('a[href*="/biz_redir"]')
+YELP_PHONE_RE = re.compile(r'\(\d{3}\)\s*\d{3}-\d{4}')
+
+
+def _json_ld_business(root) -> dict:
+    """First JSON-LD object on the page that carries a telephone or address"""
+    for script in root.select(YELP_JSON_LD):
+        try:
+            data = json.loads(script.text())
+        except ValueError:
+            continue
+        for item in data if isinstance(data, list) else [data]:
+            if isinstance(item, dict) and ('telephone' in item or 'address' in item):
+                return item
+    return {}
+
+
+def parse_yelp_detail(html: str, backend: str = DEFAULT_BACKEND) -> dict:
+    """Return the phone, address and website found on a Yelp business page"""
+    root = parse_html(html, backend)
+    business = _json_ld_business(root)
+
+    phone = business.get('telephone', '')
+    if not phone:
+        match = YELP_PHONE_RE.search(root.text())
+        phone = match.group(0) if match else ''
+
+    address = business.get('address', '')
+    if isinstance(address, dict):
+        address = ', '.join(p for p in (address.get('streetAddress', ''),
+                                        address.get('addressLocality', ''),
+                                        address.get('addressRegion', '')) if p)
+
+    # The business website is behind Yelp's redirector: /biz_redir?url=<target>
+    website = ''
+    redir = root.select_one(YELP_BIZ_REDIR)
+    if redir:
+        website = parse_qs(urlsplit(redir.attr('href')).query).get('url', [''])[0]
+
+    return {
+        'phone': phone,
+        'phone_clean': PHONE_DIGITS_RE.sub('', phone),
+        'address': address,
+        'website': website,
+    }
+
+
+# ----------------------------------------------------------------------------
+# YellowPages
+# ----------------------------------------------------------------------------
+
+YP_CARDS = Selector('.result')
+YP_NAME = Selector('.business-name')
+YP_PHONE = Selector('.phones')
+YP_STREET = Selector('.street-address')
+YP_LOCALITY = Selector('.locality')
+YP_WEBSITE = Selector('a.track-visit-website')
+YP_RATING = Selector('.rating')
+YP_LIMIT = 20
+
+
+def parse_yellowpages(html: str, location: str, backend: str = DEFAULT_BACKEND, limit: int = YP_LIMIT):
+    """Return (cards found, records) for a YellowPages search page"""
+    root = parse_html(html, backend)
+    businesses = root.select(YP_CARDS)
+
+    results = []
+    for biz in businesses[:limit]:
+        try:
+            name_elem = biz.select_one(YP_NAME)
+            if not name_elem:
+                continue
+            name = name_elem.text()
+
+            phone_elem = biz.select_one(YP_PHONE)
+            phone = phone_elem.text() if phone_elem else ''
+            phone_clean = PHONE_DIGITS_RE.sub('', phone)
+
+            # Skip if no phone
+            if not phone_clean:
+                continue
+
+            address = ''
+            addr_elem = biz.select_one(YP_STREET)
+            if addr_elem:
+                address = addr_elem.text()
+            locality_elem = biz.select_one(YP_LOCALITY)
+            if locality_elem:
+                address += ', ' + locality_elem.text()
+
+            web_elem = biz.select_one(YP_WEBSITE)
+            website = web_elem.attr('href') if web_elem else ''
+
+            rating = 0
+            rating_elem = biz.select_one(YP_RATING)
+            if rating_elem:
+                for c in rating_elem.attr('class').split():
+                    if c.startswith('result-rating-'):
+                        try:
+                            rating = float(c.replace('result-rating-', '').replace('-', '.'))
+                        except ValueError:
+                            pass
+
+            results.append({
+                'name': name,
+                'phone': phone,
+                'phone_clean': phone_clean,
+                'address': address,
+                'city': location,
+                'rating': rating,
+                'reviews': 0,
+                'website': website,
+                'email': '',
+                'source': 'yellowpages',
+                'scraped_at': datetime.now().isoformat()
+            })
+        except Exception:
+            continue
+
+    return len(businesses), results
+
+
+# ----------------------------------------------------------------------------
+# BBB
+# ----------------------------------------------------------------------------
+
+BBB_CARDS = Selector('[data-testid="search-result"]')
+BBB_CARDS_FALLBACK = Selector('.result-card')
+BBB_NAME = Selector('h3, .result-name')
+BBB_PHONE = Selector('a[href^="tel:"]')
+BBB_ADDRESS = Selector('.result-address, address')
+BBB_LIMIT = 15
+
+
+def parse_bbb(html: str, location: str, backend: str = DEFAULT_BACKEND, limit: int = BBB_LIMIT):
+    """Return (cards found, records) for a BBB search page"""
+    root = parse_html(html, backend)
+
+    businesses = root.select(BBB_CARDS)
+    if not businesses:
+        businesses = root.select(BBB_CARDS_FALLBACK)
+
+    results = []
+    for biz in businesses[:limit]:
+        try:
+            name_elem = biz.select_one(BBB_NAME)
+            if not name_elem:
+                continue
+            name = name_elem.text()
+
+            phone_elem = biz.select_one(BBB_PHONE)
+            phone = phone_elem.text() if phone_elem else ''
+            phone_clean = PHONE_DIGITS_RE.sub('', phone)
+
+            addr_elem = biz.select_one(BBB_ADDRESS)
+            address = addr_elem.text() if addr_elem else ''
+
+            results.append({
+                'name': name,
+                'phone': phone,
+                'phone_clean': phone_clean,
+                'address': address,
+                'city': location,
+                'rating': 0,
+                'reviews': 0,
+                'website': '',
+                'email': '',
+                'source': 'bbb',
+                'scraped_at': datetime.now().isoformat()
+            })
+        except Exception:
+            continue
+
+    return len(businesses), results
+
+
+PARSERS = {
+    'yelp': parse_yelp,
+    'yellowpages': parse_yellowpages,
+    'bbb': parse_bbb,
+}
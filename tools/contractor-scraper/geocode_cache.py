@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Persistent geocode cache for scraper.py
+
+City coordinates don't move, so each location string is geocoded once and
+kept forever. Lookups are normalized ("St. Augustine, FL" and
+"st augustine FL" share an entry). A pre-warmed table (geocodes.json) ships
+with the tool; coordinates learned at runtime go to cache/geocodes.json and
+can be exported back into the shipped table.
+
+Usage:
+    python geocode_cache.py export              # merge runtime cache into geocodes.json
+    python geocode_cache.py export my_table.json
+"""
+
+import argparse
+import json
+import re
+import threading
+from pathlib import Path
+
+SEED_PATH = Path(__file__).parent / 'geocodes.json'
+DEFAULT_CACHE_PATH = Path(__file__).parent / 'cache' / 'geocodes.json'
+
+
+def normalize_location(location: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    location = re.sub(r'[^\w\s]', ' ', location.lower())
+    return ' '.join(location.split())
+
+
+class GeocodeCache:
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH, seed_path: Path = SEED_PATH):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+        # Runtime entries override the shipped table
+        for source in (Path(seed_path), self.path):
+            if source.exists():
+                with open(source) as f:
+                    self.entries.update(json.load(f))
+
+    def get(self, location: str):
+        """Return (lat, lng) for a location, or None if it was never geocoded"""
+        with self.lock:
+            entry = self.entries.get(normalize_location(location))
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry['lat'], entry['lng']
+
+    def put(self, location: str, lat: float, lng: float) -> None:
+        with self.lock:
+            self.entries[normalize_location(location)] = {'lat': lat, 'lng': lng}
+        self.save()
+
+    def save(self) -> None:
+        self.export(self.path)
+
+    def export(self, path: Path) -> Path:
+        """Write every known entry (seed + runtime) to a JSON table"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self.lock:
+            data = dict(sorted(self.entries.items()))
+        tmp = path.with_suffix(path.suffix + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        tmp.replace(path)
+        return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage the geocode cache')
+    sub = parser.add_subparsers(dest='command', required=True)
+    export = sub.add_parser('export', help='Write seed + runtime entries to a JSON table')
+    export.add_argument('path', nargs='?', default=str(SEED_PATH),
+                        help='Destination (default: the shipped geocodes.json)')
+
+    args = parser.parse_args()
+
+    cache = GeocodeCache()
+    path = cache.export(args.path)
+    print(f"Exported {len(cache.entries)} locations to: {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+On-disk HTTP response cache shared by both contractor scrapers.
+
+Responses are stored in SQLite keyed on the normalized URL + params. Fresh
+entries (younger than the TTL) are served without touching the network;
+stale entries are revalidated with If-None-Match / If-Modified-Since so an
+unchanged page costs a 304 instead of a full download. The cache is capped
+in bytes and evicts least-recently-used entries.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_CACHE_PATH = Path(__file__).parent / 'cache' / 'http_cache.sqlite'
+
+# Query params that never change the response (and must not end up on disk)
+IGNORED_PARAMS = {'key', 'api_key'}
+
+# Response headers worth keeping with the body
+KEPT_HEADERS = ['content-type', 'etag', 'last-modified', 'cache-control', 'date']
+
+
+def normalize_url(url: str, params: dict = None) -> str:
+    """Canonical form of a GET request: lowercased host, sorted params, no fragment or secrets"""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query.extend((k, str(v)) for k, v in params.items() if v is not None)
+    query = sorted((k, v) for k, v in query if k not in IGNORED_PARAMS)
+
+    netloc = (parts.hostname or '').lower()
+    if parts.port and parts.port not in (80, 443):
+        netloc += f':{parts.port}'
+
+    return urlunsplit((parts.scheme.lower(), netloc, parts.path or '/', urlencode(query), ''))
+
+
+class ResponseCache:
+    """SQLite-backed response store with TTL and size-bounded LRU eviction"""
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH, ttl: float = 12 * 3600,
+                 max_bytes: int = 256 * 1024 * 1024):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'stored': 0, 'evicted': 0}
+
+        self.db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        ''')
+        self.db.execute('CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)')
+        self.db.commit()
+
+    @staticmethod
+    def make_key(url: str, params: dict = None) -> str:
+        return hashlib.sha256(normalize_url(url, params).encode('utf-8')).hexdigest()
+
+    def get(self, key: str):
+        """Return the cached entry as a dict (or None), marking it recently used"""
+        with self.lock:
+            row = self.db.execute(
+                'SELECT url, status, headers, body, stored_at FROM responses WHERE key = ?',
+                (key,)).fetchone()
+            if row is None:
+                return None
+            self.db.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (time.time(), key))
+            self.db.commit()
+
+        url, status, headers, body, stored_at = row
+        return {
+            'url': url,
+            'status': status,
+            'headers': json.loads(headers),
+            'body': body,
+            'stored_at': stored_at,
+        }
+
+    def is_fresh(self, entry: dict) -> bool:
+        return time.time() - entry['stored_at'] < self.ttl
+
+    def put(self, key: str, url: str, response) -> None:
+        """Store a 200 response body and its validators"""
+        headers = {h: response.headers[h] for h in KEPT_HEADERS if h in response.headers}
+        body = response.content
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, url, response.status_code, json.dumps(headers), body, len(body), now, now))
+            self.db.commit()
+            self.stats['stored'] += 1
+        self.evict()
+
+    def refresh(self, key: str, response) -> None:
+        """A 304 came back: restart the entry's TTL and pick up any new validators"""
+        with self.lock:
+            row = self.db.execute('SELECT headers FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return
+            headers = json.loads(row[0])
+            headers.update({h: response.headers[h] for h in KEPT_HEADERS if h in response.headers})
+            now = time.time()
+            self.db.execute(
+                'UPDATE responses SET headers = ?, stored_at = ?, accessed_at = ? WHERE key = ?',
+                (json.dumps(headers), now, now, key))
+            self.db.commit()
+
+    def evict(self) -> None:
+        """Drop least-recently-used entries until the cache fits in max_bytes"""
+        with self.lock:
+            total = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            rows = self.db.execute('SELECT key, size FROM responses ORDER BY accessed_at').fetchall()
+            doomed = []
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                doomed.append((key,))
+                total -= size
+            self.db.executemany('DELETE FROM responses WHERE key = ?', doomed)
+            self.db.commit()
+            self.stats['evicted'] += len(doomed)
+
+    def count(self, stat: str) -> None:
+        with self.lock:
+            self.stats[stat] += 1
+
+    def summary(self) -> str:
+        s = self.stats
+        return (f"Cache: {s['hits']} hits, {s['revalidated']} revalidated (304), "
+                f"{s['misses']} fetched, {s['evicted']} evicted")
+
+
+class CachingSession(requests.Session):
+    """
+    requests.Session whose GETs go through a ResponseCache.
+
+    `should_cache(response)` can veto storing a response, e.g. a Google API
+    body that carries an error status under HTTP 200.
+    """
+
+    def __init__(self, cache: ResponseCache = None, should_cache=None):
+        super().__init__()
+        self.cache = cache
+        self.should_cache = should_cache
+
+    def request(self, method, url, params=None, headers=None, **kwargs):
+        if self.cache is None or method.upper() != 'GET' or kwargs.get('stream'):
+            return super().request(method, url, params=params, headers=headers, **kwargs)
+
+        key = self.cache.make_key(url, params)
+        entry = self.cache.get(key)
+
+        if entry and self.cache.is_fresh(entry):
+            self.cache.count('hits')
+            return self._from_entry(entry, url)
+
+        headers = dict(headers or {})
+        if entry:
+            if 'etag' in entry['headers']:
+                headers['If-None-Match'] = entry['headers']['etag']
+            if 'last-modified' in entry['headers']:
+                headers['If-Modified-Since'] = entry['headers']['last-modified']
+
+        response = super().request(method, url, params=params, headers=headers, **kwargs)
+
+        if response.status_code == 304 and entry:
+            self.cache.refresh(key, response)
+            self.cache.count('revalidated')
+            return self._from_entry(entry, url)
+
+        self.cache.count('misses')
+        if response.status_code == 200 and (self.should_cache is None or self.should_cache(response)):
+            self.cache.put(key, normalize_url(url, params), response)
+
+        return response
+
+    @staticmethod
+    def _from_entry(entry: dict, url: str):
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response._content = entry['body']
+        response.url = url
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.from_cache = True
+        return response
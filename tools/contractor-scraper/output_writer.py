@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Streaming output for the contractor scrapers.
+
+Records are appended to CSV and newline-delimited JSON (and optionally
+Parquet) as soon as they are deduplicated, so memory stays flat however
+many cities a sweep covers. Files are written as `<name>.part` and renamed
+into place by finalize(); after a crash the .part files still hold every
+record written so far, and a resumed writer keeps appending to them.
+"""
+
+import csv
+import json
+import os
+from pathlib import Path
+
+OUTPUT_DIR = Path(__file__).parent / 'output'
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+
+def _truncate_partial_line(path: Path) -> None:
+    """Cut a file back to its last newline, dropping a row torn by a crash"""
+    with open(path, 'rb+') as f:
+        end = f.seek(0, os.SEEK_END)
+        while end > 0:
+            start = max(end - 4096, 0)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b'\n')
+            if newline >= 0:
+                f.truncate(start + newline + 1)
+                return
+            end = start
+        f.truncate(0)
+
+
+class StreamingWriter:
+    def __init__(self, basename: str, fieldnames: list, output_dir: Path = OUTPUT_DIR,
+                 parquet: bool = False, parquet_batch: int = 500, resume: bool = False,
+                 on_existing=None):
+        """
+        With resume=True, existing .part files are reopened for appending.
+        Their rows are counted and passed to on_existing(row) so the caller
+        can rebuild its dedupe state.
+        """
+        if parquet and pa is None:
+            raise RuntimeError("Parquet output needs pyarrow: pip install pyarrow")
+
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(exist_ok=True)
+        self.fieldnames = fieldnames
+        self.count = 0
+
+        self.paths = [self.output_dir / f"{basename}.csv", self.output_dir / f"{basename}.jsonl"]
+        csv_part, json_part = self._part(self.paths[0]), self._part(self.paths[1])
+        resume = resume and csv_part.exists() and json_part.exists()
+
+        self.parquet_writer = None
+        self.parquet_rows = []
+        self.parquet_batch = parquet_batch
+        if parquet:
+            # Parquet can't be appended to, so a resumed run rebuilds it from the CSV
+            self.paths.append(self.output_dir / f"{basename}.parquet")
+            schema = pa.schema([(f, pa.string()) for f in fieldnames])
+            self.parquet_writer = pq.ParquetWriter(str(self._part(self.paths[2])), schema)
+
+        if resume:
+            _truncate_partial_line(csv_part)
+            _truncate_partial_line(json_part)
+            with open(csv_part, newline='', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    self.count += 1
+                    if on_existing:
+                        on_existing(row)
+                    if self.parquet_writer:
+                        self._add_parquet_row(row)
+
+        self.csv_file = open(csv_part, 'a' if resume else 'w', newline='', encoding='utf-8')
+        self.csv_writer = csv.DictWriter(self.csv_file, fieldnames=fieldnames, extrasaction='ignore')
+        if not resume or csv_part.stat().st_size == 0:
+            self.csv_writer.writeheader()
+        self.json_file = open(json_part, 'a' if resume else 'w', encoding='utf-8')
+
+    @staticmethod
+    def _part(path: Path) -> Path:
+        return path.with_name(path.name + '.part')
+
+    def write(self, record: dict) -> None:
+        """Append one record to every output and flush it to disk"""
+        self.csv_writer.writerow(record)
+        self.json_file.write(json.dumps(record, default=str) + '\n')
+        self.csv_file.flush()
+        self.json_file.flush()
+
+        if self.parquet_writer:
+            self._add_parquet_row(record)
+
+        self.count += 1
+
+    def _add_parquet_row(self, record: dict) -> None:
+        self.parquet_rows.append(record)
+        if len(self.parquet_rows) >= self.parquet_batch:
+            self._flush_parquet()
+
+    def _flush_parquet(self) -> None:
+        if not self.parquet_rows:
+            return
+        columns = {
+            f: [None if r.get(f) is None else str(r.get(f)) for r in self.parquet_rows]
+            for f in self.fieldnames
+        }
+        self.parquet_writer.write_table(pa.table(columns, schema=self.parquet_writer.schema))
+        self.parquet_rows = []
+
+    def close(self) -> None:
+        """Close the .part files without publishing them"""
+        self.csv_file.close()
+        self.json_file.close()
+        if self.parquet_writer:
+            self._flush_parquet()
+            self.parquet_writer.close()
+            self.parquet_writer = None
+
+    def finalize(self) -> list:
+        """Close and atomically rename every .part file into place (nothing is kept if empty)"""
+        self.close()
+        if not self.count:
+            for path in self.paths:
+                self._part(path).unlink()
+            return []
+        for path in self.paths:
+            os.replace(self._part(path), path)
+        return self.paths
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.finalize()
+        else:
+            self.close()
+        return False
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Quota-aware request planning for scraper.py.
+
+Neighbouring cities' search circles overlap heavily (a 25 mile radius
+around Jacksonville covers Orange Park, Atlantic Beach, ...), and a Text
+Search for a city inside an area already searched mostly returns places
+already found. SearchPlanner estimates how much of each city's circle is
+covered by the circles searched before it and, when asked to (--overlap),
+skips the city once the covered share reaches a threshold. Text Search
+returns at most 60 places, so only searches that came back under that cap
+count as covering anything.
+
+Budget counts paid Google calls by endpoint and stops the run once a
+request or dollar cap is reached; cached responses are refunded.
+DetailsCache keeps each place_id's Place Details answer, including
+"no phone", so a place is detailed at most once per TTL across cities and
+runs.
+
+Usage:
+    python places_planner.py --file cities.txt --radius 25
+    python places_planner.py --file cities.txt --overlap 0.95 --max-pages 2
+"""
+
+import argparse
+import json
+import math
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from geocode_cache import GeocodeCache
+
+DEFAULT_CACHE_PATH = Path(__file__).parent / 'cache' / 'place_details.sqlite'
+
+# USD per call (see API Costs in the README)
+PRICES = {
+    'textsearch': 0.032,
+    'nearbysearch': 0.032,
+    'details': 0.017,
+    'geocode': 0.005,
+}
+
+RESULTS_PER_PAGE = 20
+MILES_PER_DEGREE_LAT = 69.0
+
+# Equal-area sample points in a unit circle, used to estimate coverage
+SAMPLE_RINGS = 8
+SAMPLE_SPOKES = 24
+UNIT_SAMPLES = [(0.0, 0.0)] + [
+    (math.sqrt((ring + 0.5) / SAMPLE_RINGS) * math.cos(2 * math.pi * (spoke + 0.5 * ring) / SAMPLE_SPOKES),
+     math.sqrt((ring + 0.5) / SAMPLE_RINGS) * math.sin(2 * math.pi * (spoke + 0.5 * ring) / SAMPLE_SPOKES))
+    for ring in range(SAMPLE_RINGS) for spoke in range(SAMPLE_SPOKES)
+]
+
+
+class BudgetExhausted(Exception):
+    """The run's request or cost cap was reached; the call was not made"""
+
+
+class Budget:
+    """Thread-safe count of paid API calls against optional request/USD caps"""
+
+    def __init__(self, max_requests: int = None, max_cost: float = None, prices: dict = None):
+        self.max_requests = max_requests
+        self.max_cost = max_cost
+        self.prices = prices or PRICES
+        self.calls = {endpoint: 0 for endpoint in self.prices}
+        self.lock = threading.Lock()
+
+    @property
+    def requests(self) -> int:
+        return sum(self.calls.values())
+
+    @property
+    def cost(self) -> float:
+        return sum(self.prices[e] * n for e, n in self.calls.items())
+
+    def spend(self, endpoint: str) -> None:
+        """Reserve one call, or raise BudgetExhausted if it would go over a cap"""
+        price = self.prices.get(endpoint, 0.0)
+        with self.lock:
+            if self.max_requests is not None and self.requests + 1 > self.max_requests:
+                raise BudgetExhausted(f"request budget of {self.max_requests} reached")
+            if self.max_cost is not None and self.cost + price > self.max_cost + 1e-9:
+                raise BudgetExhausted(f"cost budget of ${self.max_cost:.2f} reached")
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+
+    def refund(self, endpoint: str) -> None:
+        """Give back a reserved call that was answered from a cache"""
+        with self.lock:
+            self.calls[endpoint] -= 1
+
+    def summary(self) -> str:
+        calls = ', '.join(f"{n} {e}" for e, n in self.calls.items() if n)
+        caps = [f"{self.max_requests} requests" if self.max_requests is not None else '',
+                f"${self.max_cost:.2f}" if self.max_cost is not None else '']
+        caps = ' / '.join(c for c in caps if c)
+        return (f"API spend: {self.requests} paid calls ({calls or 'none'}), ~${self.cost:.2f}"
+                + (f" of {caps}" if caps else ''))
+
+
+class DetailsCache:
+    """Place Details results by place_id in SQLite; an empty result is cached too"""
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH, ttl: float = 30 * 24 * 3600):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.hits = 0
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS details (
+                place_id TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        ''')
+        self.db.commit()
+
+    def get(self, place_id: str):
+        """Cached details dict, or None if unknown/expired"""
+        with self.lock:
+            row = self.db.execute('SELECT result, fetched_at FROM details WHERE place_id = ?',
+                                  (place_id,)).fetchone()
+            if row is None or time.time() - row[1] > self.ttl:
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, place_id: str, result: dict) -> None:
+        with self.lock:
+            self.db.execute('INSERT OR REPLACE INTO details VALUES (?, ?, ?)',
+                            (place_id, json.dumps(result), time.time()))
+            self.db.commit()
+
+
+def coverage(center: tuple, radius: float, circles: list) -> float:
+    """
+    Share of the circle (center, radius in miles) inside the union of
+    `circles` [(lat, lng, radius), ...], estimated from fixed sample points
+    in a local flat projection (accurate to well under a percent at city scale).
+    """
+    if not circles:
+        return 0.0
+    lat0, lng0 = center
+    miles_per_degree_lng = MILES_PER_DEGREE_LAT * math.cos(math.radians(lat0))
+    # Circles in miles relative to the center; ones that can't touch it are dropped
+    nearby = []
+    for lat, lng, r in circles:
+        dx = (lng - lng0) * miles_per_degree_lng
+        dy = (lat - lat0) * MILES_PER_DEGREE_LAT
+        if math.hypot(dx, dy) < r + radius:
+            nearby.append((dx, dy, r * r))
+    if not nearby:
+        return 0.0
+    inside = sum(1 for ux, uy in UNIT_SAMPLES
+                 if any((ux * radius - dx) ** 2 + (uy * radius - dy) ** 2 <= r2 for dx, dy, r2 in nearby))
+    return inside / len(UNIT_SAMPLES)
+
+
+class SearchPlanner:
+    """
+    Decides city by city, in run order, whether a Text Search is needed.
+
+    A city is skipped when `overlap` of its circle is covered by cities
+    already searched whose search came back under the result cap (pages x
+    20, at most 60). A search that hit the cap may have missed places, so
+    its circle covers nothing. Report each search's result count with
+    searched(); until then a city only shows as covered, it isn't skipped.
+    overlap=None searches every city.
+    """
+
+    def __init__(self, locate, radius: float, overlap: float = None, max_pages: int = 3):
+        self.locate = locate
+        self.radius = radius
+        self.overlap = overlap
+        self.cap = max_pages * RESULTS_PER_PAGE
+        self.complete = []  # Searched cities that returned fewer results than the cap
+        self.pending = []   # Searched cities whose result count isn't known yet
+
+    def decide(self, city: str) -> dict:
+        """Plan entry for the next city: {'city', 'coords', 'covered', 'search', 'covered_by'}"""
+        coords = self.locate(city)
+        entry = {'city': city, 'coords': coords, 'covered': 0.0, 'search': True, 'covered_by': []}
+        if coords and self.overlap is not None:
+            searched = [p for p in self.complete + self.pending if p['coords']]
+            entry['covered'] = coverage(coords, self.radius, [(*p['coords'], self.radius) for p in searched])
+            if entry['covered'] >= self.overlap:
+                complete = [p for p in self.complete if p['coords']]
+                entry['search'] = coverage(coords, self.radius,
+                                           [(*p['coords'], self.radius) for p in complete]) < self.overlap
+                # The cities that cover most of it, for the plan printout
+                shares = [(coverage(coords, self.radius, [(*p['coords'], self.radius)]), p['city'])
+                          for p in (searched if entry['search'] else complete)]
+                entry['covered_by'] = [c for share, c in sorted(shares, reverse=True)[:2] if share > 0]
+        if entry['search']:
+            self.pending.append(entry)
+        return entry
+
+    def searched(self, entry: dict, results: int) -> None:
+        """Record how many places a city's Text Search returned over all its pages"""
+        self.pending = [p for p in self.pending if p is not entry]
+        if results < self.cap:
+            self.complete.append(entry)
+
+
+def plan_searches(cities: list, locate, radius: float, overlap: float = None, max_pages: int = 3) -> list:
+    """
+    Plan for all cities up front, before any result counts are known (the
+    dry run). `locate(city)` returns (lat, lng) or None; cities that can't
+    be located are searched but don't cover anything. Since every search
+    might hit the cap, no city is skipped here; a covered city's entry
+    names the cities that would let it be skipped.
+    """
+    planner = SearchPlanner(locate, radius, overlap, max_pages)
+    return [planner.decide(city) for city in cities]
+
+
+def estimate(plan: list, max_pages: int = 3, prices: dict = None) -> dict:
+    """
+    Upper-bound call counts and cost for a plan: every searched city uses
+    all its pages and every result needs Details. Cities without cached
+    coordinates add a geocode call.
+    """
+    prices = prices or PRICES
+    searched = [p for p in plan if p['search']]
+    calls = {
+        'geocode': sum(1 for p in searched if not p['coords']),
+        'textsearch': len(searched) * max_pages,
+        'details': len(searched) * max_pages * RESULTS_PER_PAGE,
+    }
+    calls['cost'] = sum(prices[e] * n for e, n in calls.items())
+    return calls
+
+
+def print_plan(plan: list, radius: float, max_pages: int, prices: dict = None) -> dict:
+    print(f"{'city':<28} {'covered':>8}  plan")
+    for p in plan:
+        if not p['coords']:
+            action = 'search (not geocoded yet)'
+        elif p['covered_by']:
+            action = (f"skip if {', '.join(p['covered_by'])} stay under "
+                      f"{max_pages * RESULTS_PER_PAGE} results")
+        else:
+            action = 'search'
+        covered = f"{p['covered']:.0%}" if p['coords'] else '?'
+        print(f"  {p['city'][:26]:<26} {covered:>8}  {action}")
+
+    calls = estimate(plan, max_pages, prices)
+    searched = sum(1 for p in plan if p['search'])
+    maybe = sum(1 for p in plan if p['covered_by'])
+    print(f"\n{searched} of {len(plan)} cities searched ({radius} mile radius, up to {max_pages} pages)"
+          + (f", {maybe} of them skipped if the searches covering them come back under the cap"
+             if maybe else ''))
+    print(f"At most {calls['textsearch']} text searches, {calls['details']} Place Details "
+          f"and {calls['geocode']} geocodes: ~${calls['cost']:.2f} before cache hits")
+    return calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Plan a Google Places sweep and estimate its cost')
+    parser.add_argument('cities', nargs='*', help='Cities to plan (or use --file)')
+    parser.add_argument('--file', '-f', help='File with list of cities (one per line)')
+    parser.add_argument('--radius', '-r', type=int, default=25, help='Search radius in miles (default: 25)')
+    parser.add_argument('--overlap', type=float,
+                        help='Skip a city once this share of its circle is covered by searches that '
+                             'came back under the result cap, e.g. 0.95 (default: search every city)')
+    parser.add_argument('--max-pages', type=int, default=3, help='Text Search pages per city (default: 3)')
+
+    args = parser.parse_args()
+
+    cities = list(args.cities)
+    if args.file:
+        with open(args.file) as f:
+            cities += [line.strip() for line in f if line.strip()]
+    if not cities:
+        parser.error('give cities or --file')
+
+    geocodes = GeocodeCache()
+    plan = plan_searches(cities, geocodes.get, args.radius, args.overlap, args.max_pages)
+    print_plan(plan, args.radius, args.max_pages)
+
+
+if __name__ == '__main__':
+    main()
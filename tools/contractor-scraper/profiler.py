@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Run profiler for the contractor scrapers.
+
+Records a timed span for every request and every pipeline stage - polite
+waits, deliberate sleeps, parsing, dedupe, store upserts and output writes -
+from all worker threads. The end-of-run report breaks request time down
+per source (p50/p95 total, server wait vs download, bytes) and shows each
+stage's share of the recorded time. The spans can also be written as a
+Chrome trace (open in chrome://tracing or https://ui.perfetto.dev).
+
+requests doesn't expose DNS and connect time separately, so a request's
+"wait" is everything up to the response headers (connect + server) and
+"download" is reading the body.
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+STAGE_ORDER = ['request', 'politeness', 'sleep', 'parse', 'dedupe', 'store', 'write']
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+class RunProfiler:
+    """Thread-safe span recorder; a disabled profiler records nothing"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.events = []
+        self.lock = threading.Lock()
+
+    def record(self, stage: str, label: str, start: float, duration: float, args: dict = None) -> None:
+        if not self.enabled:
+            return
+        event = (stage, label, start, duration, threading.get_ident(), args or {})
+        with self.lock:
+            self.events.append(event)
+
+    @contextmanager
+    def span(self, stage: str, label: str = '', **args):
+        """Time the block as one `stage` span; the yielded dict can collect extra args"""
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            self.record(stage, label, start, time.perf_counter() - start, args)
+
+    def sleep(self, seconds: float, label: str = '') -> None:
+        """time.sleep that shows up as a sleep span"""
+        with self.span('sleep', label):
+            time.sleep(seconds)
+
+    def record_request(self, label: str, start: float, duration: float, response) -> None:
+        """Record one HTTP exchange, splitting time-to-headers from body download"""
+        if not self.enabled:
+            return
+        args = {'status': None, 'bytes': 0, 'wait': duration, 'cached': False}
+        if response is not None:
+            wait = response.elapsed.total_seconds() if response.elapsed else 0.0
+            body = response.__dict__.get('_content')
+            args.update({
+                'status': response.status_code,
+                'bytes': len(body) if isinstance(body, bytes) else int(
+                    response.headers.get('Content-Length') or 0),
+                'wait': min(wait, duration),
+                'cached': getattr(response, 'from_cache', False),
+            })
+        self.record('request', label, start, duration, args)
+
+    def report(self) -> str:
+        wall = time.perf_counter() - self.started
+        with self.lock:
+            events = list(self.events)
+
+        totals, counts = {}, {}
+        for stage, _, _, duration, _, _ in events:
+            totals[stage] = totals.get(stage, 0.0) + duration
+            counts[stage] = counts.get(stage, 0) + 1
+        recorded = sum(totals.values()) or 1.0
+
+        lines = [f"Profile: {wall:.1f}s wall, {len(events)} spans "
+                 f"(stage time is summed across threads)",
+                 f"  {'stage':<12} {'count':>7} {'seconds':>9} {'share':>7}"]
+        for stage in sorted(totals, key=lambda s: STAGE_ORDER.index(s) if s in STAGE_ORDER else 99):
+            lines.append(f"  {stage:<12} {counts[stage]:>7} {totals[stage]:>9.2f} "
+                         f"{totals[stage] / recorded:>6.0%}")
+
+        requests_by_label = {}
+        for stage, label, _, duration, _, args in events:
+            if stage == 'request':
+                requests_by_label.setdefault(label, []).append((duration, args))
+        if requests_by_label:
+            lines.append(f"  {'source':<22} {'requests':>8} {'p50 ms':>7} {'p95 ms':>7} "
+                         f"{'wait p50':>8} {'dl p50':>7} {'KB/req':>7} {'cached':>6}")
+            for label, items in sorted(requests_by_label.items()):
+                totals_ms = [d * 1000 for d, _ in items]
+                waits = [a['wait'] * 1000 for _, a in items]
+                downloads = [(d - a['wait']) * 1000 for d, a in items]
+                kb = sum(a['bytes'] for _, a in items) / len(items) / 1024
+                cached = sum(1 for _, a in items if a['cached'])
+                lines.append(f"  {label[:22]:<22} {len(items):>8} {percentile(totals_ms, 50):>7.0f} "
+                             f"{percentile(totals_ms, 95):>7.0f} {percentile(waits, 50):>8.0f} "
+                             f"{percentile(downloads, 50):>7.0f} {kb:>7.1f} {cached:>6}")
+        return '\n'.join(lines)
+
+    def export_trace(self, path: Path) -> Path:
+        """Write the spans in Chrome's trace event format"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self.lock:
+            events = list(self.events)
+
+        threads = {}
+        trace = []
+        for stage, label, start, duration, thread, args in events:
+            tid = threads.setdefault(thread, len(threads) + 1)
+            trace.append({
+                'name': f"{stage} {label}".strip(),
+                'cat': stage,
+                'ph': 'X',
+                'ts': round((start - self.started) * 1e6),
+                'dur': round(duration * 1e6),
+                'pid': 1,
+                'tid': tid,
+                'args': args,
+            })
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f)
+        return path
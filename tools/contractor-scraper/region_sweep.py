@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Region sweep: complete Google Places coverage of an area by tiling.
+
+Instead of a list of cities with a fixed radius, the region - a bounding
+box, a GeoJSON polygon or a list of counties - is cut into a grid of
+square tiles. Each tile is searched with a Nearby Search circle just
+large enough to cover it. A tile that comes back with the full 60
+results probably has more, so it is split into four quadrants and each
+is searched in turn, down to --min-tile-miles. Sparse areas cost one
+search per tile and dense downtowns get as many as they need.
+
+Tiles run concurrently. Only places inside the tile (and the region) are
+kept, and a place_id is detailed once no matter how many tiles find it.
+
+Usage:
+    python region_sweep.py "sod installation" --bbox 29.9,-81.9,30.6,-81.3
+    python region_sweep.py "sod installation" --county "Duval County, FL" --county "St Johns County, FL"
+    python region_sweep.py "landscaping" --polygon metro.geojson --tile-miles 8 --dry-run
+"""
+
+import argparse
+import json
+import math
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+import requests
+
+from http_cache import ResponseCache
+from output_writer import StreamingWriter
+from places_planner import PRICES, Budget, BudgetExhausted, DetailsCache
+from scraper import FIELDNAMES, ContractorScraper, get_api_key
+from store import DEFAULT_STORE_PATH, ContractorStore
+
+MILES_PER_DEGREE_LAT = 69.0
+METERS_PER_MILE = 1609
+# Nearby Search stops at 3 pages of 20
+RESULT_CAP = 60
+# Nearby Search's largest radius; a tile's circle must fit in it
+MAX_RADIUS_METERS = 50000
+
+
+def miles_per_degree_lng(lat: float) -> float:
+    return MILES_PER_DEGREE_LAT * math.cos(math.radians(lat))
+
+
+def bbox_polygon(south: float, west: float, north: float, east: float) -> list:
+    return [(south, west), (south, east), (north, east), (north, west)]
+
+
+def load_polygons(path: str) -> list:
+    """Outer rings of every Polygon/MultiPolygon in a GeoJSON file, as [(lat, lng), ...]"""
+    with open(path) as f:
+        data = json.load(f)
+
+    geometries = []
+    if data.get('type') == 'FeatureCollection':
+        geometries = [feature['geometry'] for feature in data['features']]
+    elif data.get('type') == 'Feature':
+        geometries = [data['geometry']]
+    else:
+        geometries = [data]
+
+    polygons = []
+    for geometry in geometries:
+        if geometry['type'] == 'Polygon':
+            rings = [geometry['coordinates'][0]]
+        elif geometry['type'] == 'MultiPolygon':
+            rings = [polygon[0] for polygon in geometry['coordinates']]
+        else:
+            continue
+        # GeoJSON is (lng, lat); holes are ignored
+        polygons.extend([(lat, lng) for lng, lat, *_ in ring] for ring in rings)
+    return polygons
+
+
+def county_polygon(scraper: ContractorScraper, county: str):
+    """A county's bounding box from the Geocoding API, as a polygon (None if not found)"""
+    try:
+        data = scraper.api_get('https://maps.googleapis.com/maps/api/geocode/json', 'geocode',
+                               params={'address': county, 'key': scraper.api_key}).json()
+    except (requests.RequestException, ValueError) as e:
+        print(f"  Geocode failed for {county}: {e}")
+        return None
+    if data['status'] != 'OK':
+        return None
+    geometry = data['results'][0]['geometry']
+    box = geometry.get('bounds') or geometry['viewport']
+    return bbox_polygon(box['southwest']['lat'], box['southwest']['lng'],
+                        box['northeast']['lat'], box['northeast']['lng'])
+
+
+def point_in_polygon(lat: float, lng: float, polygon: list) -> bool:
+    """Ray casting"""
+    inside = False
+    j = len(polygon) - 1
+    for i in range(len(polygon)):
+        (lat_i, lng_i), (lat_j, lng_j) = polygon[i], polygon[j]
+        if (lat_i > lat) != (lat_j > lat) and lng < (lng_j - lng_i) * (lat - lat_i) / (lat_j - lat_i) + lng_i:
+            inside = not inside
+        j = i
+    return inside
+
+
+def _segments_cross(a, b, c, d) -> bool:
+    def orientation(p, q, r):
+        return (q[0] - p[0]) * (r[1] - p[1]) - (q[1] - p[1]) * (r[0] - p[0])
+    return (orientation(a, b, c) * orientation(a, b, d) < 0 and
+            orientation(c, d, a) * orientation(c, d, b) < 0)
+
+
+class Tile:
+    """An axis-aligned lat/lng rectangle searched with its circumscribed circle"""
+
+    def __init__(self, south: float, west: float, north: float, east: float, depth: int = 0):
+        self.south, self.west, self.north, self.east = south, west, north, east
+        self.depth = depth
+
+    @property
+    def center(self) -> tuple:
+        return (self.south + self.north) / 2, (self.west + self.east) / 2
+
+    @property
+    def height_miles(self) -> float:
+        return (self.north - self.south) * MILES_PER_DEGREE_LAT
+
+    @property
+    def radius_meters(self) -> int:
+        width = (self.east - self.west) * miles_per_degree_lng(self.center[0])
+        return math.ceil(math.hypot(width, self.height_miles) / 2 * METERS_PER_MILE)
+
+    def contains(self, lat: float, lng: float) -> bool:
+        # Half-open, so a place on a shared edge belongs to exactly one tile
+        return self.south <= lat < self.north and self.west <= lng < self.east
+
+    def split(self) -> list:
+        lat, lng = self.center
+        return [Tile(s, w, n, e, self.depth + 1) for s, w, n, e in (
+            (self.south, self.west, lat, lng), (self.south, lng, lat, self.east),
+            (lat, self.west, self.north, lng), (lat, lng, self.north, self.east))]
+
+    def intersects(self, polygon: list) -> bool:
+        corners = bbox_polygon(self.south, self.west, self.north, self.east)
+        if any(point_in_polygon(lat, lng, polygon) for lat, lng in corners):
+            return True
+        if any(self.contains(lat, lng) for lat, lng in polygon):
+            return True
+        edges = list(zip(corners, corners[1:] + corners[:1]))
+        return any(_segments_cross(a, b, c, d) for a, b in edges
+                   for c, d in zip(polygon, polygon[1:] + polygon[:1]))
+
+    def __repr__(self):
+        return f"Tile({self.south:.4f},{self.west:.4f},{self.north:.4f},{self.east:.4f} depth {self.depth})"
+
+
+def grid_tiles(polygons: list, tile_miles: float) -> list:
+    """Square tiles of about tile_miles over the polygons' bounding box, keeping those that touch a polygon"""
+    points = [point for polygon in polygons for point in polygon]
+    south, north = min(p[0] for p in points), max(p[0] for p in points)
+    west, east = min(p[1] for p in points), max(p[1] for p in points)
+
+    lat_step = tile_miles / MILES_PER_DEGREE_LAT
+    lng_step = tile_miles / miles_per_degree_lng((south + north) / 2)
+    rows = max(1, math.ceil((north - south) / lat_step))
+    cols = max(1, math.ceil((east - west) / lng_step))
+
+    tiles = []
+    for row in range(rows):
+        for col in range(cols):
+            tile = Tile(south + row * lat_step, west + col * lng_step,
+                        south + (row + 1) * lat_step, west + (col + 1) * lng_step)
+            if any(tile.intersects(polygon) for polygon in polygons):
+                tiles.append(tile)
+    return tiles
+
+
+class RegionSweep:
+    """Runs tiles concurrently, splitting saturated ones, with dedupe by place_id"""
+
+    def __init__(self, scraper: ContractorScraper, query: str, polygons: list,
+                 min_tile_miles: float = 1.0, workers: int = 4):
+        self.scraper = scraper
+        self.query = query
+        self.polygons = polygons
+        self.min_tile_miles = min_tile_miles
+        self.workers = workers
+        self.seen = set()
+        self.lock = threading.Lock()
+        self.stats = {'tiles': 0, 'split': 0, 'saturated': 0, 'places': 0, 'depth': 0}
+
+    def in_region(self, lat: float, lng: float) -> bool:
+        return any(point_in_polygon(lat, lng, polygon) for polygon in self.polygons)
+
+    def claim(self, places: list) -> list:
+        """The places no other tile has claimed yet"""
+        with self.lock:
+            new = [p for p in places if p.get('place_id') not in self.seen]
+            self.seen.update(p.get('place_id') for p in new)
+        return new
+
+    def run_tile(self, tile: Tile) -> tuple:
+        """Search one tile; returns (tile, contractors, child tiles to search)"""
+        lat, lng = tile.center
+        places = self.scraper.search_area(self.query, lat, lng, tile.radius_meters)
+
+        children = []
+        if len(places) >= RESULT_CAP:
+            if tile.height_miles / 2 >= self.min_tile_miles:
+                children = [t for t in tile.split()
+                            if any(t.intersects(polygon) for polygon in self.polygons)]
+            else:
+                with self.lock:
+                    self.stats['saturated'] += 1
+
+        inside = []
+        for place in places:
+            location = place.get('geometry', {}).get('location')
+            if location is None or (tile.contains(location['lat'], location['lng']) and
+                                    self.in_region(location['lat'], location['lng'])):
+                inside.append(place)
+
+        new = self.claim(inside)
+        # Details only for places new to the sweep; they're the paid part
+        contractors = self.scraper.extract_all(new) if new else []
+        with self.lock:
+            self.stats['tiles'] += 1
+            self.stats['places'] += len(new)
+            self.stats['split'] += bool(children)
+            self.stats['depth'] = max(self.stats['depth'], tile.depth)
+        return tile, contractors, children
+
+    def run(self, tiles: list):
+        """Yield (tile, contractors) as tiles finish; children of split tiles are queued as they appear"""
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = {pool.submit(self.run_tile, tile) for tile in tiles}
+            try:
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        tile, contractors, children = future.result()
+                        pending |= {pool.submit(self.run_tile, child) for child in children}
+                        yield tile, contractors
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def summary(self) -> str:
+        s = self.stats
+        line = (f"Tiles: {s['tiles']} searched, {s['split']} split (max depth {s['depth']}), "
+                f"{s['places']} unique places")
+        if s['saturated']:
+            line += f"; {s['saturated']} tiles still at {RESULT_CAP} results at --min-tile-miles"
+        return line
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sweep a whole region with tiled Google Places searches')
+    parser.add_argument('query', nargs='?', default='sod installation',
+                        help='Search keyword (e.g., "sod installation", "landscaping")')
+    region = parser.add_argument_group('region (combine as needed)')
+    region.add_argument('--bbox', metavar='S,W,N,E', action='append', default=[],
+                        help='Bounding box as south,west,north,east in degrees')
+    region.add_argument('--polygon', metavar='GEOJSON', action='append', default=[],
+                        help='GeoJSON file with Polygon/MultiPolygon features')
+    region.add_argument('--county', action='append', default=[],
+                        help='County to cover by its bounding box (geocoded, e.g. "Duval County, FL")')
+    parser.add_argument('--tile-miles', type=float, default=10,
+                        help='Starting tile size in miles (default: 10)')
+    parser.add_argument('--min-tile-miles', type=float, default=1,
+                        help="Don't split tiles smaller than this (default: 1)")
+    parser.add_argument('--tile-workers', type=int, default=4,
+                        help='Tiles searched at once (default: 4)')
+    parser.add_argument('--workers', '-w', type=int, default=8,
+                        help='Concurrent Place Details / website lookups per tile (default: 8)')
+    parser.add_argument('--output', '-o', default='contractors_region',
+                        help='Output filename prefix (default: contractors_region)')
+    parser.add_argument('--cache-ttl', type=float, default=12,
+                        help='Hours before a cached response is revalidated (default: 12)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always call the API, bypassing the response and details caches')
+    parser.add_argument('--store', default=str(DEFAULT_STORE_PATH),
+                        help='SQLite contractor store (places found there skip Details)')
+    parser.add_argument('--no-store', action='store_true',
+                        help="Don't read or update the contractor store")
+    parser.add_argument('--no-emails', action='store_true',
+                        help="Don't crawl contractor websites for emails")
+    parser.add_argument('--parquet', action='store_true',
+                        help='Also write a Parquet file (needs pyarrow)')
+    parser.add_argument('--budget-requests', type=int,
+                        help='Stop after this many paid API calls (cached responses are free)')
+    parser.add_argument('--budget-usd', type=float,
+                        help='Stop once the estimated API cost reaches this many dollars')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Print the starting tiles and a cost estimate, then exit '
+                             '(--county regions are still geocoded)')
+
+    args = parser.parse_args()
+
+    if not (args.bbox or args.polygon or args.county):
+        parser.error('give a region: --bbox, --polygon and/or --county')
+    max_tile = MAX_RADIUS_METERS * 2 / math.sqrt(2) / METERS_PER_MILE
+    if not 0 < args.tile_miles <= max_tile:
+        parser.error(f'--tile-miles must be between 0 and {max_tile:.0f} (the Nearby Search radius limit)')
+
+    api_key = get_api_key() or ('dry-run' if args.dry_run and not args.county else None)
+    if not api_key:
+        print("ERROR: Google Places API key not found! See scraper.py for setup.")
+        sys.exit(1)
+
+    cache = None if args.no_cache else ResponseCache(ttl=args.cache_ttl * 3600)
+    store = None if args.no_store or args.dry_run else ContractorStore(args.store)
+    budget = Budget(args.budget_requests, args.budget_usd)
+    scraper = ContractorScraper(api_key, cache=cache, workers=args.workers, store=store,
+                                email_workers=0 if args.no_emails else args.workers, budget=budget,
+                                details_cache=None if args.no_cache or args.dry_run else DetailsCache())
+    # Every tile worker runs its own Details pool
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=max(args.tile_workers * args.workers, 10))
+    scraper.session.mount('https://', adapter)
+    scraper.session.mount('http://', adapter)
+
+    polygons = []
+    for bbox in args.bbox:
+        try:
+            south, west, north, east = (float(x) for x in bbox.split(','))
+        except ValueError:
+            parser.error(f'--bbox {bbox!r} is not south,west,north,east')
+        polygons.append(bbox_polygon(south, west, north, east))
+    for path in args.polygon:
+        polygons.extend(load_polygons(path))
+    for county in args.county:
+        polygon = county_polygon(scraper, county)
+        if polygon:
+            polygons.append(polygon)
+        else:
+            print(f"  Could not geocode {county}, skipping it")
+    if not polygons:
+        print("Nothing to sweep")
+        sys.exit(1)
+
+    tiles = grid_tiles(polygons, args.tile_miles)
+    print(f"\nSearching for: {args.query}")
+    print(f"Region: {len(polygons)} areas, {len(tiles)} starting tiles of {args.tile_miles:g} miles")
+    if args.dry_run:
+        print(f"At least {len(tiles)} and at most {len(tiles) * 3} Nearby Searches before splitting "
+              f"(~${len(tiles) * PRICES['nearbysearch']:.2f}-${len(tiles) * 3 * PRICES['nearbysearch']:.2f}); "
+              f"each split adds 4 tiles, and every new place costs one Place Details "
+              f"(${PRICES['details']:.3f})")
+        return
+    print("-" * 50)
+
+    sweep = RegionSweep(scraper, args.query, polygons, args.min_tile_miles, args.tile_workers)
+    totals = {'new': 0, 'changed': 0, 'unchanged': 0}
+    seen_phones = set()
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    writer = StreamingWriter(f"{args.output}_{timestamp}", FIELDNAMES, parquet=args.parquet)
+
+    exhausted = None
+    try:
+        with writer:
+            for tile, contractors in sweep.run(tiles):
+                unique = [c for c in contractors if c['phone_clean'] not in seen_phones]
+                seen_phones.update(c['phone_clean'] for c in unique)
+                if store:
+                    for status in store.upsert_many(unique):
+                        totals[status] += 1
+                for c in unique:
+                    writer.write(c)
+                print(f"  {tile}: {len(contractors)} contractors ({writer.count} total)")
+    except BudgetExhausted as e:
+        exhausted = e
+        print(f"\nStopped: {e}. {writer.count} contractors so far, kept as .part files.")
+    except KeyboardInterrupt:
+        print(f"\nInterrupted after {writer.count} contractors.")
+        sys.exit(1)
+
+    print("\n" + "-" * 50)
+    print(sweep.summary())
+    if store:
+        print(f"Store: {totals['new']} new, {totals['changed']} changed, "
+              f"{scraper.reused} places reused without Details calls")
+    if scraper.details_cache:
+        print(f"Place Details: {scraper.details_cache.hits} answered from the details cache")
+    if cache:
+        print(cache.summary())
+    if scraper.emails:
+        print(scraper.emails.summary())
+    print(budget.summary())
+    print(scraper.client.summary())
+    if writer.count and not exhausted:
+        print(f"\nSaved {writer.count} contractors to: {', '.join(str(p) for p in writer.paths)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Record/replay of scraper HTTP traffic for offline runs and benchmarks.
+
+Recording: `--record fixtures/run.jsonl.gz` on either scraper appends every
+response it receives (status, headers, body) to a gzipped JSONL archive. The
+first line holds the query and cities, so the run can be repeated.
+
+Replaying: `python replay.py serve fixtures/run.jsonl.gz` starts a local
+HTTP server that answers from the archive, optionally with added latency
+and injected errors. `--replay http://127.0.0.1:8765` on either scraper then
+routes all of its requests to that server instead of the internet.
+
+Usage:
+    python scraper_free.py --file cities.txt --record fixtures/free.jsonl.gz
+    python replay.py info fixtures/free.jsonl.gz
+    python replay.py serve fixtures/free.jsonl.gz --port 8765 --latency 0.2 --error-rate 0.05
+    python scraper_free.py --file cities.txt --replay http://127.0.0.1:8765
+"""
+
+import argparse
+import base64
+import gzip
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import requests
+
+from http_cache import normalize_url
+
+# Hop-by-hop or encoding headers that no longer describe the stored (decoded) body
+DROPPED_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length', 'connection'}
+
+
+class ArchiveRecorder:
+    """Session response hook that appends every response to a fixture archive"""
+
+    def __init__(self, path: Path, meta: dict = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = gzip.open(self.path, 'wt', encoding='utf-8')
+        self.lock = threading.Lock()
+        self.count = 0
+        self._write({'type': 'meta', **(meta or {})})
+
+    def _write(self, entry: dict) -> None:
+        with self.lock:
+            self.file.write(json.dumps(entry) + '\n')
+
+    def attach(self, session: requests.Session) -> None:
+        session.hooks['response'].append(self.hook)
+
+    def hook(self, response, *args, **kwargs):
+        headers = {k.lower(): v for k, v in response.headers.items() if k.lower() not in DROPPED_HEADERS}
+        self._write({
+            'type': 'response',
+            'url': normalize_url(response.request.url),
+            'status': response.status_code,
+            'headers': headers,
+            'body': base64.b64encode(response.content).decode('ascii'),
+        })
+        self.count += 1
+        return response
+
+    def close(self) -> None:
+        with self.lock:
+            self.file.close()
+
+
+def load_archive(path: Path):
+    """Return (meta, {normalized url: entry}); the first response for a URL wins"""
+    meta, entries = {}, {}
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            entry = json.loads(line)
+            if entry['type'] == 'meta':
+                meta = entry
+            else:
+                entries.setdefault(entry['url'], entry)
+    return meta, entries
+
+
+class ReplayAdapter(requests.adapters.HTTPAdapter):
+    """
+    Transport adapter that sends every request to a replay server instead,
+    as http://server/<scheme>/<host><path>?<query>.
+    """
+
+    def __init__(self, server_url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.server_url = server_url.rstrip('/')
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        replayed = request.copy()
+        replayed.url = f"{self.server_url}/{parts.scheme}/{parts.netloc}{parts.path or '/'}"
+        if parts.query:
+            replayed.url += '?' + parts.query
+        response = super().send(replayed, **kwargs)
+        # Callers (and a recorder) see the response as coming from the original URL
+        response.request = request
+        response.url = request.url
+        return response
+
+
+def route_to_replay(session: requests.Session, server_url: str, pool_maxsize: int = 10) -> None:
+    """Point every http(s) request made through `session` at a replay server"""
+    adapter = ReplayAdapter(server_url, pool_maxsize=pool_maxsize)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, archive: Path, port: int = 0, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, error_status: int = 503, seed: int = None):
+        super().__init__(('127.0.0.1', port), ReplayHandler)
+        self.meta, self.entries = load_archive(archive)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.stats = {'served': 0, 'missing': 0, 'errors': 0}
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def count(self, stat: str) -> None:
+        with self.lock:
+            self.stats[stat] += 1
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            delay = server.latency + server.random.uniform(0, server.jitter)
+            inject_error = server.random.random() < server.error_rate
+        if delay:
+            time.sleep(delay)
+
+        if inject_error:
+            server.count('errors')
+            self._send(server.error_status, {'retry-after': '0'}, b'injected error')
+            return
+
+        scheme, _, rest = self.path.lstrip('/').partition('/')
+        entry = server.entries.get(normalize_url(f"{scheme}://{rest}"))
+        if entry is None:
+            server.count('missing')
+            self._send(404, {'content-type': 'text/plain'}, b'not in archive')
+            return
+
+        server.count('served')
+        self._send(entry['status'], entry['headers'], base64.b64decode(entry['body']))
+
+    def _send(self, status: int, headers: dict, body: bytes) -> None:
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect or serve recorded scraper traffic')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    info = sub.add_parser('info', help='Summarize an archive')
+    info.add_argument('archive')
+
+    serve = sub.add_parser('serve', help='Replay an archive over HTTP')
+    serve.add_argument('archive')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+    serve.add_argument('--jitter', type=float, default=0.0, help='Extra random latency, up to this many seconds')
+    serve.add_argument('--error-rate', type=float, default=0.0,
+                       help='Fraction of requests answered with --error-status instead')
+    serve.add_argument('--error-status', type=int, default=503)
+
+    args = parser.parse_args()
+
+    if args.command == 'info':
+        meta, entries = load_archive(args.archive)
+        print(f"Archive: {args.archive}")
+        print(f"Recorded by: {meta.get('scraper', '?')}  query: {meta.get('query', '?')!r}  "
+              f"cities: {len(meta.get('cities', []))}")
+        hosts = {}
+        for url in entries:
+            host = urlsplit(url).hostname
+            hosts[host] = hosts.get(host, 0) + 1
+        for host, count in sorted(hosts.items(), key=lambda x: -x[1]):
+            print(f"  {host:<40} {count:>5} responses")
+        return
+
+    server = ReplayServer(args.archive, port=args.port, latency=args.latency, jitter=args.jitter,
+                          error_rate=args.error_rate, error_status=args.error_status)
+    print(f"Replaying {len(server.entries)} responses on {server.url} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nServed {server.stats['served']}, missing {server.stats['missing']}, "
+              f"injected errors {server.stats['errors']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Retries, backoff and circuit breaking for the scrapers' HTTP calls.
+
+ResilientClient wraps a requests session. Every request gets a timeout;
+429 and 5xx responses and connection errors are retried with jittered
+exponential backoff, honouring Retry-After. A per-host circuit breaker
+counts consecutive failures (including 403 blocks) and, once tripped,
+fails that host's requests immediately instead of sending them, for the
+rest of the sweep or until its cooldown passes. Retry and breaker counts
+are kept per host and can be exported as JSON.
+"""
+
+import json
+import random
+import threading
+import time
+from contextlib import nullcontext
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import requests
+
+DEFAULT_TIMEOUT = 15
+
+
+class CircuitOpen(requests.RequestException):
+    """The host's breaker is open; the request was not sent"""
+
+
+class RetryPolicy:
+    def __init__(self, retries: int = 3, backoff: float = 1.0, max_backoff: float = 30.0,
+                 max_retry_after: float = 120.0, statuses=(429, 500, 502, 503, 504)):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.statuses = set(statuses)
+
+    def delay(self, attempt: int, response=None):
+        """
+        Seconds to wait before retry number `attempt` (1-based), or None to
+        give up because the server asked for a longer pause than we'll take.
+        """
+        retry_after = retry_after_seconds(response) if response is not None else None
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_retry_after else None
+        # Full jitter: spreads retries from many workers instead of synchronising them
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+
+def retry_after_seconds(response):
+    """Retry-After as seconds (it may be a number or an HTTP date), or None"""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """
+    Per-host breaker: `threshold` consecutive failures open it. With no
+    cooldown it stays open; otherwise one trial request is let through
+    after `cooldown` seconds and its outcome closes or re-opens it.
+    """
+
+    def __init__(self, threshold: int = 5, cooldown: float = None):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = {}
+        self.opened = {}
+        self.lock = threading.Lock()
+
+    def allow(self, host: str) -> bool:
+        with self.lock:
+            opened = self.opened.get(host)
+            if opened is None:
+                return True
+            if self.cooldown is not None and time.monotonic() - opened >= self.cooldown:
+                # Half-open: one trial; re-arm the cooldown for everyone else
+                self.opened[host] = time.monotonic()
+                return True
+            return False
+
+    def record(self, host: str, ok: bool) -> bool:
+        """Record an outcome. Returns True if this failure just opened the breaker."""
+        with self.lock:
+            if ok:
+                self.failures[host] = 0
+                self.opened.pop(host, None)
+                return False
+            self.failures[host] = self.failures.get(host, 0) + 1
+            if self.failures[host] >= self.threshold and host not in self.opened:
+                self.opened[host] = time.monotonic()
+                return True
+            return False
+
+    def state(self, host: str) -> str:
+        with self.lock:
+            return 'open' if host in self.opened else 'closed'
+
+
+class ResilientClient:
+    """GETs through `session` with timeouts, retries and a per-host breaker"""
+
+    # Not worth retrying, but a run of them means the host is blocking us
+    BLOCK_STATUSES = {403}
+
+    def __init__(self, session: requests.Session, limiter=None, policy: RetryPolicy = None,
+                 breaker: CircuitBreaker = None, timeout: float = DEFAULT_TIMEOUT, retry_if=None,
+                 profiler=None):
+        # retry_if(response): extra retry test for errors reported under HTTP 200;
+        # not applied to stream=True requests, whose body the caller reads
+        # profiler: a profiler.RunProfiler that gets a span per request, wait and backoff
+        self.session = session
+        self.limiter = limiter
+        self.policy = policy or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.timeout = timeout
+        self.retry_if = retry_if
+        self.profiler = profiler
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    def _count(self, host: str, metric: str, amount: float = 1) -> None:
+        with self.lock:
+            counts = self.hosts.setdefault(host, {'requests': 0, 'retries': 0, 'failures': 0,
+                                                  'blocked': 0, 'trips': 0, 'seconds': 0.0})
+            counts[metric] += amount
+
+    def get(self, url: str, timeout: float = None, retries: int = None, label: str = None, **kwargs):
+        """
+        GET with retries. Returns the last response, which may still be an
+        error status once retries run out. Raises CircuitOpen without sending
+        anything if the host is blocked, or the last connection error.
+        `label` names the request in the profile (default: the host).
+        """
+        host = urlsplit(url).hostname or ''
+        label = label or host
+        retries = self.policy.retries if retries is None else retries
+        retry_if = None if kwargs.get('stream') else self.retry_if
+
+        attempt = 0
+        while True:
+            if not self.breaker.allow(host):
+                self._count(host, 'blocked')
+                raise CircuitOpen(f"{host} is failing, skipped until the breaker closes")
+
+            self._count(host, 'requests')
+            response, error = None, None
+            queued = time.perf_counter()
+            with self.limiter.slot(url) if self.limiter else nullcontext():
+                start = time.perf_counter()
+                try:
+                    response = self.session.get(url, timeout=timeout or self.timeout, **kwargs)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    error = e
+                duration = time.perf_counter() - start
+            self._count(host, 'seconds', duration)
+            if self.profiler:
+                if start - queued > 0.001:
+                    self.profiler.record('politeness', label, queued, start - queued)
+                self.profiler.record_request(label, start, duration, response)
+
+            retryable = error is not None or response.status_code in self.policy.statuses or (
+                response.status_code == 200 and retry_if is not None and retry_if(response))
+            failed = retryable or response.status_code in self.BLOCK_STATUSES
+            if failed:
+                self._count(host, 'failures')
+            if self.breaker.record(host, not failed):
+                self._count(host, 'trips')
+                print(f"  Circuit open for {host} after {self.breaker.threshold} failures in a row")
+
+            delay = self.policy.delay(attempt + 1, response) if retryable and attempt < retries else None
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response
+
+            self._count(host, 'retries')
+            if self.profiler:
+                self.profiler.sleep(delay, 'backoff')
+            else:
+                time.sleep(delay)
+            attempt += 1
+
+    def metrics(self) -> dict:
+        """Per-host request, retry, failure and breaker counts, and seconds spent in requests"""
+        with self.lock:
+            hosts = {host: dict(counts) for host, counts in self.hosts.items()}
+        for host, counts in hosts.items():
+            counts['breaker'] = self.breaker.state(host)
+        return hosts
+
+    def export_metrics(self, path: Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'generated_at': time.time(), 'hosts': self.metrics()}, f, indent=2)
+        return path
+
+    def request_seconds(self) -> float:
+        """Time spent in requests across hosts, not counting politeness or backoff waits"""
+        with self.lock:
+            return sum(counts['seconds'] for counts in self.hosts.values())
+
+    def summary(self) -> str:
+        """Totals across hosts plus a row for every host that had failures"""
+        metrics = self.metrics()
+        total = {k: sum(m[k] for m in metrics.values())
+                 for k in ('requests', 'retries', 'failures', 'blocked')}
+        lines = [f"HTTP: {total['requests']} requests, {total['retries']} retries, "
+                 f"{total['failures']} failures, {total['blocked']} skipped by open breakers"]
+        for host, m in sorted(metrics.items()):
+            if m['failures'] or m['blocked']:
+                lines.append(f"  {host:<30} {m['requests']:>5} requests {m['retries']:>4} retries "
+                             f"{m['failures']:>4} failures  breaker {m['breaker']}")
+        return '\n'.join(lines)
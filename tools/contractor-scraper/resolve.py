@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Cross-source entity resolution for contractor records.
+
+The same business shows up on Yelp, YellowPages, BBB and Google under
+slightly different names, often with no phone on Yelp. Records are merged
+into one canonical contractor per business:
+
+  1. Blocking: each record is indexed under cheap keys - phone, a phonetic
+     key of the name, street number + street, website domain - and only
+     compared with entities sharing a key. This keeps the work near-linear
+     instead of comparing every pair.
+  2. Scoring: an exact phone match wins outright. Otherwise the name
+     trigram similarity must be corroborated by a matching street address
+     or website domain (which add to it, as does a matching city), or be
+     near-exact on its own. A city that is only the search location the
+     record was found under says nothing, and doesn't count.
+  3. Merging: the canonical record keeps the first value seen for each field
+     and fills blanks from later matches.
+
+Usage:
+    python resolve.py                     # resolve the whole contractor store
+    python resolve.py --output entities   # canonical records -> output/entities.csv/.jsonl
+"""
+
+import argparse
+import re
+import time
+from urllib.parse import urlsplit
+
+from output_writer import StreamingWriter
+from store import DEFAULT_STORE_PATH, ContractorStore
+
+# Scores at or above this merge a record into an entity
+MATCH_THRESHOLD = 0.8
+
+# Name similarity needed to merge on the name alone (no phone, street or domain in common)
+NAME_ONLY_THRESHOLD = 0.9
+
+# Entities compared per blocking key; bigger blocks are common words, not matches
+MAX_BLOCK = 50
+
+LEGAL_SUFFIXES = {'llc', 'inc', 'co', 'corp', 'corporation', 'company', 'ltd', 'the', 'and', 'of'}
+
+NON_ALNUM_RE = re.compile(r'[^a-z0-9\s]')
+STREET_RE = re.compile(r'^\s*(\d+)\s+(?:[nsew]\.?\s+)?([a-z0-9]+)')
+
+SOUNDEX_CODES = {c: d for d, letters in {
+    '1': 'bfpv', '2': 'cgjkqsxz', '3': 'dt', '4': 'l', '5': 'mn', '6': 'r'}.items() for c in letters}
+
+
+def normalize_name(name: str) -> str:
+    name = NON_ALNUM_RE.sub(' ', name.lower().replace('&', ' and '))
+    return ' '.join(t for t in name.split() if t not in LEGAL_SUFFIXES)
+
+
+def soundex(word: str) -> str:
+    if not word:
+        return ''
+    code = word[0].upper()
+    last = SOUNDEX_CODES.get(word[0], '')
+    for c in word[1:]:
+        digit = SOUNDEX_CODES.get(c, '')
+        if digit and digit != last:
+            code += digit
+            if len(code) == 4:
+                break
+        if c not in 'hw':
+            last = digit
+    return code.ljust(4, '0')
+
+
+def trigrams(text: str) -> frozenset:
+    padded = f"  {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def similarity(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class Entity:
+    __slots__ = ('id', 'record', 'sources', 'members', 'name', 'grams', 'phones',
+                 'street', 'domain', 'city')
+
+    def __init__(self, entity_id: int, record: dict, features: dict):
+        self.id = entity_id
+        self.record = dict(record)
+        self.sources = {record.get('source', 'google')}
+        self.members = 1
+        self.name = features['name']
+        self.grams = features['grams']
+        self.phones = {features['phone']} if features['phone'] else set()
+        self.street = features['street']
+        self.domain = features['domain']
+        self.city = features['city']
+
+
+def features(record: dict) -> dict:
+    name = normalize_name(record.get('name', ''))
+    street = STREET_RE.match(record.get('address', '').lower())
+    domain = urlsplit(record.get('website') or '').hostname or ''
+    city = normalize_name(record.get('city', ''))
+    if city == normalize_name(record.get('search_city', '')):
+        city = ''  # Every record from that search has it
+    return {
+        'name': name,
+        'grams': trigrams(name),
+        'phone': record.get('phone_clean', '')[-10:],
+        'street': ' '.join(street.groups()) if street else '',
+        'domain': domain[4:] if domain.startswith('www.') else domain,
+        'city': city,
+    }
+
+
+def block_keys(f: dict) -> list:
+    keys = []
+    if f['phone']:
+        keys.append('p:' + f['phone'])
+    tokens = f['name'].split()
+    if tokens:
+        keys.append('n:' + '|'.join(soundex(t) for t in tokens[:2]))
+    if f['street']:
+        keys.append('a:' + f['street'])
+    if f['domain']:
+        keys.append('d:' + f['domain'])
+    return keys
+
+
+class EntityResolver:
+    """Incremental resolver: add() records one at a time, in any order"""
+
+    def __init__(self, threshold: float = MATCH_THRESHOLD):
+        self.threshold = threshold
+        self.entities = []
+        self.blocks = {}
+        self.records = 0
+        self.comparisons = 0
+        self.seconds = 0.0
+
+    def add(self, record: dict):
+        """Resolve one record. Returns (entity, is_new)."""
+        started = time.perf_counter()
+        self.records += 1
+        f = features(record)
+        keys = block_keys(f)
+
+        candidates = set()
+        for key in keys:
+            candidates.update(self.blocks.get(key, ())[:MAX_BLOCK])
+
+        best, best_score = None, 0.0
+        for entity_id in candidates:
+            self.comparisons += 1
+            entity = self.entities[entity_id]
+            score = self.score(f, entity)
+            if score > best_score:
+                best, best_score = entity, score
+
+        if best is not None and best_score >= self.threshold:
+            self.merge(best, record, f)
+            entity, is_new = best, False
+        else:
+            entity = Entity(len(self.entities), record, f)
+            self.entities.append(entity)
+            is_new = True
+
+        for key in keys:
+            members = self.blocks.setdefault(key, [])
+            if entity.id not in members:
+                members.append(entity.id)
+
+        self.seconds += time.perf_counter() - started
+        return entity, is_new
+
+    @staticmethod
+    def score(f: dict, entity: Entity) -> float:
+        if f['phone'] and f['phone'] in entity.phones:
+            return 1.0
+
+        name_sim = similarity(f['grams'], entity.grams)
+        same_street = bool(f['street']) and f['street'] == entity.street
+        same_domain = bool(f['domain']) and f['domain'] == entity.domain
+
+        if f['phone'] and entity.phones:
+            # Two different phones: only the same name at the same place/site counts
+            return 0.9 if name_sim >= 0.9 and (same_street or same_domain) else 0.0
+
+        if not (same_street or same_domain):
+            # Nothing but the name to go on: "Sunshine Sod" is not "Sunshine Sod Farm"
+            return name_sim if name_sim >= NAME_ONLY_THRESHOLD else 0.0
+
+        score = name_sim
+        if same_street:
+            score += 0.3
+        if same_domain:
+            score += 0.3
+        if f['city'] and f['city'] == entity.city:
+            score += 0.1
+        return score
+
+    @staticmethod
+    def merge(entity: Entity, record: dict, f: dict) -> None:
+        canonical = entity.record
+        for field, value in record.items():
+            if value and not canonical.get(field):
+                canonical[field] = value
+        for field in ('rating', 'reviews'):
+            try:
+                canonical[field] = max(canonical.get(field) or 0, record.get(field) or 0,
+                                       key=lambda v: float(v))
+            except ValueError:
+                pass
+        entity.sources.add(record.get('source', 'google'))
+        entity.members += 1
+        if f['phone']:
+            entity.phones.add(f['phone'])
+        entity.street = entity.street or f['street']
+        entity.domain = entity.domain or f['domain']
+
+    def canonical(self):
+        """Yield one merged record per entity"""
+        for entity in self.entities:
+            record = dict(entity.record)
+            record['sources'] = ', '.join(sorted(entity.sources))
+            record['members'] = entity.members
+            yield record
+
+    def profile(self) -> str:
+        per_record = self.comparisons / self.records if self.records else 0.0
+        largest = max((len(m) for m in self.blocks.values()), default=0)
+        return (f"Resolution: {self.records} records -> {len(self.entities)} contractors, "
+                f"{self.comparisons} comparisons ({per_record:.1f}/record), "
+                f"largest block {largest}, {self.seconds * 1000:.0f} ms")
+
+
+ENTITY_FIELDS = ['name', 'phone', 'phone_clean', 'email', 'city', 'address', 'rating', 'reviews',
+                 'website', 'yelp_url', 'place_id', 'sources', 'members']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Merge contractor records across sources')
+    parser.add_argument('--store', default=str(DEFAULT_STORE_PATH), help='SQLite contractor store')
+    parser.add_argument('--output', '-o', default='contractors_resolved',
+                        help='Output filename prefix (default: contractors_resolved)')
+
+    args = parser.parse_args()
+
+    resolver = EntityResolver()
+    for record in ContractorStore(args.store).iter_records():
+        resolver.add(record)
+
+    with StreamingWriter(args.output, ENTITY_FIELDS) as writer:
+        for record in resolver.canonical():
+            writer.write(record)
+
+    print(resolver.profile())
+    if writer.count:
+        print(f"Saved {writer.count} contractors to: {', '.join(str(p) for p in writer.paths)}")
+
+
+if __name__ == '__main__':
+    main()
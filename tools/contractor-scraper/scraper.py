@@ -6,15 +6,19 @@ Usage:
     python scraper.py "sod installation" "Jacksonville, FL"
     python scraper.py "landscaping" "St Augustine, FL" --radius 20
     python scraper.py --file cities.txt --query "sod installation"
+    python scraper.py --file cities.txt --workers 16
+    python scraper.py --file cities.txt --dry-run
+    python scraper.py --file cities.txt --budget-usd 5
 """
 
 import argparse
 import csv
+import heapq
 import json
 import os
 import re
 import sys
-import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
@@ -25,6 +29,24 @@ except ImportError:
     os.system("pip install requests")
     import requests
 
+from checkpoint import Checkpoint, CheckpointMismatch
+from email_crawler import EmailCache, EmailCrawler
+from geocode_cache import GeocodeCache
+from http_cache import CachingSession, ResponseCache
+from output_writer import OUTPUT_DIR, StreamingWriter
+from places_planner import (RESULTS_PER_PAGE, Budget, BudgetExhausted, DetailsCache, SearchPlanner,
+                            plan_searches, print_plan)
+from profiler import RunProfiler
+from replay import ArchiveRecorder, route_to_replay
+from resilient_http import CircuitBreaker, ResilientClient
+from store import DEFAULT_STORE_PATH, ContractorStore
+
+FIELDNAMES = ['name', 'phone', 'phone_clean', 'email', 'city', 'address',
+              'rating', 'reviews', 'website', 'types', 'scraped_at']
+
+# Seconds before a next_page_token becomes valid
+PAGE_TOKEN_DELAY = 2
+
 # Load API key from environment or config file
 def get_api_key():
     # Check environment variable first
@@ -42,34 +64,100 @@ def get_api_key():
     return None
 
 
+def is_cacheable(response) -> bool:
+    """Keep Google API errors and paged searches (their tokens expire) out of the cache"""
+    if 'googleapis.com' not in response.url:
+        return True
+    try:
+        data = response.json()
+    except ValueError:
+        return False
+    return data.get('status') in ('OK', 'ZERO_RESULTS') and 'next_page_token' not in data
+
+
+def is_transient_error(response) -> bool:
+    """Google reports rate limiting and server hiccups under HTTP 200; those are worth a retry"""
+    try:
+        return response.json().get('status') in ('OVER_QUERY_LIMIT', 'UNKNOWN_ERROR')
+    except ValueError:
+        return False
+
+
 class ContractorScraper:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, cache: ResponseCache = None, workers: int = 8,
+                 store: ContractorStore = None, geocodes: GeocodeCache = None,
+                 breaker_threshold: int = 5, email_workers: int = 8, profiler: RunProfiler = None,
+                 budget: Budget = None, details_cache: DetailsCache = None, max_pages: int = 3,
+                 reuse: bool = True):
+        """
+        With reuse=False, places already in the store are detailed again and
+        websites are crawled even if the email cache knows them, so a
+        recording (--record) holds every response a replay will ask for.
+        """
         self.api_key = api_key
         self.base_url = "https://maps.googleapis.com/maps/api/place"
+        self.session = CachingSession(cache, should_cache=is_cacheable)
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=max(workers, 10))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.profiler = profiler or RunProfiler(enabled=False)
+        self.client = ResilientClient(self.session, breaker=CircuitBreaker(breaker_threshold),
+                                      retry_if=is_transient_error, profiler=self.profiler)
+        # Websites get their own client: retry_if reads Google's JSON status from the body
+        self.emails = EmailCrawler(
+            ResilientClient(self.session, breaker=CircuitBreaker(breaker_threshold), profiler=self.profiler),
+            EmailCache() if reuse else None, workers=email_workers) if email_workers else None
+        self.workers = workers
+        self.store = store
+        self.reuse = reuse
+        self.geocodes = geocodes
+        self.budget = budget
+        self.details_cache = details_cache
+        self.max_pages = max_pages
+        self.reused = 0
+        self.returned = 0
+        # Geocode answers for this run, failures (None) included, so each location is paid for once
+        self.geocoded = {}
         self.results = []
 
     def search_places(self, query: str, location: str, radius_miles: int = 25) -> list:
         """Search Google Places for contractors"""
+        all_results = []
+        for page, contractors, next_page_token in self.iter_pages(query, location, radius_miles):
+            all_results.extend(contractors)
+        return all_results
+
+    def api_get(self, url: str, endpoint: str, **kwargs):
+        """GET a paid endpoint, charging the budget unless the response cache answers"""
+        if self.budget:
+            self.budget.spend(endpoint)
+        response = self.client.get(url, label=endpoint, **kwargs)
+        if self.budget and getattr(response, 'from_cache', False):
+            self.budget.refund(endpoint)
+        return response
+
+    def iter_pages(self, query: str, location: str, radius_miles: int = 25, resume: dict = None,
+                   coords: tuple = None):
+        """
+        Yield (page, contractors, next_page_token) for each page of results.
+
+        next_page_token is None on the last page. `resume` is a checkpoint
+        entry ({'page': n, 'next_page_token': ...}); the search continues
+        with the page after it. `coords` skips the geocode when the
+        location's (lat, lng) is already known. self.returned counts the
+        places Google returned for the search, before any are dropped.
+        """
 
         # Convert miles to meters
         radius_meters = radius_miles * 1609
 
         # First, geocode the location
-        geocode_url = f"https://maps.googleapis.com/maps/api/geocode/json"
-        geo_params = {
-            'address': location,
-            'key': self.api_key
-        }
-
-        geo_response = requests.get(geocode_url, params=geo_params)
-        geo_data = geo_response.json()
-
-        if geo_data['status'] != 'OK':
+        coords = coords or self.geocode(location)
+        if not coords:
             print(f"  Could not geocode location: {location}")
-            return []
+            return
 
-        lat = geo_data['results'][0]['geometry']['location']['lat']
-        lng = geo_data['results'][0]['geometry']['location']['lng']
+        lat, lng = coords
 
         # Search for places
         search_url = f"{self.base_url}/textsearch/json"
@@ -80,47 +168,154 @@ class ContractorScraper:
             'key': self.api_key
         }
 
-        all_results = []
         next_page_token = None
         page = 1
+        self.returned = 0
+        if resume and resume.get('next_page_token'):
+            next_page_token = resume['next_page_token']
+            page = resume['page'] + 1
+            # Pages before a next_page_token are full
+            self.returned = resume['page'] * RESULTS_PER_PAGE
+            print(f"  Resuming at page {page}")
 
         while True:
             if next_page_token:
                 params['pagetoken'] = next_page_token
-                time.sleep(2)  # Required delay for page tokens
+                self.profiler.sleep(PAGE_TOKEN_DELAY, 'page token')  # Required delay for page tokens
+
+            try:
+                response = self.api_get(search_url, 'textsearch', params=params)
+                data = response.json()
+            except (requests.RequestException, ValueError) as e:
+                print(f"  Request failed: {e}")
+                break
 
-            response = requests.get(search_url, params=params)
-            data = response.json()
+            if data['status'] == 'INVALID_REQUEST' and resume and page > 1:
+                # Page tokens expire; start the city over (the store spares the Details calls)
+                print(f"  Saved page token expired, restarting {location} from page 1")
+                params.pop('pagetoken', None)
+                next_page_token = None
+                page = 1
+                resume = None
+                self.returned = 0
+                continue
 
             if data['status'] not in ['OK', 'ZERO_RESULTS']:
                 print(f"  API Error: {data.get('status')} - {data.get('error_message', '')}")
                 break
 
             results = data.get('results', [])
+            self.returned += len(results)
             print(f"  Page {page}: Found {len(results)} results")
 
-            for place in results:
-                contractor = self.extract_place_data(place)
-                if contractor:
-                    all_results.append(contractor)
-
             next_page_token = data.get('next_page_token')
+            if page >= self.max_pages:  # Google stops at 3 pages of 20
+                next_page_token = None
+
+            yield page, self.extract_all(results), next_page_token
+
             if not next_page_token:
                 break
 
             page += 1
-            if page > 3:  # Max 60 results (3 pages of 20)
+
+    def search_area(self, query: str, lat: float, lng: float, radius_meters: int) -> list:
+        """
+        Raw Nearby Search results for a circle, all pages (at most 60).
+        Unlike Text Search, Nearby Search only returns places inside the
+        radius, which is what region tiling relies on.
+        """
+        url = f"{self.base_url}/nearbysearch/json"
+        params = {
+            'keyword': query,
+            'location': f"{lat},{lng}",
+            'radius': radius_meters,
+            'key': self.api_key
+        }
+
+        places = []
+        for page in range(3):
+            try:
+                data = self.api_get(url, 'nearbysearch', params=params).json()
+            except (requests.RequestException, ValueError) as e:
+                print(f"  Request failed: {e}")
                 break
 
-        return all_results
+            if data['status'] not in ['OK', 'ZERO_RESULTS']:
+                print(f"  API Error: {data.get('status')} - {data.get('error_message', '')}")
+                break
+
+            places.extend(data.get('results', []))
+            if not data.get('next_page_token'):
+                break
+            params = {'pagetoken': data['next_page_token'], 'key': self.api_key}
+            self.profiler.sleep(PAGE_TOKEN_DELAY, 'page token')
+        return places
+
+    def geocode(self, location: str):
+        """Return (lat, lng) for a location, from the geocode cache when possible"""
+        if self.geocodes:
+            coords = self.geocodes.get(location)
+            if coords:
+                return coords
+        if location in self.geocoded:
+            return self.geocoded[location]
+        self.geocoded[location] = coords = self.lookup(location)
+        return coords
+
+    def lookup(self, location: str):
+        """Ask the Geocoding API for a location; None if it can't be found"""
+        geocode_url = f"https://maps.googleapis.com/maps/api/geocode/json"
+        geo_params = {
+            'address': location,
+            'key': self.api_key
+        }
+
+        try:
+            geo_data = self.api_get(geocode_url, 'geocode', params=geo_params).json()
+        except (requests.RequestException, ValueError) as e:
+            print(f"  Geocode failed: {e}")
+            return None
+
+        if geo_data['status'] != 'OK':
+            return None
+
+        lat = geo_data['results'][0]['geometry']['location']['lat']
+        lng = geo_data['results'][0]['geometry']['location']['lng']
+
+        if self.geocodes:
+            self.geocodes.put(location, lat, lng)
+        return lat, lng
+
+    def extract_all(self, places: list) -> list:
+        """Run extract_place_data for a page of results on the worker pool, keeping order"""
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            contractors = [c for c in pool.map(self.extract_place_data, places) if c]
+
+        # The page's websites are crawled for emails together, on the crawler's own pool
+        if self.emails:
+            found = self.emails.find_many([c['website'] for c in contractors if not c['email']])
+            for c in contractors:
+                c['email'] = c['email'] or found.get(c['website'], '')
+        return contractors
 
     def extract_place_data(self, place: dict) -> dict:
         """Extract relevant data from a place result"""
 
         place_id = place.get('place_id')
 
-        # Get detailed info (includes phone, website)
-        details = self.get_place_details(place_id)
+        # Places enriched in an earlier run keep their phone/website/email
+        known = self.store.get_by_place_id(place_id) if self.store and self.reuse else None
+        if known and known.get('phone_clean'):
+            self.reused += 1
+            details = {
+                'formatted_phone_number': known['phone'],
+                'website': known['website'],
+                'email': known['email'],
+            }
+        else:
+            # Get detailed info (includes phone, website)
+            details = self.get_place_details(place_id)
 
         if not details:
             return None
@@ -133,6 +328,9 @@ class ContractorScraper:
         if not phone_clean:
             return None
 
+        website = details.get('website', '')
+        email = details.get('email', '')
+
         return {
             'name': place.get('name', ''),
             'phone': phone,
@@ -141,28 +339,40 @@ class ContractorScraper:
             'city': self.extract_city(place.get('formatted_address', '')),
             'rating': place.get('rating', 0),
             'reviews': place.get('user_ratings_total', 0),
-            'website': details.get('website', ''),
-            'email': self.extract_email_from_website(details.get('website', '')),
+            'website': website,
+            'email': email,
             'place_id': place_id,
             'types': ', '.join(place.get('types', [])),
+            'source': 'google',
             'scraped_at': datetime.now().isoformat()
         }
 
     def get_place_details(self, place_id: str) -> dict:
         """Get detailed place information"""
 
+        if self.details_cache:
+            cached = self.details_cache.get(place_id)
+            if cached is not None:
+                return cached
+
         url = f"{self.base_url}/details/json"
         params = {
             'place_id': place_id,
-            'fields': 'formatted_phone_number,website,opening_hours',
+            'fields': 'formatted_phone_number,website',  # Only what we store
             'key': self.api_key
         }
 
-        response = requests.get(url, params=params)
-        data = response.json()
+        try:
+            data = self.api_get(url, 'details', params=params).json()
+        except (requests.RequestException, ValueError):
+            return {}
 
         if data['status'] == 'OK':
-            return data.get('result', {})
+            # Places without a phone are remembered too, so they aren't detailed again
+            result = data.get('result', {})
+            if self.details_cache:
+                self.details_cache.put(place_id, result)
+            return result
         return {}
 
     def extract_city(self, address: str) -> str:
@@ -172,26 +382,6 @@ class ContractorScraper:
             return parts[-3].strip() if len(parts) >= 3 else parts[0].strip()
         return ''
 
-    def extract_email_from_website(self, website: str) -> str:
-        """Try to find email on website (basic scrape)"""
-        if not website:
-            return ''
-
-        try:
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            response = requests.get(website, headers=headers, timeout=5)
-
-            # Find email patterns
-            emails = re.findall(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', response.text)
-
-            # Filter out common non-business emails
-            ignore = ['example.com', 'email.com', 'domain.com', 'yoursite.com', 'sentry.io']
-            emails = [e for e in emails if not any(x in e.lower() for x in ignore)]
-
-            return emails[0] if emails else ''
-        except:
-            return ''
-
     def save_to_csv(self, results: list, filename: str):
         """Save results to CSV file"""
 
@@ -204,11 +394,8 @@ class ContractorScraper:
 
         filepath = output_dir / filename
 
-        fieldnames = ['name', 'phone', 'phone_clean', 'email', 'city', 'address',
-                      'rating', 'reviews', 'website', 'types', 'scraped_at']
-
         with open(filepath, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+            writer = csv.DictWriter(f, fieldnames=FIELDNAMES, extrasaction='ignore')
             writer.writeheader()
             writer.writerows(results)
 
@@ -241,11 +428,56 @@ def main():
                         help='Search radius in miles (default: 25)')
     parser.add_argument('--output', '-o', default='contractors',
                         help='Output filename prefix (default: contractors)')
+    parser.add_argument('--cache-ttl', type=float, default=12,
+                        help='Hours before a cached response is revalidated (default: 12)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always call the API, bypassing the response cache')
+    parser.add_argument('--workers', '-w', type=int, default=8,
+                        help='Concurrent Place Details / website lookups (default: 8)')
+    parser.add_argument('--store', default=str(DEFAULT_STORE_PATH),
+                        help='SQLite contractor store (places found there skip Details)')
+    parser.add_argument('--no-store', action='store_true',
+                        help="Don't read or update the contractor store")
+    parser.add_argument('--parquet', action='store_true',
+                        help='Also write a Parquet file (needs pyarrow)')
+    parser.add_argument('--breaker-threshold', type=int, default=5,
+                        help='Failures in a row before a host is skipped for the rest of the run')
+    parser.add_argument('--metrics', metavar='PATH',
+                        help='Write per-host retry and circuit-breaker metrics as JSON')
+    parser.add_argument('--email-workers', type=int, default=8,
+                        help='Contractor websites crawled for emails at once (default: 8)')
+    parser.add_argument('--no-emails', action='store_true',
+                        help="Don't crawl contractor websites for emails")
+    parser.add_argument('--profile', action='store_true',
+                        help='Print per-endpoint request percentiles and per-stage time at the end')
+    parser.add_argument('--trace', metavar='PATH',
+                        help='Write a Chrome trace of every request and stage (implies --profile)')
+    parser.add_argument('--record', metavar='ARCHIVE',
+                        help='Save every response to a replay archive (.jsonl.gz); bypasses the caches')
+    parser.add_argument('--replay', metavar='URL',
+                        help='Send all requests to a replay server (python replay.py serve ...)')
+    parser.add_argument('--overlap', type=float,
+                        help='Skip a city once this share of its search circle is covered by cities '
+                             'searched before it that came back under the 60-result cap, e.g. 0.95 '
+                             '(default: search every city)')
+    parser.add_argument('--max-pages', type=int, default=3, choices=[1, 2, 3],
+                        help='Text Search pages per city, 20 results each (default: 3)')
+    parser.add_argument('--budget-requests', type=int,
+                        help='Stop after this many paid API calls (cached responses are free)')
+    parser.add_argument('--budget-usd', type=float,
+                        help='Stop once the estimated API cost reaches this many dollars')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Print the search plan and an upper-bound cost estimate, then exit')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue the interrupted sweep with the same --output prefix')
+    parser.add_argument('--checkpoint',
+                        help='Checkpoint journal (default: output/<output>.checkpoint.jsonl)')
 
     args = parser.parse_args()
 
     # Get API key
-    api_key = get_api_key()
+    # Replayed responses and dry runs don't need a real key
+    api_key = get_api_key() or ('replay' if args.replay or args.dry_run else None)
     if not api_key:
         print("ERROR: Google Places API key not found!")
         print("\nTo set up:")
@@ -256,8 +488,18 @@ def main():
         print("   - Or create config.json with: {\"google_places_api_key\": \"your_key\"}")
         sys.exit(1)
 
-    scraper = ContractorScraper(api_key)
-    all_results = []
+    # A recording must hold every response, so nothing may come from a cache
+    cache = None if args.no_cache or args.record else ResponseCache(ttl=args.cache_ttl * 3600)
+    store = None if args.no_store else ContractorStore(args.store)
+    profiler = RunProfiler(enabled=args.profile or bool(args.trace))
+    budget = Budget(args.budget_requests, args.budget_usd)
+    scraper = ContractorScraper(api_key, cache=cache, workers=args.workers, store=store,
+                                geocodes=None if args.record else GeocodeCache(),
+                                breaker_threshold=args.breaker_threshold,
+                                email_workers=0 if args.no_emails else args.email_workers,
+                                profiler=profiler, budget=budget,
+                                details_cache=None if args.no_cache or args.record else DetailsCache(),
+                                max_pages=args.max_pages, reuse=not args.record)
 
     # Determine cities to search
     cities = []
@@ -282,50 +524,165 @@ def main():
         ]
         print(f"No location specified, using default Florida cities")
 
-    print(f"\nSearching for: {args.query}")
-    print(f"Cities: {len(cities)}")
-    print(f"Radius: {args.radius} miles\n")
-    print("-" * 50)
+    if args.dry_run:
+        # Only cached coordinates: a dry run makes no API calls
+        locate = scraper.geocodes.get if scraper.geocodes else lambda city: None
+        print(f"Plan for: {args.query}\n")
+        print_plan(plan_searches(cities, locate, args.radius, args.overlap, args.max_pages), args.radius,
+                   args.max_pages)
+        return
 
-    for city in cities:
-        print(f"\n[{city}]")
-        results = scraper.search_places(args.query, city, args.radius)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    checkpoint_path = args.checkpoint or OUTPUT_DIR / f"{args.output}.checkpoint.jsonl"
+    try:
+        checkpoint = Checkpoint(checkpoint_path, args.query, f"{args.output}_{timestamp}",
+                                resume=args.resume)
+    except CheckpointMismatch as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
 
-        # Add city to results for tracking
-        for r in results:
-            r['search_city'] = city
+    recorder = None
+    if args.record:
+        recorder = ArchiveRecorder(args.record, {'scraper': 'scraper', 'query': args.query, 'cities': cities,
+                                                  'radius': args.radius, 'overlap': args.overlap,
+                                                  'max_pages': args.max_pages})
+        recorder.attach(scraper.session)
+    if args.replay:
+        route_to_replay(scraper.session, args.replay, pool_maxsize=max(args.workers, 10))
 
-        all_results.extend(results)
+    def locate(city):
+        try:
+            return scraper.geocode(city)
+        except BudgetExhausted:
+            return None  # The search loop stops on the same budget
+
+    # Cities are planned as the sweep reaches them, once the searches around them are in
+    planner = SearchPlanner(locate, args.radius, args.overlap, args.max_pages)
+    skipped = []
 
-        # Rate limiting
-        time.sleep(0.5)
+    print(f"\nSearching for: {args.query}")
+    print(f"Cities: {len(cities)}")
+    print(f"Radius: {args.radius} miles")
+    print()
+    if checkpoint.resumed:
+        done = sum(1 for city in cities if checkpoint.is_done(city, 'google'))
+        print(f"Resuming: {done} cities already done\n")
+    print("-" * 50)
 
-    # Deduplicate by phone number
+    # Deduplicate by phone number and write each page as it finishes
     seen_phones = set()
-    unique_results = []
-    for r in all_results:
-        if r['phone_clean'] not in seen_phones:
-            seen_phones.add(r['phone_clean'])
-            unique_results.append(r)
+    totals = {'found': 0, 'new': 0, 'changed': 0, 'unchanged': 0}
+    top_reviews = []
+
+    def remember(row):
+        nonlocal top_reviews
+        seen_phones.add(row['phone_clean'])
+        row['reviews'] = int(row['reviews'] or 0)
+        top_reviews = heapq.nlargest(10, top_reviews + [row], key=lambda x: x['reviews'])
+
+    writer = StreamingWriter(checkpoint.output, FIELDNAMES, parquet=args.parquet,
+                             resume=checkpoint.resumed, on_existing=remember)
+
+    exhausted = None
+    try:
+        with writer:
+            for city in cities:
+                entry = planner.decide(city)
+                if not entry['search']:
+                    skipped.append(city)
+                    print(f"\n[{city}] skipped, inside {', '.join(entry['covered_by'])}")
+                    continue
+                progress = checkpoint.progress(city, 'google')
+                if progress and progress['final']:
+                    # Fewer pages than allowed means Google ran out of results before the cap
+                    capped = progress['page'] >= args.max_pages
+                    planner.searched(entry, args.max_pages * RESULTS_PER_PAGE if capped else 0)
+                    continue
+
+                print(f"\n[{city}]")
+                for page, results, next_page_token in scraper.iter_pages(
+                        args.query, city, args.radius, resume=progress, coords=entry['coords']):
+                    totals['found'] += len(results)
+
+                    # Add city to results for tracking
+                    unique_results = []
+                    with profiler.span('dedupe', 'google'):
+                        for r in results:
+                            r['search_city'] = city
+                            if r['phone_clean'] not in seen_phones:
+                                seen_phones.add(r['phone_clean'])
+                                unique_results.append(r)
+
+                    if store:
+                        with profiler.span('store', 'google'):
+                            for status in store.upsert_many(unique_results):
+                                totals[status] += 1
+
+                    with profiler.span('write', 'google'):
+                        for r in unique_results:
+                            writer.write(r)
+                    top_reviews = heapq.nlargest(10, top_reviews + unique_results,
+                                                 key=lambda x: x['reviews'])
+
+                    checkpoint.commit(city, 'google', page, len(results), next_page_token,
+                                      final=next_page_token is None)
+                planner.searched(entry, scraper.returned)
+
+                # Rate limiting
+                profiler.sleep(0.5, 'city delay')
+    except BudgetExhausted as e:
+        # The unfinished page isn't committed, so --resume picks up from it
+        exhausted = e
+        print(f"\nStopped: {e}. Rerun with --resume and a larger budget to continue.")
+    except KeyboardInterrupt:
+        print(f"\nInterrupted after {writer.count} contractors. Rerun with --resume to continue.")
+        if recorder:
+            recorder.close()
+        sys.exit(1)
+    checkpoint.close(completed=exhausted is None)
+    if recorder:
+        recorder.close()
+        print(f"Recorded {recorder.count} responses to {recorder.path}")
 
     print("\n" + "-" * 50)
-    print(f"\nTotal found: {len(all_results)}")
-    print(f"Unique (by phone): {len(unique_results)}")
-
-    # Save results
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    csv_file = scraper.save_to_csv(unique_results, f"{args.output}_{timestamp}.csv")
-    scraper.save_to_json(unique_results, f"{args.output}_{timestamp}.json")
+    print(f"\nTotal found: {totals['found']}")
+    print(f"Unique (by phone): {writer.count}")
+    if skipped:
+        print(f"Skipped {len(skipped)} cities inside areas already searched: {', '.join(skipped)}")
+    if store:
+        print(f"Store: {totals['new']} new, {totals['changed']} changed, "
+              f"{scraper.reused} places reused without Details calls")
+    if scraper.geocodes:
+        print(f"Geocodes: {scraper.geocodes.hits} cached, {scraper.geocodes.misses} looked up")
+    if scraper.details_cache:
+        print(f"Place Details: {scraper.details_cache.hits} answered from the details cache")
+    print(budget.summary())
+    if cache:
+        print(cache.summary())
+    if scraper.emails:
+        print(scraper.emails.summary())
+    print(scraper.client.summary())
+    if args.metrics:
+        print(f"Metrics: {scraper.client.export_metrics(args.metrics)}")
+    if profiler.enabled:
+        print(profiler.report())
+    if args.trace:
+        print(f"Trace: {profiler.export_trace(args.trace)}")
+
+    if exhausted:
+        print(f"\n{writer.count} contractors so far, kept as .part files until the sweep completes")
+    elif writer.count:
+        print(f"\nSaved {writer.count} contractors to: {', '.join(str(p) for p in writer.paths)}")
+    else:
+        print("No results to save")
 
     # Print summary
-    if unique_results:
+    if top_reviews:
         print("\n" + "=" * 50)
         print("TOP 10 BY REVIEWS:")
         print("=" * 50)
-        sorted_results = sorted(unique_results, key=lambda x: x['reviews'], reverse=True)[:10]
-        for r in sorted_results:
+        for r in top_reviews:
             print(f"  {r['name'][:30]:<30} | {r['phone']:<14} | {r['reviews']} reviews")
 
-
 if __name__ == '__main__':
     main()
@@ -7,18 +7,20 @@ Uses web scraping to find contractors. Slower but free.
 Usage:
     python scraper_free.py "sod installation" "Jacksonville FL"
     python scraper_free.py "landscaping" "St Augustine FL"
+    python scraper_free.py --file cities.txt --workers 6
 """
 
 import argparse
-import csv
+import hashlib
 import json
 import os
-import re
 import sys
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from datetime import datetime
 from pathlib import Path
-from urllib.parse import quote_plus
+from urllib.parse import urlsplit
 
 try:
     import requests
@@ -26,310 +28,192 @@ except ImportError:
     os.system("pip install requests")
     import requests
 
-try:
-    from bs4 import BeautifulSoup
-except ImportError:
-    os.system("pip install beautifulsoup4")
-    from bs4 import BeautifulSoup
+from checkpoint import Checkpoint, CheckpointMismatch
+from extract import BACKENDS, DEFAULT_BACKEND
+from http_cache import CachingSession, ResponseCache
+from output_writer import OUTPUT_DIR, StreamingWriter
+from profiler import RunProfiler
+from replay import ArchiveRecorder, route_to_replay
+from resilient_http import CircuitBreaker, ResilientClient
+from resolve import ENTITY_FIELDS, EntityResolver, normalize_name
+from sources import SOURCES, SourceAdapter, limiter_overrides
+from store import DEFAULT_STORE_PATH, ContractorStore
+from throttle import HostLimiter
+
+FIELDNAMES = ['name', 'phone', 'phone_clean', 'email', 'city', 'address',
+              'rating', 'reviews', 'website', 'source', 'scraped_at']
+
+
+def dedupe_key(record: dict) -> str:
+    """Phone number, or name and address for listings without one"""
+    if record.get('phone_clean'):
+        return record['phone_clean'][-10:]
+    return f"{normalize_name(record.get('name', ''))}|{(record.get('address') or '').lower()}"
+
+
+# Pauses used by the sequential mode (and to estimate what concurrency saves)
+SOURCE_DELAY = 2
+CITY_DELAY = 3
 
 
 class FreeContractorScraper:
-    def __init__(self):
-        self.session = requests.Session()
+    def __init__(self, workers: int = 1, host_rate: float = 1 / 3, cache: ResponseCache = None,
+                 store: ContractorStore = None, skip_recent: float = 0, checkpoint: Checkpoint = None,
+                 parser: str = DEFAULT_BACKEND, save_html: str = None, sources: list = None,
+                 breaker_threshold: int = 5, profiler: RunProfiler = None, limiter: HostLimiter = None):
+        self.session = CachingSession(cache)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
         })
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=max(workers, 10))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.workers = workers
+        self.adapters = [SOURCES[name] for name in (sources or SOURCES)]
+        # A caller-supplied limiter replaces the per-source one built from host_rate
+        self.limiter = limiter or HostLimiter(rate=host_rate, concurrency=1,
+                                              overrides=limiter_overrides(self.adapters))
+        self.store = store
+        self.skip_recent = skip_recent
+        self.checkpoint = checkpoint
+        self.parser = parser
+        self.save_html = Path(save_html) if save_html else None
+        self.profiler = profiler or RunProfiler(enabled=False)
+        self.client = ResilientClient(self.session, self.limiter, breaker=CircuitBreaker(breaker_threshold),
+                                      profiler=self.profiler)
+        self.stats = {'pages': 0}
+        self._stats_lock = threading.Lock()
         self.results = []
 
-    def search_yelp(self, query: str, location: str) -> list:
-        """Scrape Yelp for contractors"""
-        results = []
-
-        location_encoded = quote_plus(location)
-        query_encoded = quote_plus(query)
-
-        url = f"https://www.yelp.com/search?find_desc={query_encoded}&find_loc={location_encoded}"
-
-        try:
-            print(f"  Searching Yelp...")
-            response = self.session.get(url, timeout=15)
-
-            if response.status_code != 200:
-                print(f"  Yelp returned status {response.status_code}")
-                return results
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            # Find business cards
-            businesses = soup.select('[data-testid="serp-ia-card"]')
-
-            if not businesses:
-                # Try alternative selector
-                businesses = soup.select('.container__09f24__mpR8_ a[href*="/biz/"]')
-
-            print(f"  Found {len(businesses)} Yelp results")
-
-            for biz in businesses[:20]:  # Limit to first 20
-                try:
-                    # Extract name
-                    name_elem = biz.select_one('a[href*="/biz/"]')
-                    if not name_elem:
-                        continue
+    def fetch(self, url: str, timeout: int = 15, retries: int = None, label: str = None):
+        """GET a page within its host's rate limit, retrying transient failures"""
+        response = self.client.get(url, timeout=timeout, retries=retries, label=label)
 
-                    name = name_elem.get_text(strip=True)
-                    link = name_elem.get('href', '')
+        with self._stats_lock:
+            self.stats['pages'] += 1
 
-                    if '/biz/' not in link:
-                        continue
+        if self.save_html and response.status_code == 200:
+            self.save_fixture(url, response.text)
 
-                    # Get rating
-                    rating = 0
-                    rating_elem = biz.select_one('[aria-label*="star rating"]')
-                    if rating_elem:
-                        match = re.search(r'([\d.]+)\s*star', rating_elem.get('aria-label', ''))
-                        if match:
-                            rating = float(match.group(1))
-
-                    # Get review count
-                    reviews = 0
-                    review_elem = biz.select_one('span:-soup-contains("reviews")')
-                    if review_elem:
-                        match = re.search(r'(\d+)', review_elem.get_text())
-                        if match:
-                            reviews = int(match.group(1))
-
-                    results.append({
-                        'name': name,
-                        'phone': '',  # Need to visit detail page
-                        'phone_clean': '',
-                        'address': '',
-                        'city': location,
-                        'rating': rating,
-                        'reviews': reviews,
-                        'website': '',
-                        'email': '',
-                        'source': 'yelp',
-                        'yelp_url': f"https://www.yelp.com{link}" if link.startswith('/') else link,
-                        'scraped_at': datetime.now().isoformat()
-                    })
-
-                except Exception as e:
-                    continue
+        return response
 
-        except Exception as e:
-            print(f"  Yelp error: {e}")
-
-        return results
+    def save_fixture(self, url: str, html: str):
+        """Keep a fetched page for bench_parse.py, named <host>_<url hash>.html"""
+        self.save_html.mkdir(parents=True, exist_ok=True)
+        host = urlsplit(url).hostname or 'unknown'
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()[:10]
+        (self.save_html / f"{host}_{digest}.html").write_text(html, encoding='utf-8')
 
-    def search_yellowpages(self, query: str, location: str) -> list:
-        """Scrape YellowPages for contractors"""
-        results = []
-
-        location_encoded = quote_plus(location.replace(',', '').replace(' ', '-').lower())
-        query_encoded = quote_plus(query)
-
-        url = f"https://www.yellowpages.com/search?search_terms={query_encoded}&geo_location_terms={location_encoded}"
+    def search(self, adapter: SourceAdapter, query: str, location: str) -> list:
+        """Fetch and parse one source's search page"""
+        url = adapter.search_url(query, location)
+        print(f"  Searching {adapter.label}...")
 
         try:
-            print(f"  Searching YellowPages...")
-            response = self.session.get(url, timeout=15)
+            response = self.fetch(url, timeout=adapter.timeout, retries=adapter.retries,
+                                  label=adapter.name)
 
             if response.status_code != 200:
-                print(f"  YellowPages returned status {response.status_code}")
-                return results
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            # Find business listings
-            businesses = soup.select('.result')
+                print(f"  {adapter.label} returned status {response.status_code}")
+                return []
 
-            print(f"  Found {len(businesses)} YellowPages results")
-
-            for biz in businesses[:20]:
-                try:
-                    # Name
-                    name_elem = biz.select_one('.business-name')
-                    if not name_elem:
-                        continue
-                    name = name_elem.get_text(strip=True)
-
-                    # Phone
-                    phone = ''
-                    phone_elem = biz.select_one('.phones')
-                    if phone_elem:
-                        phone = phone_elem.get_text(strip=True)
-
-                    phone_clean = re.sub(r'[^\d]', '', phone)
-
-                    # Skip if no phone
-                    if not phone_clean:
-                        continue
-
-                    # Address
-                    address = ''
-                    addr_elem = biz.select_one('.street-address')
-                    if addr_elem:
-                        address = addr_elem.get_text(strip=True)
-
-                    locality_elem = biz.select_one('.locality')
-                    if locality_elem:
-                        address += ', ' + locality_elem.get_text(strip=True)
-
-                    # Website
-                    website = ''
-                    web_elem = biz.select_one('a.track-visit-website')
-                    if web_elem:
-                        website = web_elem.get('href', '')
-
-                    # Rating
-                    rating = 0
-                    rating_elem = biz.select_one('.rating')
-                    if rating_elem:
-                        classes = rating_elem.get('class', [])
-                        for c in classes:
-                            if c.startswith('result-rating-'):
-                                try:
-                                    rating = float(c.replace('result-rating-', '').replace('-', '.'))
-                                except:
-                                    pass
-
-                    results.append({
-                        'name': name,
-                        'phone': phone,
-                        'phone_clean': phone_clean,
-                        'address': address,
-                        'city': location,
-                        'rating': rating,
-                        'reviews': 0,
-                        'website': website,
-                        'email': '',
-                        'source': 'yellowpages',
-                        'scraped_at': datetime.now().isoformat()
-                    })
-
-                except Exception as e:
-                    continue
+            with self.profiler.span('parse', adapter.name, bytes=len(response.content)):
+                found, results = adapter.parse(response.text, location, self.parser)
+            print(f"  Found {found} {adapter.label} results")
 
         except Exception as e:
-            print(f"  YellowPages error: {e}")
+            print(f"  {adapter.label} error: {e}")
+            return []
 
         return results
 
-    def search_bbb(self, query: str, location: str) -> list:
-        """Scrape Better Business Bureau"""
-        results = []
-
-        # BBB uses different location format
-        state_abbrev = ''
-        match = re.search(r',\s*([A-Z]{2})', location)
-        if match:
-            state_abbrev = match.group(1).lower()
-
-        city_name = location.split(',')[0].strip().lower().replace(' ', '-')
-
-        query_encoded = quote_plus(query)
-        url = f"https://www.bbb.org/search?find_country=USA&find_text={query_encoded}&find_loc={city_name}%2C%20{state_abbrev.upper()}&page=1"
-
-        try:
-            print(f"  Searching BBB...")
-            response = self.session.get(url, timeout=15)
-
-            if response.status_code != 200:
-                print(f"  BBB returned status {response.status_code}")
-                return results
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            # Find business listings
-            businesses = soup.select('[data-testid="search-result"]')
-
-            if not businesses:
-                businesses = soup.select('.result-card')
-
-            print(f"  Found {len(businesses)} BBB results")
-
-            for biz in businesses[:15]:
-                try:
-                    # Name
-                    name_elem = biz.select_one('h3, .result-name')
-                    if not name_elem:
-                        continue
-                    name = name_elem.get_text(strip=True)
-
-                    # Phone
-                    phone = ''
-                    phone_elem = biz.select_one('a[href^="tel:"]')
-                    if phone_elem:
-                        phone = phone_elem.get_text(strip=True)
-
-                    phone_clean = re.sub(r'[^\d]', '', phone)
-
-                    # Address
-                    address = ''
-                    addr_elem = biz.select_one('.result-address, address')
-                    if addr_elem:
-                        address = addr_elem.get_text(strip=True)
-
-                    results.append({
-                        'name': name,
-                        'phone': phone,
-                        'phone_clean': phone_clean,
-                        'address': address,
-                        'city': location,
-                        'rating': 0,
-                        'reviews': 0,
-                        'website': '',
-                        'email': '',
-                        'source': 'bbb',
-                        'scraped_at': datetime.now().isoformat()
-                    })
-
-                except Exception as e:
-                    continue
-
-        except Exception as e:
-            print(f"  BBB error: {e}")
-
+    def sources(self) -> list:
+        """Enabled source adapters, in the order the sequential sweep runs them"""
+        return self.adapters
+
+    def should_skip(self, query: str, location: str, source: str) -> bool:
+        """True if this source was already done in the resumed run, or recently per the store"""
+        if self.checkpoint and self.checkpoint.is_done(location, source):
+            return True
+        if not self.store or not self.skip_recent:
+            return False
+        if self.store.scraped_within(query, location, source, self.skip_recent):
+            print(f"  Skipping {source} for {location} (scraped recently)")
+            return True
+        return False
+
+    def search_source(self, query: str, location: str, adapter: SourceAdapter) -> list:
+        """Run one source and record its watermark in the store"""
+        results = self.search(adapter, query, location)
+        # An empty result usually means a block or layout change, so retry it next run
+        if self.store and results:
+            self.store.mark_scraped(query, location, adapter.name, len(results))
         return results
 
-    def search_all(self, query: str, location: str) -> list:
-        """Search all sources"""
-        all_results = []
-
-        # Search each source with delays
-        all_results.extend(self.search_yellowpages(query, location))
-        time.sleep(2)
-
-        all_results.extend(self.search_yelp(query, location))
-        time.sleep(2)
-
-        all_results.extend(self.search_bbb(query, location))
-
-        return all_results
-
-    def save_to_csv(self, results: list, filename: str):
-        """Save results to CSV"""
-        if not results:
-            print("No results to save")
-            return None
-
-        output_dir = Path(__file__).parent / 'output'
-        output_dir.mkdir(exist_ok=True)
-
-        filepath = output_dir / filename
-
-        fieldnames = ['name', 'phone', 'phone_clean', 'email', 'city', 'address',
-                      'rating', 'reviews', 'website', 'source', 'scraped_at']
+    def iter_cities(self, query: str, cities: list):
+        """
+        Yield (city, source, results) for every city/source as they finish.
+
+        With workers == 1 this is the original sequential sweep with fixed
+        pauses. Otherwise every (city, source) pair is scheduled on a thread
+        pool, so a city's sources run side by side, and batches are yielded
+        in completion order. Politeness comes from each source's host limit,
+        and at most a few batches per worker are in flight.
+        """
+        if self.workers <= 1:
+            for city in cities:
+                print(f"\n[{city}]")
+                searched = False
+                for adapter in self.sources():
+                    if self.should_skip(query, city, adapter.name):
+                        continue
+                    if searched:
+                        self.profiler.sleep(SOURCE_DELAY, 'source delay')
+                    results = self.search_source(query, city, adapter)
+                    searched = True
+                    yield self._tag(city, adapter.name, results)
+                if searched:
+                    self.profiler.sleep(CITY_DELAY, 'city delay')  # Be nice to servers
+            return
+
+        units = (
+            (city, adapter)
+            for city in cities
+            for adapter in self.sources()
+            if not self.should_skip(query, city, adapter.name)
+        )
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = {}
+            for city, adapter in units:
+                future = pool.submit(self.search_source, query, city, adapter)
+                pending[future] = (city, adapter.name)
+                if len(pending) >= self.workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield self._tag(*pending.pop(future), future.result())
+            for future in as_completed(pending):
+                yield self._tag(*pending[future], future.result())
+
+    @staticmethod
+    def _tag(city: str, source: str, results: list):
+        for r in results:
+            r['search_city'] = city
+        return city, source, results
 
-        with open(filepath, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
-            writer.writeheader()
-            writer.writerows(results)
+    def print_throughput(self, elapsed: float, cities: int):
+        """Report pages/sec and time saved versus the sequential sweep"""
+        pages = self.stats['pages']
+        rate = pages / elapsed if elapsed > 0 else 0.0
+        print(f"Pages fetched: {pages} in {elapsed:.1f}s ({rate:.2f} pages/sec)")
+        print(f"Politeness wait: {self.limiter.total_wait():.1f}s")
 
-        print(f"\nSaved {len(results)} contractors to: {filepath}")
-        return filepath
+        if self.workers > 1:
+            sleeps = cities * (SOURCE_DELAY * (len(self.sources()) - 1) + CITY_DELAY)
+            sequential = self.client.request_seconds() + sleeps
+            print(f"Sequential estimate: {sequential:.1f}s "
+                  f"(saved {sequential - elapsed:.1f}s with {self.workers} workers)")
 
 
 def main():
@@ -341,11 +225,72 @@ def main():
     parser.add_argument('--file', '-f', help='File with list of cities')
     parser.add_argument('--output', '-o', default='contractors_free',
                         help='Output filename prefix')
+    parser.add_argument('--workers', '-w', type=int,
+                        help='Concurrent searches across sources (default: one per source; '
+                             '1 = sequential with fixed pauses)')
+    parser.add_argument('--source', action='append', choices=list(SOURCES),
+                        help='Source to search (repeatable, default: all)')
+    parser.add_argument('--host-rate', type=float, default=1 / 3,
+                        help='Max requests per second to any one host (default: 0.33)')
+    parser.add_argument('--cache-ttl', type=float, default=12,
+                        help='Hours before a cached page is revalidated (default: 12)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always download pages, bypassing the response cache')
+    parser.add_argument('--store', default=str(DEFAULT_STORE_PATH),
+                        help='SQLite contractor store updated by every run')
+    parser.add_argument('--no-store', action='store_true',
+                        help="Don't read or update the contractor store")
+    parser.add_argument('--skip-recent', type=float, default=0,
+                        help='Skip sources scraped for the same query/city within this many hours')
+    parser.add_argument('--delta', action='store_true',
+                        help='Only write contractors that are new or changed since the last run')
+    parser.add_argument('--parquet', action='store_true',
+                        help='Also write a Parquet file (needs pyarrow)')
+    parser.add_argument('--no-entities', action='store_true',
+                        help="Don't write the merged record per business (<output>_entities.csv)")
+    parser.add_argument('--parser', choices=BACKENDS, default=DEFAULT_BACKEND,
+                        help=f'HTML parsing backend (default: {DEFAULT_BACKEND})')
+    parser.add_argument('--save-html', metavar='DIR',
+                        help='Save fetched listing pages as fixtures for bench_parse.py')
+    parser.add_argument('--breaker-threshold', type=int, default=5,
+                        help='Failures in a row before a source is skipped for the rest of the run')
+    parser.add_argument('--metrics', metavar='PATH',
+                        help='Write per-host retry and circuit-breaker metrics as JSON')
+    parser.add_argument('--profile', action='store_true',
+                        help='Print per-source request percentiles and per-stage time at the end')
+    parser.add_argument('--trace', metavar='PATH',
+                        help='Write a Chrome trace of every request and stage (implies --profile)')
+    parser.add_argument('--record', metavar='ARCHIVE',
+                        help='Save every response to a replay archive (.jsonl.gz); bypasses the caches')
+    parser.add_argument('--replay', metavar='URL',
+                        help='Send all requests to a replay server (python replay.py serve ...)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue the interrupted sweep with the same --output prefix')
+    parser.add_argument('--checkpoint',
+                        help='Checkpoint journal (default: output/<output>.checkpoint.jsonl)')
 
     args = parser.parse_args()
+    sources = args.source or list(SOURCES)
+    workers = args.workers or len(sources)
 
-    scraper = FreeContractorScraper()
-    all_results = []
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    checkpoint_path = args.checkpoint or OUTPUT_DIR / f"{args.output}.checkpoint.jsonl"
+    try:
+        checkpoint = Checkpoint(checkpoint_path, args.query, f"{args.output}_{timestamp}",
+                                resume=args.resume)
+    except CheckpointMismatch as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+    # A recording must hold every response, so nothing may come from a cache
+    cache = None if args.no_cache or args.record else ResponseCache(ttl=args.cache_ttl * 3600)
+    store = None if args.no_store else ContractorStore(args.store)
+    profiler = RunProfiler(enabled=args.profile or bool(args.trace))
+    scraper = FreeContractorScraper(workers=workers, host_rate=args.host_rate, cache=cache,
+                                    store=store, skip_recent=args.skip_recent * 3600,
+                                    checkpoint=checkpoint, parser=args.parser,
+                                    save_html=args.save_html, sources=sources,
+                                    breaker_threshold=args.breaker_threshold, profiler=profiler)
 
     # Determine cities
     cities = []
@@ -355,45 +300,117 @@ def main():
     else:
         cities = [args.location]
 
+    recorder = None
+    if args.record:
+        recorder = ArchiveRecorder(args.record, {'scraper': 'scraper_free', 'query': args.query, 'cities': cities})
+        recorder.attach(scraper.session)
+    if args.replay:
+        route_to_replay(scraper.session, args.replay, pool_maxsize=max(workers, 10))
+
     print(f"\nSearching for: {args.query}")
     print(f"Cities: {len(cities)}")
+    print(f"Sources: {', '.join(sources)}")
+    print(f"Workers: {workers}")
+    if checkpoint.resumed:
+        print(f"Resuming: {len(checkpoint.units)} city/source units already done")
     print("-" * 50)
 
-    for city in cities:
-        print(f"\n[{city}]")
-        results = scraper.search_all(args.query, city)
-
-        for r in results:
-            r['search_city'] = city
-
-        all_results.extend(results)
-        time.sleep(3)  # Be nice to servers
-
-    # Deduplicate by phone
-    seen_phones = set()
-    unique_results = []
-    for r in all_results:
-        if r['phone_clean'] and r['phone_clean'] not in seen_phones:
-            seen_phones.add(r['phone_clean'])
-            unique_results.append(r)
-        elif not r['phone_clean']:
-            # Include even without phone (might get from Yelp detail page)
-            unique_results.append(r)
+    # Write each business once, the first time it turns up; every record still
+    # goes to the store. Only the dedupe keys stay in memory.
+    seen = set()
+    totals = {'found': 0, 'with_phone': 0, 'new': 0, 'changed': 0, 'unchanged': 0}
+    has_phone = []
+
+    # On --resume the rows already written are skipped, including those of a
+    # unit that was written but not yet committed when the run stopped
+    writer = StreamingWriter(checkpoint.output, FIELDNAMES, parquet=args.parquet,
+                             resume=checkpoint.resumed,
+                             on_existing=lambda row: seen.add(dedupe_key(row)))
+
+    started = time.monotonic()
+    try:
+        with writer:
+            for city, source, results in scraper.iter_cities(args.query, cities):
+                totals['found'] += len(results)
+
+                unique_results = []
+                with profiler.span('dedupe', source):
+                    for r in results:
+                        key = dedupe_key(r)
+                        if key not in seen:
+                            seen.add(key)
+                            unique_results.append(r)
+
+                if store:
+                    with profiler.span('store', source):
+                        statuses = store.upsert_many(results)
+                    for status in statuses:
+                        totals[status] += 1
+                    if args.delta:
+                        changed = {id(r) for r, status in zip(results, statuses) if status != 'unchanged'}
+                        unique_results = [r for r in unique_results if id(r) in changed]
+
+                with profiler.span('write', source):
+                    for r in unique_results:
+                        writer.write(r)
+                        if r['phone_clean']:
+                            totals['with_phone'] += 1
+                            if len(has_phone) < 15:
+                                has_phone.append(r)
+
+                checkpoint.commit(city, source, records=len(results))
+    except KeyboardInterrupt:
+        print(f"\nInterrupted after {writer.count} contractors. Rerun with --resume to continue.")
+        if recorder:
+            recorder.close()
+        sys.exit(1)
+    checkpoint.close(completed=True)
+    if recorder:
+        recorder.close()
+        print(f"Recorded {recorder.count} responses to {recorder.path}")
+    elapsed = time.monotonic() - started
 
     print("\n" + "-" * 50)
-    print(f"Total found: {len(all_results)}")
-    print(f"With phone: {len([r for r in unique_results if r['phone_clean']])}")
-
-    # Save
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    scraper.save_to_csv(unique_results, f"{args.output}_{timestamp}.csv")
+    print(f"Total found: {totals['found']}")
+    print(f"With phone: {totals['with_phone']}")
+    if store:
+        print(f"Store: {totals['new']} new, {totals['changed']} changed, "
+              f"{totals['unchanged']} unchanged ({store.count()} total)")
+
+    scraper.print_throughput(elapsed, len(cities))
+    print(scraper.client.summary())
+    if args.metrics:
+        print(f"Metrics: {scraper.client.export_metrics(args.metrics)}")
+    if profiler.enabled:
+        print(profiler.report())
+    if args.trace:
+        print(f"Trace: {profiler.export_trace(args.trace)}")
+    if cache:
+        print(cache.summary())
+
+    if writer.count:
+        print(f"\nSaved {writer.count} contractors to: {', '.join(str(p) for p in writer.paths)}")
+    else:
+        print("No results to save")
+
+    if not args.no_entities and writer.count:
+        # A separate pass over the finished output, so the sweep itself keeps no records
+        resolver = EntityResolver()
+        with open(writer.paths[1], encoding='utf-8') as f:
+            for line in f:
+                resolver.add(json.loads(line))
+        with StreamingWriter(f"{checkpoint.output}_entities", ENTITY_FIELDS) as entities:
+            for record in resolver.canonical():
+                entities.write(record)
+        print(resolver.profile())
+        print(f"Saved {entities.count} merged contractors to: "
+              f"{', '.join(str(p) for p in entities.paths)}")
 
     # Print summary
-    if unique_results:
+    if has_phone:
         print("\n" + "=" * 50)
         print("CONTRACTORS WITH PHONE NUMBERS:")
         print("=" * 50)
-        has_phone = [r for r in unique_results if r['phone_clean']][:15]
         for r in has_phone:
             print(f"  {r['name'][:35]:<35} | {r['phone']:<14} | {r['source']}")
 
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Source adapters for the free contractor scraper.
+
+Each listing site is one adapter: how to build its search URL, which parser
+reads the page, and its own settings - concurrent requests, request rate,
+timeout, result cap and retries. Adapters register themselves in SOURCES,
+so adding a site (Angi, Nextdoor, ...) means writing one class here; the
+scraper picks it up and runs it alongside the others.
+"""
+
+import re
+from abc import ABC, abstractmethod
+from urllib.parse import quote_plus
+
+from extract import BBB_LIMIT, YELP_LIMIT, YP_LIMIT, parse_bbb, parse_yellowpages, parse_yelp
+
+# name -> adapter, in the order the sequential sweep runs them
+SOURCES = {}
+
+
+def register(cls):
+    """Class decorator adding an adapter to SOURCES"""
+    SOURCES[cls.name] = cls()
+    return cls
+
+
+class SourceAdapter(ABC):
+    name = ''
+    label = ''
+    host = ''
+    rate = None         # Requests/sec to this host; None uses the scraper's --host-rate
+    concurrency = 1     # Requests in flight to this host at once
+    timeout = 15        # Seconds per request
+    limit = 20          # Max records kept per search page
+    retries = 2         # Retries on 429/5xx and connection errors (with backoff)
+    parser = None       # extract.parse_*(html, location, backend, limit)
+
+    @abstractmethod
+    def search_url(self, query: str, location: str) -> str:
+        """Search page URL for `query` near `location`"""
+
+    def parse(self, html: str, location: str, backend: str):
+        """Return (cards found, records) for a search page"""
+        return self.parser(html, location, backend, self.limit)
+
+
+@register
+class YellowPagesSource(SourceAdapter):
+    name = 'yellowpages'
+    label = 'YellowPages'
+    host = 'www.yellowpages.com'
+    limit = YP_LIMIT
+    parser = staticmethod(parse_yellowpages)
+
+    def search_url(self, query: str, location: str) -> str:
+        location_encoded = quote_plus(location.replace(',', '').replace(' ', '-').lower())
+        return (f"https://{self.host}/search?search_terms={quote_plus(query)}"
+                f"&geo_location_terms={location_encoded}")
+
+
+@register
+class YelpSource(SourceAdapter):
+    name = 'yelp'
+    label = 'Yelp'
+    host = 'www.yelp.com'
+    limit = YELP_LIMIT
+    parser = staticmethod(parse_yelp)
+
+    def search_url(self, query: str, location: str) -> str:
+        return (f"https://{self.host}/search?find_desc={quote_plus(query)}"
+                f"&find_loc={quote_plus(location)}")
+
+
+@register
+class BBBSource(SourceAdapter):
+    name = 'bbb'
+    label = 'BBB'
+    host = 'www.bbb.org'
+    limit = BBB_LIMIT
+    parser = staticmethod(parse_bbb)
+
+    def search_url(self, query: str, location: str) -> str:
+        # BBB uses different location format
+        state_abbrev = ''
+        match = re.search(r',\s*([A-Z]{2})', location)
+        if match:
+            state_abbrev = match.group(1).lower()
+
+        city_name = location.split(',')[0].strip().lower().replace(' ', '-')
+        return (f"https://{self.host}/search?find_country=USA&find_text={quote_plus(query)}"
+                f"&find_loc={city_name}%2C%20{state_abbrev.upper()}&page=1")
+
+
+def limiter_overrides(adapters: list) -> dict:
+    """HostLimiter overrides carrying each adapter's rate and concurrency"""
+    overrides = {}
+    for adapter in adapters:
+        settings = {'concurrency': adapter.concurrency}
+        if adapter.rate is not None:
+            settings['rate'] = adapter.rate
+        overrides[adapter.host] = settings
+    return overrides
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Persistent contractor store shared across scraper runs.
+
+Every run upserts its records into SQLite, so the store always holds the
+latest known version of each contractor and a run can tell which records
+are new or changed. Per-(query, city, source) watermarks record when a
+source was last scraped so reruns can skip fresh ones, and per-record
+attempts record when a later stage (enrich_yelp.py) last tried a record.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_STORE_PATH = Path(__file__).parent / 'output' / 'contractors.sqlite'
+
+# Columns persisted for every contractor (superset of both scrapers' fields)
+FIELDS = ['name', 'phone', 'phone_clean', 'email', 'city', 'address', 'rating', 'reviews',
+          'website', 'source', 'yelp_url', 'place_id', 'types', 'search_city', 'scraped_at']
+
+# Fields that don't count as a change to the contractor itself
+VOLATILE_FIELDS = {'scraped_at', 'search_city'}
+
+# Fields that later stages fill in (enrich_yelp.py, email_crawler.py); a listing scrape
+# without them keeps the stored value
+STICKY_FIELDS = ['phone', 'phone_clean', 'email', 'address', 'website']
+
+
+def record_key(record: dict) -> str:
+    """Stable identity of a record within its source"""
+    source = record.get('source', 'google')
+    # yelp_url before phone: Yelp phones are filled in later by enrich_yelp.py
+    ident = (record.get('place_id') or record.get('yelp_url') or record.get('phone_clean')
+             or f"{record.get('name', '').lower()}|{record.get('city', '').lower()}")
+    return f"{source}:{ident}"
+
+
+def content_hash(record: dict) -> str:
+    # Hash values as the TEXT columns store them, so a record read back from the
+    # store (rating '4.5') hashes the same as the scraped one (4.5)
+    content = {f: '' if record.get(f) is None else str(record[f])
+               for f in FIELDS if f not in VOLATILE_FIELDS}
+    return hashlib.sha1(json.dumps(content, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class ContractorStore:
+    def __init__(self, path: Path = DEFAULT_STORE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(f'''
+            CREATE TABLE IF NOT EXISTS contractors (
+                record_key TEXT PRIMARY KEY,
+                {', '.join(f'{f} TEXT' for f in FIELDS)},
+                content_hash TEXT NOT NULL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_contractors_phone ON contractors (phone_clean);
+            CREATE INDEX IF NOT EXISTS idx_contractors_name ON contractors (name);
+            CREATE INDEX IF NOT EXISTS idx_contractors_source ON contractors (source);
+            CREATE INDEX IF NOT EXISTS idx_contractors_place ON contractors (place_id);
+
+            CREATE TABLE IF NOT EXISTS watermarks (
+                query TEXT NOT NULL,
+                city TEXT NOT NULL,
+                source TEXT NOT NULL,
+                scraped_at REAL NOT NULL,
+                records INTEGER NOT NULL,
+                PRIMARY KEY (query, city, source)
+            );
+
+            CREATE TABLE IF NOT EXISTS attempts (
+                record_key TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempted_at REAL NOT NULL,
+                PRIMARY KEY (record_key, stage)
+            );
+        ''')
+        self.db.commit()
+
+    def upsert_many(self, records: list) -> list:
+        """
+        Insert or update records in one transaction.
+
+        Returns a status per record: 'new', 'changed' or 'unchanged'.
+        """
+        now = time.time()
+        statuses = []
+        columns = ', '.join(FIELDS)
+        placeholders = ', '.join('?' for _ in FIELDS)
+        updates = ', '.join(f'{f} = excluded.{f}' for f in FIELDS)
+
+        with self.lock:
+            for record in records:
+                key = record_key(record)
+                row = self.db.execute(
+                    f"SELECT content_hash, {', '.join(STICKY_FIELDS)} FROM contractors WHERE record_key = ?",
+                    (key,)).fetchone()
+                if row is not None:
+                    record = {**record, **{f: row[f] for f in STICKY_FIELDS
+                                           if row[f] and not record.get(f)}}
+                digest = content_hash(record)
+                if row is None:
+                    status = 'new'
+                elif row['content_hash'] != digest:
+                    status = 'changed'
+                else:
+                    status = 'unchanged'
+                statuses.append(status)
+
+                values = [record.get(f, '') for f in FIELDS]
+                updated_at = now if status != 'unchanged' else None
+                self.db.execute(f'''
+                    INSERT INTO contractors (record_key, {columns}, content_hash,
+                                             first_seen, last_seen, updated_at)
+                    VALUES (?, {placeholders}, ?, ?, ?, ?)
+                    ON CONFLICT (record_key) DO UPDATE SET {updates},
+                        content_hash = excluded.content_hash,
+                        last_seen = excluded.last_seen,
+                        updated_at = COALESCE(?, updated_at)
+                ''', [key, *values, digest, now, now, now, updated_at])
+            self.db.commit()
+
+        return statuses
+
+    def mark_scraped(self, query: str, city: str, source: str, records: int) -> None:
+        with self.lock:
+            self.db.execute('INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?, ?, ?)',
+                            (query, city, source, time.time(), records))
+            self.db.commit()
+
+    def scraped_within(self, query: str, city: str, source: str, max_age: float) -> bool:
+        """True if this (query, city, source) was scraped less than max_age seconds ago"""
+        with self.lock:
+            row = self.db.execute(
+                'SELECT scraped_at FROM watermarks WHERE query = ? AND city = ? AND source = ?',
+                (query, city, source)).fetchone()
+        return row is not None and time.time() - row['scraped_at'] < max_age
+
+    def mark_attempted(self, record: dict, stage: str, status: str) -> None:
+        """Note that `stage` processed this record, with its outcome"""
+        with self.lock:
+            self.db.execute('INSERT OR REPLACE INTO attempts VALUES (?, ?, ?, ?)',
+                            (record_key(record), stage, status, time.time()))
+            self.db.commit()
+
+    def attempted(self, stage: str, max_age: float) -> set:
+        """record_keys that `stage` processed less than max_age seconds ago"""
+        with self.lock:
+            rows = self.db.execute('SELECT record_key FROM attempts WHERE stage = ? AND attempted_at > ?',
+                                   (stage, time.time() - max_age)).fetchall()
+        return {row[0] for row in rows}
+
+    def get_by_place_id(self, place_id: str):
+        """Latest stored record for a Google place_id, or None"""
+        with self.lock:
+            row = self.db.execute('SELECT * FROM contractors WHERE place_id = ? ORDER BY last_seen DESC',
+                                  (place_id,)).fetchone()
+        return {f: row[f] for f in FIELDS} if row else None
+
+    def iter_records(self, source: str = None):
+        """Yield every stored record (optionally one source) as a dict"""
+        query = 'SELECT * FROM contractors'
+        params = ()
+        if source:
+            query += ' WHERE source = ?'
+            params = (source,)
+        with self.lock:
+            rows = self.db.execute(query, params).fetchall()
+        for row in rows:
+            yield {f: row[f] or '' for f in FIELDS}
+
+    def iter_batches(self, batch_size: int = 5000, since: float = None):
+        """
+        Yield lists of stored rows with every column (including first/last
+        seen), batch_size at a time so a large store never sits in memory.
+        `since` keeps rows last seen at or after that Unix time.
+        """
+        query = 'SELECT * FROM contractors'
+        params = ()
+        if since is not None:
+            query += ' WHERE last_seen >= ?'
+            params = (since,)
+        with self.lock:
+            cursor = self.db.execute(query + ' ORDER BY record_key', params)
+        while True:
+            with self.lock:
+                rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield [dict(row) for row in rows]
+
+    def distinct(self, field: str) -> list:
+        """Sorted distinct non-empty values of one column"""
+        if field not in FIELDS:
+            raise ValueError(f"unknown field {field!r}")
+        with self.lock:
+            rows = self.db.execute(f"SELECT DISTINCT {field} FROM contractors WHERE {field} != '' "
+                                   f"ORDER BY {field}").fetchall()
+        return [row[0] for row in rows]
+
+    def count(self) -> int:
+        with self.lock:
+            return self.db.execute('SELECT COUNT(*) FROM contractors').fetchone()[0]
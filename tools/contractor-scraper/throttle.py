@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Per-host politeness for the contractor scrapers.
+
+Replaces fixed time.sleep() calls with a token bucket and a concurrency cap
+per host, so requests to one site stay spaced out while unrelated sites are
+fetched in parallel.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, up to `burst` saved up"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a token is available. Returns seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class HostLimiter:
+    """Token bucket + semaphore per host, created lazily on first use"""
+
+    def __init__(self, rate: float = 1 / 3, concurrency: int = 1, overrides: dict = None):
+        # overrides: {'www.yelp.com': {'rate': 0.2, 'concurrency': 1}}
+        self.rate = rate
+        self.concurrency = concurrency
+        self.overrides = overrides or {}
+        self.buckets = {}
+        self.semaphores = {}
+        self.waited = {}
+        self.lock = threading.Lock()
+
+    def _host_state(self, host: str):
+        with self.lock:
+            if host not in self.buckets:
+                settings = self.overrides.get(host, {})
+                self.buckets[host] = TokenBucket(settings.get('rate', self.rate))
+                self.semaphores[host] = threading.BoundedSemaphore(
+                    settings.get('concurrency', self.concurrency))
+                self.waited[host] = 0.0
+            return self.buckets[host], self.semaphores[host]
+
+    @contextmanager
+    def slot(self, url: str):
+        """Hold a request slot for the URL's host for the duration of the block"""
+        host = urlsplit(url).hostname or ''
+        bucket, semaphore = self._host_state(host)
+        with semaphore:
+            waited = bucket.acquire()
+            with self.lock:
+                self.waited[host] += waited
+            yield
+
+    def total_wait(self) -> float:
+        """Seconds spent blocked on politeness across all hosts"""
+        with self.lock:
+            return sum(self.waited.values())